@@ -0,0 +1,115 @@
+# Tracks when players were last active (sent a message in the bot's channels
+# or reacted to one) for AFK removal. Activity is recorded in memory and
+# written every ACTIVITY_FLUSH_SECONDS (see activity_flush_task) as one bulk
+# update, instead of a transaction per message or reaction. The update goes
+# through the db writer (see DBExecutor.write), so it shares a commit with
+# the other writes queued at the same time.
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+import discord_bots.config as config
+from discord_bots.db_executor import db
+from discord_bots.models import Player
+from discord_bots.utils import utc_now_naive
+
+_log = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    def __init__(self):
+        # player id -> (last activity, display name), not written yet
+        self._pending: dict[int, tuple[datetime, str]] = {}
+        # player id -> last activity since startup, written or not
+        self._last_activity_at: dict[int, datetime] = {}
+        # Players known to have a row in the database
+        self._known_player_ids: set[int] = set()
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, player_id: int, name: str, at: datetime | None = None):
+        at = at or utc_now_naive()
+        self._pending[player_id] = (at, name)
+        self._last_activity_at[player_id] = at
+
+    def is_known(self, player_id: int) -> bool:
+        """
+        Whether the player is known to exist in the database. Flush after
+        recording the activity of an unknown player if the player is needed
+        right away, e.g. by a command.
+        """
+        return player_id in self._known_player_ids
+
+    def last_activity_at(self, player_id: int) -> datetime | None:
+        """
+        The player's last activity since startup, including activity that
+        isn't written to the database yet. Naive UTC.
+        """
+        return self._last_activity_at.get(player_id)
+
+    def active_since(self, player_id: int, since: datetime) -> bool:
+        last_activity_at = self._last_activity_at.get(player_id)
+        return last_activity_at is not None and last_activity_at >= since.replace(
+            tzinfo=None
+        )
+
+    async def flush(self):
+        """
+        Write the pending activity: one bulk update for the existing players,
+        and create the players that don't exist yet
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                created = await db.write(_write_activity, pending)
+            except Exception:
+                # Keep the activity for the next flush, unless it's been
+                # superseded in the meantime
+                for player_id, value in pending.items():
+                    self._pending.setdefault(player_id, value)
+                raise
+            self._known_player_ids.update(pending)
+            _log.debug(
+                f"[ActivityTracker.flush] Wrote activity of {len(pending)} players, created {created}"
+            )
+
+
+def _write_activity(
+    session: SQLAlchemySession, pending: dict[int, tuple[datetime, str]]
+) -> int:
+    """
+    Write the activity to the players, creating the players that don't exist
+    yet. Runs on the db writer, so it doesn't commit. Returns the number of
+    players created.
+    """
+    existing_ids: set[int] = set(
+        session.scalars(select(Player.id).where(Player.id.in_(pending)))
+    )
+    updates = [
+        {"id": player_id, "last_activity_at": at, "name": name}
+        for player_id, (at, name) in pending.items()
+        if player_id in existing_ids
+    ]
+    if updates:
+        # Bulk UPDATE by primary key
+        session.execute(update(Player), updates)
+    session.add_all(
+        [
+            Player(
+                id=player_id,
+                name=name,
+                last_activity_at=at,
+                currency=config.STARTING_CURRENCY,
+            )
+            for player_id, (at, name) in pending.items()
+            if player_id not in existing_ids
+        ]
+    )
+    return len(pending) - len(existing_ids)
+
+
+activity_tracker = ActivityTracker()
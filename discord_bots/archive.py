@@ -0,0 +1,350 @@
+# Moves old history out of the hot tables, so that the queries on them only
+# ever see recent rows. Finished games that finished more than
+# ARCHIVE_AFTER_DAYS ago are moved into the archived_* tables (see models.py)
+# together with their players and economy transactions, as are other economy
+# transactions and rotation map history older than that.
+#
+# The results of archived games are added to FinishedGameSummary, so that
+# stats that count finished games (see map_stats.py) don't change. Player
+# stats come from PlayerStatsDaily and the leaderboard only looks at the last
+# 30 days, so neither is affected. Games that are still referenced by a
+# commend, a prediction or a queue waitlist are kept.
+#
+# Rows are moved in batches of ARCHIVE_BATCH_SIZE games with a commit per
+# batch, so a run can be interrupted at any point. restore moves them back.
+import logging
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Table, and_, case, delete, exists, func, insert, or_, select
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+from discord_bots.leaderboard import LEADERBOARD_WINDOW
+from discord_bots.models import (
+    Commend,
+    EconomyPrediction,
+    EconomyTransaction,
+    FinishedGame,
+    FinishedGamePlayer,
+    FinishedGameSummary,
+    QueueWaitlist,
+    RotationMapHistory,
+    archived_economy_transaction,
+    archived_finished_game,
+    archived_finished_game_player,
+    archived_rotation_map_history,
+)
+
+_log = logging.getLogger(__name__)
+
+MIN_ARCHIVE_AFTER_DAYS = LEADERBOARD_WINDOW.days
+
+
+@dataclass
+class ArchiveResult:
+    """
+    Number of rows moved, or that would be moved in a dry run
+    """
+
+    finished_games: int = 0
+    finished_game_players: int = 0
+    economy_transactions: int = 0
+    rotation_map_histories: int = 0
+
+    def __iadd__(self, other: "ArchiveResult") -> "ArchiveResult":
+        for result_field in fields(self):
+            setattr(
+                self,
+                result_field.name,
+                getattr(self, result_field.name) + getattr(other, result_field.name),
+            )
+        return self
+
+
+def archive_cutoff(archive_after_days: int) -> datetime:
+    """
+    Rows older than this are archived. Naive UTC, like the stored timestamps.
+    """
+    if archive_after_days < MIN_ARCHIVE_AFTER_DAYS:
+        raise ValueError(
+            f"Can't archive history newer than {MIN_ARCHIVE_AFTER_DAYS} days, the leaderboard window"
+        )
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        days=archive_after_days
+    )
+
+
+def _move(session: SQLAlchemySession, source: Table, target: Table, *conditions) -> int:
+    """
+    Copy the rows of source matching the conditions to target, then delete
+    them from source. Returns the number of rows moved.
+    """
+    names = [column.name for column in target.columns]
+    session.execute(
+        insert(target).from_select(
+            names, select(*[source.c[name] for name in names]).where(*conditions)
+        )
+    )
+    return session.execute(delete(source).where(*conditions)).rowcount
+
+
+def _add_to_summary(
+    session: SQLAlchemySession, finished_games: Table, game_ids: list[str], sign: int
+):
+    """
+    Add (sign 1) or subtract (sign -1) the results of the games to the summary
+    """
+    rows = session.execute(
+        select(
+            finished_games.c.category_name,
+            finished_games.c.map_full_name,
+            func.sum(case((finished_games.c.winning_team == 0, 1), else_=0)),
+            func.sum(case((finished_games.c.winning_team == 1, 1), else_=0)),
+            func.sum(case((finished_games.c.winning_team == -1, 1), else_=0)),
+        )
+        .where(finished_games.c.id.in_(game_ids))
+        .group_by(finished_games.c.category_name, finished_games.c.map_full_name)
+    ).all()
+    for category_name, map_full_name, team0_wins, team1_wins, ties in rows:
+        # == None renders as IS NULL, so games without a category or map match
+        summary: FinishedGameSummary | None = (
+            session.query(FinishedGameSummary)
+            .filter(
+                FinishedGameSummary.category_name == category_name,
+                FinishedGameSummary.map_full_name == map_full_name,
+            )
+            .first()
+        )
+        if not summary:
+            summary = FinishedGameSummary(category_name, map_full_name)
+            session.add(summary)
+        summary.team0_wins += sign * int(team0_wins)
+        summary.team1_wins += sign * int(team1_wins)
+        summary.ties += sign * int(ties)
+    session.flush()
+
+
+def _archivable_games(cutoff: datetime):
+    return select(FinishedGame.id).where(
+        FinishedGame.finished_at < cutoff,
+        ~exists().where(Commend.finished_game_id == FinishedGame.id),
+        ~exists().where(EconomyPrediction.finished_game_id == FinishedGame.id),
+        ~exists().where(QueueWaitlist.finished_game_id == FinishedGame.id),
+    )
+
+
+def _count(session: SQLAlchemySession, table: Table, *conditions) -> int:
+    return session.scalar(select(func.count()).select_from(table).where(*conditions))
+
+
+def _move_in_batches(
+    session: SQLAlchemySession,
+    source: Table,
+    target: Table,
+    batch_size: int,
+    *conditions,
+) -> int:
+    moved = 0
+    while True:
+        ids: list[str] = session.scalars(
+            select(source.c.id).where(*conditions).limit(batch_size)
+        ).all()
+        if not ids:
+            return moved
+        moved += _move(session, source, target, source.c.id.in_(ids))
+        session.commit()
+
+
+def archive(
+    session: SQLAlchemySession,
+    archive_after_days: int,
+    batch_size: int,
+    dry_run: bool = False,
+) -> ArchiveResult:
+    """
+    Move the history older than archive_after_days to the archive tables,
+    committing every batch_size games (or other rows). In a dry run nothing
+    is changed and the result is what would be moved.
+    """
+    cutoff = archive_cutoff(archive_after_days)
+    game_ids_query = _archivable_games(cutoff)
+    loose_transaction_conditions = [
+        EconomyTransaction.finished_game_id.is_(None),
+        EconomyTransaction.transacted_at < cutoff,
+    ]
+    if dry_run:
+        return ArchiveResult(
+            finished_games=_count(
+                session,
+                FinishedGame.__table__,
+                FinishedGame.id.in_(game_ids_query),
+            ),
+            finished_game_players=_count(
+                session,
+                FinishedGamePlayer.__table__,
+                FinishedGamePlayer.finished_game_id.in_(game_ids_query),
+            ),
+            economy_transactions=_count(
+                session,
+                EconomyTransaction.__table__,
+                or_(
+                    EconomyTransaction.finished_game_id.in_(game_ids_query),
+                    and_(*loose_transaction_conditions),
+                ),
+            ),
+            rotation_map_histories=_count(
+                session,
+                RotationMapHistory.__table__,
+                RotationMapHistory.selected_at < cutoff,
+            ),
+        )
+
+    result = ArchiveResult()
+    while True:
+        game_ids: list[str] = session.scalars(
+            game_ids_query.order_by(FinishedGame.finished_at).limit(batch_size)
+        ).all()
+        if not game_ids:
+            break
+        _add_to_summary(session, FinishedGame.__table__, game_ids, 1)
+        # Children first, they reference the games
+        batch = ArchiveResult(
+            finished_game_players=_move(
+                session,
+                FinishedGamePlayer.__table__,
+                archived_finished_game_player,
+                FinishedGamePlayer.finished_game_id.in_(game_ids),
+            ),
+            economy_transactions=_move(
+                session,
+                EconomyTransaction.__table__,
+                archived_economy_transaction,
+                EconomyTransaction.finished_game_id.in_(game_ids),
+            ),
+        )
+        batch.finished_games = _move(
+            session,
+            FinishedGame.__table__,
+            archived_finished_game,
+            FinishedGame.id.in_(game_ids),
+        )
+        session.commit()
+        _log.info(f"[archive] Archived {batch}")
+        result += batch
+
+    result.economy_transactions += _move_in_batches(
+        session,
+        EconomyTransaction.__table__,
+        archived_economy_transaction,
+        batch_size,
+        *loose_transaction_conditions,
+    )
+    result.rotation_map_histories += _move_in_batches(
+        session,
+        RotationMapHistory.__table__,
+        archived_rotation_map_history,
+        batch_size,
+        RotationMapHistory.selected_at < cutoff,
+    )
+    _log.info(f"[archive] Archived history before {cutoff}: {result}")
+    return result
+
+
+def restore(
+    session: SQLAlchemySession,
+    restore_after: datetime | None,
+    batch_size: int,
+    dry_run: bool = False,
+) -> ArchiveResult:
+    """
+    Move the archived history newer than restore_after (naive UTC), or all of
+    it if None, back to the hot tables, committing every batch_size games (or
+    other rows). In a dry run nothing is changed and the result is what would
+    be moved.
+    """
+    game_conditions = []
+    loose_transaction_conditions = [
+        archived_economy_transaction.c.finished_game_id.is_(None)
+    ]
+    history_conditions = []
+    if restore_after is not None:
+        game_conditions.append(archived_finished_game.c.finished_at >= restore_after)
+        loose_transaction_conditions.append(
+            archived_economy_transaction.c.transacted_at >= restore_after
+        )
+        history_conditions.append(
+            archived_rotation_map_history.c.selected_at >= restore_after
+        )
+    game_ids_query = select(archived_finished_game.c.id).where(*game_conditions)
+    if dry_run:
+        return ArchiveResult(
+            finished_games=_count(session, archived_finished_game, *game_conditions),
+            finished_game_players=_count(
+                session,
+                archived_finished_game_player,
+                archived_finished_game_player.c.finished_game_id.in_(game_ids_query),
+            ),
+            economy_transactions=_count(
+                session,
+                archived_economy_transaction,
+                or_(
+                    archived_economy_transaction.c.finished_game_id.in_(game_ids_query),
+                    and_(*loose_transaction_conditions),
+                ),
+            ),
+            rotation_map_histories=_count(
+                session, archived_rotation_map_history, *history_conditions
+            ),
+        )
+
+    result = ArchiveResult()
+    while True:
+        game_ids: list[str] = session.scalars(
+            game_ids_query.order_by(archived_finished_game.c.finished_at.desc()).limit(
+                batch_size
+            )
+        ).all()
+        if not game_ids:
+            break
+        # Parents first this time
+        batch = ArchiveResult(
+            finished_games=_move(
+                session,
+                archived_finished_game,
+                FinishedGame.__table__,
+                archived_finished_game.c.id.in_(game_ids),
+            ),
+            finished_game_players=_move(
+                session,
+                archived_finished_game_player,
+                FinishedGamePlayer.__table__,
+                archived_finished_game_player.c.finished_game_id.in_(game_ids),
+            ),
+            economy_transactions=_move(
+                session,
+                archived_economy_transaction,
+                EconomyTransaction.__table__,
+                archived_economy_transaction.c.finished_game_id.in_(game_ids),
+            ),
+        )
+        _add_to_summary(session, FinishedGame.__table__, game_ids, -1)
+        session.commit()
+        _log.info(f"[restore] Restored {batch}")
+        result += batch
+
+    result.economy_transactions += _move_in_batches(
+        session,
+        archived_economy_transaction,
+        EconomyTransaction.__table__,
+        batch_size,
+        *loose_transaction_conditions,
+    )
+    result.rotation_map_histories += _move_in_batches(
+        session,
+        archived_rotation_map_history,
+        RotationMapHistory.__table__,
+        batch_size,
+        *history_conditions,
+    )
+    _log.info(f"[restore] Restored history after {restore_after}: {result}")
+    return result
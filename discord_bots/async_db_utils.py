@@ -5,17 +5,31 @@ This module provides utilities for gradually migrating from sync to async SQLAlc
 """
 
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Callable, Optional, TypeVar
-
-from sqlalchemy import and_, delete, select, update
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Iterable,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from sqlalchemy import and_, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ORMOption
 
 from .models import AsyncSessionLocal
 
 T = TypeVar("T")
 
 
-def _build_query(model_class: type[T], *conditions):
+def _build_query(
+    model_class: type[T],
+    *conditions,
+    options: Sequence[ORMOption] = (),
+    order_by: Sequence[Any] = (),
+):
     """Helper function to build a query with conditions."""
     query = select(model_class)
     if conditions:
@@ -23,6 +37,10 @@ def _build_query(model_class: type[T], *conditions):
             query = query.where(conditions[0])
         else:
             query = query.where(and_(*conditions))
+    if options:
+        query = query.options(*options)
+    if order_by:
+        query = query.order_by(*order_by)
     return query
 
 
@@ -50,7 +68,11 @@ async def async_session() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def async_query_first(
-    session: AsyncSession, model_class: type[T], *conditions
+    session: AsyncSession,
+    model_class: type[T],
+    *conditions,
+    options: Sequence[ORMOption] = (),
+    order_by: Sequence[Any] = (),
 ) -> Optional[T]:
     """
     Async query for fetching a single record using provided session.
@@ -59,6 +81,8 @@ async def async_query_first(
         session: The async session to use for the query
         model_class: The SQLAlchemy model class
         *conditions: One or more filter conditions (combined with AND unless using and_/or_)
+        options: Loader options, e.g. selectinload(...) for eager loading
+        order_by: Columns to order by before taking the first row
 
     Returns:
         The first model instance or None if not found
@@ -91,13 +115,17 @@ async def async_query_first(
                 or_(Player.discord_id == 12345, Player.name == "Test")
             )
     """
-    query = _build_query(model_class, *conditions)
+    query = _build_query(model_class, *conditions, options=options, order_by=order_by)
     result = await session.scalars(query)  # Use scalars for ORM objects over execute
     return result.first()
 
 
 async def async_query_all(
-    session: AsyncSession, model_class: type[T], *conditions
+    session: AsyncSession,
+    model_class: type[T],
+    *conditions,
+    options: Sequence[ORMOption] = (),
+    order_by: Sequence[Any] = (),
 ) -> list[T]:
     """
     Async query for fetching multiple records using provided session.
@@ -106,6 +134,8 @@ async def async_query_all(
         session: The async session to use for the query
         model_class: The SQLAlchemy model class
         *conditions: Zero or more filter conditions (combined with AND unless using and_/or_)
+        options: Loader options, e.g. selectinload(...) for eager loading
+        order_by: Columns to order by
 
     Returns:
         List of model instances
@@ -132,12 +162,63 @@ async def async_query_all(
                 Player,
                 or_(Player.discord_id == 12345, Player.name.like("%Admin%"))
             )
+
+            # Ordered, with a relationship loaded up front
+            queues = await async_query_all(
+                session,
+                Queue,
+                options=[selectinload(Queue.rotation)],
+                order_by=[Queue.ordinal.asc()],
+            )
     """
-    query = _build_query(model_class, *conditions)
+    query = _build_query(model_class, *conditions, options=options, order_by=order_by)
     result = await session.scalars(query)  # Use scalars for ORM objects over execute
     return list(result.all())
 
 
+async def async_get_by_ids(
+    session: AsyncSession, model_class: type[T], record_ids: Iterable[Any]
+) -> dict[Any, T]:
+    """
+    Fetch many records by ID with a single query.
+
+    Args:
+        session: The async session to use for the query
+        model_class: The SQLAlchemy model class
+        record_ids: The IDs to fetch
+
+    Returns:
+        The model instances keyed by ID. IDs that don't exist are left out.
+
+    Example:
+        async with async_session() as session:
+            players_by_id = await async_get_by_ids(session, Player, player_ids)
+    """
+    record_ids = list(record_ids)
+    if not record_ids:
+        return {}
+    result = await session.scalars(
+        select(model_class).where(model_class.id.in_(record_ids))
+    )
+    return {record.id: record for record in result.all()}
+
+
+async def async_count(session: AsyncSession, model_class: type, *conditions) -> int:
+    """
+    Count the records matching the conditions without loading them.
+
+    Example:
+        async with async_session() as session:
+            votes = await async_count(
+                session, SkipMapVote, SkipMapVote.rotation_id == rotation.id
+            )
+    """
+    query = select(func.count()).select_from(model_class)
+    if conditions:
+        query = query.where(and_(*conditions))
+    return await session.scalar(query) or 0
+
+
 async def async_update_by_id(
     session: AsyncSession, model_class: type, record_id: Any, **values
 ) -> bool:
@@ -188,6 +269,66 @@ async def async_delete_by_id(
     return result.rowcount > 0
 
 
+async def async_update_where(
+    session: AsyncSession, model_class: type, *conditions, **values
+) -> int:
+    """
+    Update every record matching the conditions with one statement.
+
+    Returns:
+        The number of records updated
+
+    Example:
+        async with async_session() as session:
+            await async_update_where(
+                session, Player, Player.id.in_(player_ids), is_banned=True
+            )
+            await session.commit()
+    """
+    stmt = update(model_class).values(**values)
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
+async def async_delete_where(
+    session: AsyncSession, model_class: type, *conditions
+) -> int:
+    """
+    Delete every record matching the conditions with one statement.
+
+    Returns:
+        The number of records deleted
+
+    Example:
+        async with async_session() as session:
+            await async_delete_where(
+                session, QueuePlayer, QueuePlayer.player_id.in_(player_ids)
+            )
+            await session.commit()
+    """
+    stmt = delete(model_class)
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
+async def async_add_all(session: AsyncSession, records: Iterable[Any]) -> None:
+    """
+    Add many new records and flush them in one round trip, so that database
+    errors (e.g. IntegrityError) surface here instead of at commit.
+
+    Example:
+        async with async_session() as session:
+            await async_add_all(session, queue_players)
+            await session.commit()
+    """
+    session.add_all(list(records))
+    await session.flush()
+
+
 def run_async_in_sync(async_func: Callable[..., Any], *args, **kwargs):
     """
     Helper to run async functions in sync code during migration.
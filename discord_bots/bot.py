@@ -1,8 +1,25 @@
 # This file exists to avoid a circular reference
 
 import discord
+from discord import Interaction, InteractionType, app_commands
 from discord.ext import commands
 import discord_bots.config as config
+from discord_bots.query_stats import start_run
+
+
+class CommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        # Runs in the same task as the command, so its queries are attributed
+        # to it. The run is finished in on_app_command_completion (main.py).
+        if (
+            interaction.type is InteractionType.application_command
+            and interaction.command
+        ):
+            interaction.extras["query_run"] = start_run(
+                f"/{interaction.command.qualified_name}"
+            )
+        return True
+
 
 intents = discord.Intents.all()  # TODO: should manually specify each intent
 intents.members = True
@@ -14,4 +31,5 @@ bot = commands.Bot(
         width=108, verify_checks=False, dm_help=True
     ),
     intents=intents,
+    tree_cls=CommandTree,
 )
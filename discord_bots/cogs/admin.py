@@ -3,19 +3,22 @@ import os
 import sys
 from datetime import datetime, timezone
 from shutil import copyfile
-from typing import Literal
+from typing import Literal, Optional
 
 import discord
 from discord import Colour, Embed, Interaction, Member, Role, TextChannel, app_commands
 from discord.ext.commands import Bot
 from discord.utils import escape_markdown
 from sqlalchemy.orm.session import Session as SQLAlchemySession
+from table2ascii import PresetStyle, table2ascii
 
 import discord_bots.config as config
 from discord_bots.bot import bot
 from discord_bots.checks import is_admin_app_command, is_command_channel
 from discord_bots.cogs.base import BaseCog
 from discord_bots.cogs.in_progress_game import InProgressGameCommands
+from discord_bots.finished_game_cache import finished_game_cache
+from discord_bots.leaderboard import leaderboard
 from discord_bots.models import (
     AdminRole,
     CustomCommand,
@@ -35,11 +38,20 @@ from discord_bots.models import (
     SkipMapVote,
     VotePassedWaitlistPlayer,
 )
+from discord_bots.player_stats import (
+    change_finished_game_winner,
+    remove_finished_game,
+)
+from discord_bots.query_stats import query_stats, reset_query_stats
 from discord_bots.utils import (
     add_empty_field,
+    clear_leaderboard_pages,
+    code_block,
     command_autocomplete,
     del_player_from_queues_and_waitlists,
+    finished_game_autocomplete,
     finished_game_str,
+    game_id_filter,
     in_progress_game_autocomplete,
     map_short_name_autocomplete,
     print_leaderboard,
@@ -51,6 +63,8 @@ from discord_bots.views.embed_builder_view import EmbedBuilderView
 
 _log = logging.getLogger(__name__)
 
+QUERY_STATS_ROWS = 15
+
 
 class AdminCommands(BaseCog):
     def __init__(self, bot: Bot):
@@ -289,12 +303,13 @@ class AdminCommands(BaseCog):
     @app_commands.check(is_admin_app_command)
     @app_commands.check(is_command_channel)
     @app_commands.describe(game_id="Finished game id")
+    @app_commands.autocomplete(game_id=finished_game_autocomplete)
     async def deletegame(self, interaction: Interaction, game_id: str):
         session: SQLAlchemySession
         with Session() as session:
             finished_game: FinishedGame | None = (
                 session.query(FinishedGame)
-                .filter(FinishedGame.game_id.startswith(game_id))
+                .filter(game_id_filter(FinishedGame, game_id))
                 .first()
             )
             if not finished_game:
@@ -306,6 +321,13 @@ class AdminCommands(BaseCog):
                     ephemeral=True,
                 )
                 return
+            finished_game_players: list[FinishedGamePlayer] = (
+                session.query(FinishedGamePlayer)
+                .filter(FinishedGamePlayer.finished_game_id == finished_game.id)
+                .all()
+            )
+            remove_finished_game(session, finished_game, finished_game_players)
+            finished_game_cache.invalidate(finished_game.id)
             session.query(FinishedGamePlayer).filter(
                 FinishedGamePlayer.finished_game_id == finished_game.id
             ).delete()
@@ -317,6 +339,7 @@ class AdminCommands(BaseCog):
                 )
             )
             session.commit()
+            leaderboard.invalidate()
 
     @admin_group.command(
         name="delplayer", description="Admin command to delete player from all queues"
@@ -374,6 +397,7 @@ class AdminCommands(BaseCog):
     @app_commands.check(is_admin_app_command)
     @app_commands.check(is_command_channel)
     @app_commands.describe(game_id="Finished game id", outcome="Tie, BE, DS")
+    @app_commands.autocomplete(game_id=finished_game_autocomplete)
     async def editgamewinner(
         self,
         interaction: Interaction,
@@ -385,7 +409,7 @@ class AdminCommands(BaseCog):
         with Session() as session:
             game: FinishedGame | None = (
                 session.query(FinishedGame)
-                .filter(FinishedGame.game_id.startswith(game_id))
+                .filter(game_id_filter(FinishedGame, game_id))
                 .first()
             )
             if not game:
@@ -397,6 +421,7 @@ class AdminCommands(BaseCog):
                     ephemeral=True,
                 )
                 return
+            previous_winning_team = game.winning_team
             outcome_lower = outcome.lower()
             if outcome_lower == "tie":
                 game.winning_team = -1
@@ -415,6 +440,16 @@ class AdminCommands(BaseCog):
                 return
 
             session.add(game)
+            if game.winning_team != previous_winning_team:
+                finished_game_players: list[FinishedGamePlayer] = (
+                    session.query(FinishedGamePlayer)
+                    .filter(FinishedGamePlayer.finished_game_id == game.id)
+                    .all()
+                )
+                change_finished_game_winner(
+                    session, game, finished_game_players, previous_winning_team
+                )
+                finished_game_cache.invalidate(game.id)
             await interaction.response.send_message(
                 embed=Embed(
                     description=f"Game {game_id} outcome changed:\n\n"
@@ -423,6 +458,69 @@ class AdminCommands(BaseCog):
                 )
             )
             session.commit()
+            leaderboard.invalidate()
+
+    @admin_group.command(
+        name="querystats",
+        description="Shows the commands and tasks that run the most queries since startup",
+    )
+    @app_commands.check(is_admin_app_command)
+    @app_commands.check(is_command_channel)
+    @app_commands.describe(
+        name="Show the slowest statements of this command or task instead",
+        reset="Clear the stats after showing them",
+    )
+    async def querystats(
+        self,
+        interaction: Interaction,
+        name: Optional[str] = None,
+        reset: bool = False,
+    ):
+        stats = query_stats()
+        if name:
+            if name not in stats:
+                await interaction.response.send_message(
+                    embed=Embed(
+                        description=f"No queries recorded for {name}",
+                        colour=Colour.red(),
+                    ),
+                    ephemeral=True,
+                )
+                return
+            statements = "\n".join(
+                f"{1000 * seconds:.1f}ms {statement}"
+                for seconds, statement in stats[name].slowest
+            )
+            content = f"Slowest statements of {name}\n{code_block(statements)}"
+        else:
+            worst = sorted(
+                stats.items(), key=lambda item: item[1].db_seconds, reverse=True
+            )[:QUERY_STATS_ROWS]
+            table = table2ascii(
+                header=["Name", "Runs", "Queries", "Per run", "Max", "DB ms", "Max ms"],
+                body=[
+                    [
+                        operation,
+                        stat.runs,
+                        stat.queries,
+                        f"{stat.queries_per_run:.1f}",
+                        stat.max_queries,
+                        f"{1000 * stat.db_seconds:.0f}",
+                        f"{1000 * stat.max_db_seconds:.0f}",
+                    ]
+                    for operation, stat in worst
+                ],
+                style=PresetStyle.plain,
+                first_col_heading=True,
+            )
+            content = f"Queries since startup, by total time\n{code_block(table)}"
+        if reset:
+            reset_query_stats()
+        await interaction.response.send_message(
+            # Discord's message limit
+            content=content[:2000],
+            ephemeral=True,
+        )
 
     @admin_group.command(name="remove", description="Remove an admin")
     @app_commands.check(is_admin_app_command)
@@ -698,6 +796,10 @@ class AdminCommands(BaseCog):
         try:
             await interaction.response.defer(ephemeral=True)
             await channel.purge()
+            session: SQLAlchemySession
+            with Session() as session:
+                clear_leaderboard_pages(session, channel.id)
+                session.commit()
             await print_leaderboard()
         except:
             _log.exception(
@@ -739,12 +841,12 @@ class AdminCommands(BaseCog):
         with Session() as session:
             ipg = (
                 session.query(InProgressGame)
-                .filter(InProgressGame.id.startswith(game_id))
+                .filter(game_id_filter(InProgressGame, game_id))
                 .first()
             )
             finished_game = (
                 session.query(FinishedGame)
-                .filter(FinishedGame.game_id.startswith(game_id))
+                .filter(game_id_filter(FinishedGame, game_id))
                 .first()
             )
             game: InProgressGame | FinishedGame
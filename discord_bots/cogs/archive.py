@@ -0,0 +1,104 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from discord import Colour, Embed, Interaction, app_commands
+from discord.ext.commands import Bot
+
+import discord_bots.config as config
+from discord_bots.archive import ArchiveResult, archive, restore
+from discord_bots.checks import is_admin_app_command, is_command_channel
+from discord_bots.cogs.base import BaseCog
+from discord_bots.db_executor import db
+
+_log = logging.getLogger(__name__)
+
+
+def _archive_result_str(result: ArchiveResult) -> str:
+    return "\n".join(
+        [
+            f"Finished games: **{result.finished_games}**",
+            f"Finished game players: **{result.finished_game_players}**",
+            f"Economy transactions: **{result.economy_transactions}**",
+            f"Rotation map history: **{result.rotation_map_histories}**",
+        ]
+    )
+
+
+class ArchiveCommands(BaseCog):
+    def __init__(self, bot: Bot):
+        super().__init__(bot)
+
+    group = app_commands.Group(name="archive", description="Archive commands")
+
+    @group.command(
+        name="run",
+        description="Moves old finished games and history to the archive tables",
+    )
+    @app_commands.check(is_admin_app_command)
+    @app_commands.check(is_command_channel)
+    @app_commands.describe(
+        days="Archive history older than this many days, defaults to ARCHIVE_AFTER_DAYS",
+        dry_run="Only show what would be archived",
+    )
+    async def runarchive(
+        self,
+        interaction: Interaction,
+        days: Optional[int] = None,
+        dry_run: bool = True,
+    ):
+        days = days or config.ARCHIVE_AFTER_DAYS
+        await interaction.response.defer(ephemeral=True)
+        try:
+            result = await db.run(
+                archive, days, config.ARCHIVE_BATCH_SIZE, dry_run=dry_run
+            )
+        except ValueError as ve:
+            await interaction.followup.send(
+                embed=Embed(description=str(ve), colour=Colour.red()),
+                ephemeral=True,
+            )
+            return
+        await interaction.followup.send(
+            embed=Embed(
+                title=f"{'Would archive' if dry_run else 'Archived'} history older than {days} days",
+                description=_archive_result_str(result),
+                colour=Colour.blue() if dry_run else Colour.green(),
+            ),
+            ephemeral=True,
+        )
+
+    @group.command(
+        name="restore",
+        description="Moves archived finished games and history back",
+    )
+    @app_commands.check(is_admin_app_command)
+    @app_commands.check(is_command_channel)
+    @app_commands.describe(
+        days="Restore the archived history of the last this many days, all of it if not given",
+        dry_run="Only show what would be restored",
+    )
+    async def restorearchive(
+        self,
+        interaction: Interaction,
+        days: Optional[int] = None,
+        dry_run: bool = True,
+    ):
+        restore_after: datetime | None = None
+        if days:
+            restore_after = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+                days=days
+            )
+        await interaction.response.defer(ephemeral=True)
+        result = await db.run(
+            restore, restore_after, config.ARCHIVE_BATCH_SIZE, dry_run=dry_run
+        )
+        period = f"of the last {days} days" if days else "of all time"
+        await interaction.followup.send(
+            embed=Embed(
+                title=f"{'Would restore' if dry_run else 'Restored'} archived history {period}",
+                description=_archive_result_str(result),
+                colour=Colour.blue() if dry_run else Colour.green(),
+            ),
+            ephemeral=True,
+        )
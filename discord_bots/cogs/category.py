@@ -7,7 +7,9 @@ from sqlalchemy.orm.session import Session as SQLAlchemySession
 
 from discord_bots.checks import is_admin_app_command, is_command_channel
 from discord_bots.cogs.base import BaseCog
+from discord_bots.leaderboard import leaderboard
 from discord_bots.models import Category, PlayerCategoryTrueskill, Queue, Session
+from discord_bots.percentiles import percentile_index
 from discord_bots.utils import default_sigma_decay_amount, build_category_str
 from discord_bots.views.configure_category import CategoryConfigureView
 
@@ -67,6 +69,7 @@ class CategoryCommands(BaseCog):
                     ephemeral=True,
                 )
                 session.commit()
+                leaderboard.invalidate()
             else:
                 await interaction.delete_original_response()
                 await interaction.followup.send(
@@ -109,6 +112,8 @@ class CategoryCommands(BaseCog):
                 )
             )
             session.commit()
+            leaderboard.invalidate()
+            percentile_index.invalidate()
 
     @group.command(name="show", description="Show category details")
     @app_commands.check(is_command_channel)
@@ -1,23 +1,17 @@
 import asyncio
 import logging
-from bisect import bisect
-from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import Optional
 
 from discord import Colour, Embed, Interaction, Message, TextChannel, app_commands
 from discord.ext.commands import Bot
 from sqlalchemy.orm.session import Session as SQLAlchemySession
 from table2ascii import Alignment, PresetStyle, table2ascii
-from trueskill import Rating
 
 from discord_bots.checks import is_command_channel
 from discord_bots.cogs.base import BaseCog
 from discord_bots.config import SHOW_TRUESKILL
 from discord_bots.models import (
     Category,
-    Config,
-    FinishedGame,
-    FinishedGamePlayer,
     InProgressGame,
     InProgressGamePlayer,
     Map,
@@ -26,6 +20,9 @@ from discord_bots.models import (
     Position,
     Session,
 )
+from discord_bots.percentiles import percentile_index, top_percent_label
+from discord_bots.player_stats import WinsLossesTies, get_player_stats, sum_windows
+from discord_bots.table_cache import table_cache
 from discord_bots.utils import (
     MU_LOWER_UNICODE,
     SIGMA_LOWER_UNICODE,
@@ -209,7 +206,7 @@ class CommonCommands(BaseCog):
         """
         session: SQLAlchemySession
         with Session() as session:
-            config = session.query(Config).first()
+            config = table_cache.config()
             player: Player | None = (
                 session.query(Player).filter(Player.id == interaction.user.id).first()
             )
@@ -233,12 +230,8 @@ class CommonCommands(BaseCog):
                 )
                 return
 
-            fgps: List[FinishedGamePlayer] | None = (
-                session.query(FinishedGamePlayer)
-                .filter(FinishedGamePlayer.player_id == player.id)
-                .all()
-            )
-            if not fgps:
+            buckets = get_player_stats(session, player.id)
+            if not buckets:
                 await interaction.response.send_message(
                     embed=Embed(
                         description="You have not played any games",
@@ -248,117 +241,23 @@ class CommonCommands(BaseCog):
                 )
                 return
 
-            finished_game_ids: List[str] | None = [fgp.finished_game_id for fgp in fgps]
-            fgs: List[FinishedGame] | None = (
-                session.query(FinishedGame)
-                .filter(FinishedGame.id.in_(finished_game_ids))
-                .all()
-            )
-            if not fgs:
-                await interaction.response.send_message(
-                    embed=Embed(
-                        description="You have not played any games",
-                        colour=Colour.blue(),
-                    ),
-                    ephemeral=True,
-                )
-                session.close()
-                return
-
-            fgps_by_finished_game_id: dict[str, FinishedGamePlayer] = {
-                fgp.finished_game_id: fgp for fgp in fgps
-            }
-
-            players: list[Player] = session.query(Player).all()
-
-            default_rating = Rating()
-            # Filter players that haven't played a game
-            players = list(
-                filter(
-                    lambda x: (
-                        x.rated_trueskill_mu != default_rating.mu
-                        and x.rated_trueskill_sigma != default_rating.sigma
-                    )
-                    and (
-                        x.rated_trueskill_mu != config.default_trueskill_mu
-                        and x.rated_trueskill_sigma != config.default_trueskill_sigma
-                    ),
-                    players,
-                )
-            )
-            trueskills = list(
-                sorted(
-                    [
-                        round(p.rated_trueskill_mu - 3 * p.rated_trueskill_sigma, 2)
-                        for p in players
-                    ]
-                )
-            )
-            trueskill_index = bisect(
-                trueskills,
-                round(player.rated_trueskill_mu - 3 * player.rated_trueskill_sigma, 2),
-            )
-            trueskill_ratio = (len(trueskills) - trueskill_index) / (
-                len(trueskills) or 1
-            )
-            if trueskill_ratio <= 0.05:
-                trueskill_pct = "Top 5%"
-            elif trueskill_ratio <= 0.10:
-                trueskill_pct = "Top 10%"
-            elif trueskill_ratio <= 0.25:
-                trueskill_pct = "Top 25%"
-            elif trueskill_ratio <= 0.50:
-                trueskill_pct = "Top 50%"
-            elif trueskill_ratio <= 0.75:
-                trueskill_pct = "Top 75%"
-            else:
-                trueskill_pct = "Top 100%"
-
-            # all of this below can probably be done more gracefull with a pandas dataframe
-            def wins_losses_ties_last_ndays(
-                finished_games: List[FinishedGame], n: int = -1
-            ) -> tuple[list[FinishedGame], list[FinishedGame], list[FinishedGame]]:
-                if n == -1:
-                    # all finished games
-                    last_nfgs = finished_games
-                else:
-                    # last n
-                    last_nfgs = [
-                        fg
-                        for fg in finished_games
-                        if fg.finished_at.replace(tzinfo=timezone.utc)
-                        > datetime.now(timezone.utc) - timedelta(days=n)
-                    ]
-                wins = [
-                    fg
-                    for fg in last_nfgs
-                    if fg.winning_team == fgps_by_finished_game_id[fg.id].team
-                ]
-                losses = [
-                    fg
-                    for fg in last_nfgs
-                    if fg.winning_team != fgps_by_finished_game_id[fg.id].team
-                    and fg.winning_team != -1
-                ]
-                ties = [fg for fg in last_nfgs if fg.winning_team == -1]
-                return wins, losses, ties
+            percentile_index.ensure_loaded(session)
+            trueskill_pct = top_percent_label(percentile_index.player_ratio(player))
 
             def win_rate(wins, losses, ties):
                 denominator = max(wins + losses + ties, 1)
                 return round(100 * (wins + 0.5 * ties) / denominator, 1)
 
-            def get_table_col(games: List[FinishedGame]):
+            def get_table_col(totals: dict[int, WinsLossesTies]):
                 cols = []
-                for num_days in [7, 30, 90, 365, -1]:
-                    wins, losses, ties = wins_losses_ties_last_ndays(games, num_days)
-                    num_wins, num_losses, num_ties = len(wins), len(losses), len(ties)
-                    winrate = round(win_rate(num_wins, num_losses, num_ties))
+                for num_days, wlt in totals.items():
+                    winrate = round(win_rate(wlt.wins, wlt.losses, wlt.ties))
                     col = [
                         "Total" if num_days == -1 else f"{num_days}D",
-                        len(wins),
-                        len(losses),
-                        len(ties),
-                        num_wins + num_losses + num_ties,
+                        wlt.wins,
+                        wlt.losses,
+                        wlt.ties,
+                        wlt.total,
                         f"{winrate}%",
                     ]
                     cols.append(col)
@@ -422,25 +321,15 @@ class CommonCommands(BaseCog):
                         )
                     for pct, map, position in player_category_trueskills:
                         title = f"TrueSkill for {category.name}"
-                        category_filters = [
-                            FinishedGamePlayer.player_id == player.id,
-                            FinishedGame.category_name == category.name,
-                        ]
                         if map:
                             title = f"{title} ({map.full_name})"
-                            category_filters.append(
-                                FinishedGame.map_full_name == map.full_name
-                            )
                         if position:
                             title = f"{title} ({position.short_name})"
-                            category_filters.append(
-                                FinishedGamePlayer.position_name == position.short_name
-                            )
-                        category_games = (
-                            session.query(FinishedGame)
-                            .join(FinishedGamePlayer)
-                            .filter(*category_filters)
-                            .all()
+                        category_totals = sum_windows(
+                            buckets,
+                            category_name=category.name,
+                            map_full_name=map.full_name if map else None,
+                            position_name=position.short_name if position else None,
                         )
                         if category.is_rated and SHOW_TRUESKILL:
                             description = (
@@ -449,12 +338,13 @@ class CommonCommands(BaseCog):
                                 f"`{SIGMA_LOWER_UNICODE}: {round(pct.sigma, 1)}` "
                             )
                         else:
-                            description = f"Rating: {trueskill_pct}"
+                            ratio = percentile_index.pct_ratio(pct)
+                            description = f"Rating: {top_percent_label(ratio)}"
 
                         message_content += f"\n{title}\n{description}"  # TODO: temp fix
                         count += 1
 
-                        cols = get_table_col(category_games)
+                        cols = get_table_col(category_totals)
                         table = table2ascii(
                             header=["Last", "W", "L", "T", "Total", "WR"],
                             body=cols,
@@ -501,7 +391,7 @@ class CommonCommands(BaseCog):
                     )
                 else:
                     description = f"Rating: {trueskill_pct}"
-                cols = get_table_col(fgs)
+                cols = get_table_col(sum_windows(buckets))
                 table = table2ascii(
                     header=["Period", "Wins", "Losses", "Ties", "Total", "Win %"],
                     body=cols,
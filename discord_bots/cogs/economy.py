@@ -23,6 +23,11 @@ from discord.member import Member
 from discord.ui import Button, Modal, TextInput, View
 from discord.utils import get
 
+from discord_bots.async_db_utils import (
+    async_query_all,
+    async_session,
+    async_update_where,
+)
 from discord_bots.bot import bot
 from discord_bots.checks import (
     economy_enabled,
@@ -50,7 +55,7 @@ from discord_bots.models import (
     Queue,
     Session,
 )
-from discord_bots.utils import short_uuid
+from discord_bots.utils import game_id_filter, short_uuid
 
 _log = logging.getLogger(__name__)
 
@@ -252,23 +257,24 @@ class EconomyCommands(BaseCog):
                     session.commit()
 
     async def close_predictions(self, in_progress_games: list[InProgressGame]):
-        session: SQLAlchemySession
-        with Session() as session:
-            for game in in_progress_games:
-                if not game.prediction_message_id:
-                    continue
-                time_compare: datetime = game.created_at + timedelta(
-                    seconds=PREDICTION_TIMEOUT
-                )
-                time_compare = utc.localize(time_compare)
-                if datetime.now(timezone.utc) > time_compare:
-                    game: InProgressGame | None = (
-                        session.query(InProgressGame)
-                        .filter(InProgressGame.id == game.id)
-                        .first()
-                    )
-                    game.prediction_open = False
-                    session.commit()
+        now = datetime.now(timezone.utc)
+        game_ids: list[str] = [
+            game.id
+            for game in in_progress_games
+            if game.prediction_message_id
+            and now
+            > utc.localize(game.created_at + timedelta(seconds=PREDICTION_TIMEOUT))
+        ]
+        if not game_ids:
+            return
+        async with async_session() as session:
+            await async_update_where(
+                session,
+                InProgressGame,
+                InProgressGame.id.in_(game_ids),
+                prediction_open=False,
+            )
+            await session.commit()
 
     async def create_prediction_message(
         self, in_progress_game: InProgressGame, match_channel: TextChannel
@@ -811,72 +817,89 @@ class EconomyCommands(BaseCog):
                 )
 
     async def update_embeds(self, in_progress_games: list[InProgressGame]):
-        session: SQLAlchemySession
-        with Session() as session:
-            for game in in_progress_games:
-                if not game.prediction_message_id:
-                    continue
-                igp_channels: list[InProgressGameChannel] = (
-                    session.query(InProgressGameChannel)
-                    .filter(InProgressGameChannel.in_progress_game_id == game.id)
-                    .all()
+        games: list[InProgressGame] = [
+            game for game in in_progress_games if game.prediction_message_id
+        ]
+        if not games:
+            return
+        game_ids: list[str] = [game.id for game in games]
+        async with async_session() as session:
+            igp_channels: list[InProgressGameChannel] = await async_query_all(
+                session,
+                InProgressGameChannel,
+                InProgressGameChannel.in_progress_game_id.in_(game_ids),
+            )
+            all_predictions: list[EconomyPrediction] = await async_query_all(
+                session,
+                EconomyPrediction,
+                EconomyPrediction.in_progress_game_id.in_(game_ids),
+            )
+        igp_channels_by_game_id: dict[str, list[InProgressGameChannel]] = {}
+        for igp_channel in igp_channels:
+            igp_channels_by_game_id.setdefault(
+                igp_channel.in_progress_game_id, []
+            ).append(igp_channel)
+        predictions_by_game_id: dict[str, list[EconomyPrediction]] = {}
+        for prediction in all_predictions:
+            predictions_by_game_id.setdefault(
+                prediction.in_progress_game_id, []
+            ).append(prediction)
+
+        for game in games:
+            for igp_channel in igp_channels_by_game_id.get(game.id, []):
+                channel: TextChannel | VoiceChannel = bot.get_channel(
+                    igp_channel.channel_id
                 )
-                for igp_channel in igp_channels:
-                    channel: TextChannel | VoiceChannel = bot.get_channel(
-                        igp_channel.channel_id
+                if type(channel) == TextChannel:
+                    message: Message = channel.get_partial_message(
+                        game.prediction_message_id
                     )
-                    if type(channel) == TextChannel:
-                        message: Message = channel.get_partial_message(
+                    if message:
+                        message = await message.fetch()
+                    else:
+                        message = await channel.fetch_message(
                             game.prediction_message_id
                         )
-                        if message:
-                            message = await message.fetch()
-                        else:
-                            message = await channel.fetch_message(
-                                game.prediction_message_id
-                            )
 
-                        predictions: list[EconomyPrediction] = (
-                            session.query(EconomyPrediction)
-                            .filter(EconomyPrediction.in_progress_game_id == game.id)
-                            .all()
-                        )
+                    predictions: list[EconomyPrediction] = predictions_by_game_id.get(
+                        game.id, []
+                    )
 
-                        team0_total: int = 0
-                        team0_predictors: list[str] = []
-                        team1_total: int = 0
-                        team1_predictors: list[str] = []
-                        for prediction in predictions:
-                            if prediction.team == 0:
-                                team0_total += prediction.prediction_value
-                                if not prediction.player_id in team0_predictors:
-                                    team0_predictors.append(prediction.player_id)
-                            else:
-                                team1_total += prediction.prediction_value
-                                if not prediction.player_id in team1_predictors:
-                                    team1_predictors.append(prediction.player_id)
-
-                        team0_ratio = "1.0"
-                        team1_ratio = "1.0"
-                        if not team0_total + team1_total == 0:
-                            if not team0_total == 0:
-                                team0_ratio = f"{round(1/(team0_total / (team0_total + team1_total)), 1)}"
-                            if not team1_total == 0:
-                                team1_ratio = f"{round(1/(team1_total / (team1_total + team0_total)), 1)}"
-
-                        embed: Embed = message.embeds[0]
-                        embed.set_field_at(
-                            index=0,
-                            name=embed.fields[0].name,
-                            value=f"> Total: {team0_total}\n> Win Ratio: 1:{team0_ratio}\n> Predictors: {len(team0_predictors)}",
-                        )
-                        embed.set_field_at(
-                            index=1,
-                            name=embed.fields[1].name,
-                            value=f"> Total: {team1_total}\n> Win Ratio: 1:{team1_ratio}\n> Predictors: {len(team1_predictors)}",
-                        )
+                    team0_total: int = 0
+                    team0_predictors: list[str] = []
+                    team1_total: int = 0
+                    team1_predictors: list[str] = []
+                    for prediction in predictions:
+                        if prediction.team == 0:
+                            team0_total += prediction.prediction_value
+                            if not prediction.player_id in team0_predictors:
+                                team0_predictors.append(prediction.player_id)
+                        else:
+                            team1_total += prediction.prediction_value
+                            if not prediction.player_id in team1_predictors:
+                                team1_predictors.append(prediction.player_id)
+
+                    team0_ratio = "1.0"
+                    team1_ratio = "1.0"
+                    if not team0_total + team1_total == 0:
+                        if not team0_total == 0:
+                            team0_ratio = f"{round(1/(team0_total / (team0_total + team1_total)), 1)}"
+                        if not team1_total == 0:
+                            team1_ratio = f"{round(1/(team1_total / (team1_total + team0_total)), 1)}"
+
+                    embed: Embed = message.embeds[0]
+                    embed.set_field_at(
+                        index=0,
+                        name=embed.fields[0].name,
+                        value=f"> Total: {team0_total}\n> Win Ratio: 1:{team0_ratio}\n> Predictors: {len(team0_predictors)}",
+                    )
+                    embed.set_field_at(
+                        index=1,
+                        name=embed.fields[1].name,
+                        value=f"> Total: {team1_total}\n> Win Ratio: 1:{team1_ratio}\n> Predictors: {len(team1_predictors)}",
+                    )
 
-                        await message.edit(embed=embed)
+                    await message.edit(embed=embed)
 
 
 class EconomyPredictionView(View):
@@ -924,7 +947,7 @@ class EconomyPredictionView(View):
         with Session() as session:
             game: InProgressGame | None = (
                 session.query(InProgressGame)
-                .filter(InProgressGame.id.startswith(self.game_id))
+                .filter(game_id_filter(InProgressGame, self.game_id))
                 .first()
             )
             self.game = game
@@ -20,12 +20,22 @@ from discord import (
 from discord.abc import GuildChannel
 from discord.ext import commands
 from discord.ui import Button, button
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session as SQLAlchemySession
 from trueskill import Rating, rate
 
 from discord_bots import config
+from discord_bots.async_db_utils import (
+    async_delete_where,
+    async_query_all,
+    async_query_first,
+    async_session,
+)
 from discord_bots.checks import is_admin_app_command, is_command_channel
 from discord_bots.cogs.economy import EconomyCommands
+from discord_bots.game_history import GameHistoryFilters
+from discord_bots.leaderboard import leaderboard
 from discord_bots.models import (
     Category,
     Config,
@@ -44,27 +54,37 @@ from discord_bots.models import (
     RotationMap,
     Session,
 )
+from discord_bots.percentiles import percentile_index
+from discord_bots.player_stats import record_finished_game
+from discord_bots.table_cache import table_cache
 from discord_bots.utils import (
+    async_get_category_trueskills,
+    category_name_autocomplete_without_user_id,
     create_cancelled_game_embed,
     create_finished_game_embed,
+    finished_game_autocomplete,
     finished_game_str,
-    get_category_trueskill,
+    game_id_filter,
     get_n_best_finished_game_teams,
     get_n_best_teams,
     get_n_worst_finished_game_teams,
     get_n_worst_teams,
     in_progress_game_autocomplete,
     in_progress_game_str,
+    map_full_name_autocomplete,
     mock_finished_game_teams_str,
     mock_teams_str,
     move_game_players,
     move_game_players_lobby,
+    print_leaderboard,
+    queue_autocomplete,
     short_uuid,
     upload_stats_screenshot_imgkit_channel,
     upload_stats_screenshot_imgkit_interaction,
 )
 from discord_bots.views.base import BaseView
 from discord_bots.views.confirmation import ConfirmationView
+from discord_bots.views.game_history import GameHistoryView
 
 if TYPE_CHECKING:
     from discord.ext.commands import Bot
@@ -99,27 +119,25 @@ class InProgressGameCommands(commands.Cog):
         for view in self.views:
             view.stop()
 
-    def get_player_and_in_progress_game(
+    async def get_player_and_in_progress_game(
         self,
-        session: SQLAlchemySession,
+        session: AsyncSession,
         player_id: int,
         game_id: Optional[str] = None,
     ) -> tuple[InProgressGamePlayer, InProgressGame] | None:
-        game_player: InProgressGamePlayer | None = (
-            session.query(InProgressGamePlayer)
-            .filter(InProgressGamePlayer.player_id == player_id)
-            .first()
+        game_player: InProgressGamePlayer | None = await async_query_first(
+            session, InProgressGamePlayer, InProgressGamePlayer.player_id == player_id
         )
         if not game_player:
             return None
         in_progress_game: InProgressGame | None
         if game_id:
-            in_progress_game = (
-                session.query(InProgressGame)
-                .filter(InProgressGame.id == game_player.in_progress_game_id)
-                .filter(InProgressGame.id == game_id)
-                .filter(InProgressGame.is_finished == False)
-                .first()
+            in_progress_game = await async_query_first(
+                session,
+                InProgressGame,
+                InProgressGame.id == game_player.in_progress_game_id,
+                InProgressGame.id == game_id,
+                InProgressGame.is_finished == False,
             )
             if not in_progress_game:
                 _log.warning(
@@ -127,11 +145,11 @@ class InProgressGameCommands(commands.Cog):
                 )
                 return None
         else:
-            in_progress_game = (
-                session.query(InProgressGame)
-                .filter(InProgressGame.id == game_player.in_progress_game_id)
-                .filter(InProgressGame.is_finished == False)
-                .first()
+            in_progress_game = await async_query_first(
+                session,
+                InProgressGame,
+                InProgressGame.id == game_player.in_progress_game_id,
+                InProgressGame.is_finished == False,
             )
             if not in_progress_game:
                 _log.warning(
@@ -157,7 +175,7 @@ class InProgressGameCommands(commands.Cog):
             with Session() as session:
                 game = (
                     session.query(InProgressGame)
-                    .filter(InProgressGame.id.startswith(game_id))
+                    .filter(game_id_filter(InProgressGame, game_id))
                     .first()
                 )
                 if not game:
@@ -277,7 +295,30 @@ class InProgressGameCommands(commands.Cog):
     )
     @app_commands.check(is_command_channel)
     @app_commands.guild_only()
-    async def gamehistory(self, interaction: Interaction, count: int):
+    @app_commands.describe(
+        count="Games per page",
+        member="Show games for another player",
+        queue_name="Only show games from this queue",
+        category_name="Only show games from this category",
+        map_full_name="Only show games on this map",
+    )
+    @app_commands.rename(
+        queue_name="queue", category_name="category", map_full_name="map"
+    )
+    @app_commands.autocomplete(
+        queue_name=queue_autocomplete,
+        category_name=category_name_autocomplete_without_user_id,
+        map_full_name=map_full_name_autocomplete,
+    )
+    async def gamehistory(
+        self,
+        interaction: Interaction,
+        count: int,
+        member: Optional[Member] = None,
+        queue_name: Optional[str] = None,
+        category_name: Optional[str] = None,
+        map_full_name: Optional[str] = None,
+    ):
         assert interaction.guild
         if count > 10:
             await interaction.response.send_message(
@@ -299,46 +340,35 @@ class InProgressGameCommands(commands.Cog):
             return
 
         await interaction.response.defer(ephemeral=True, thinking=True)
-        session: SQLAlchemySession
-        with Session() as session:
-            finished_games: list[FinishedGame]
-            finished_games = (
-                session.query(FinishedGame)
-                .join(
-                    FinishedGamePlayer,
-                    FinishedGamePlayer.finished_game_id == FinishedGame.id,
-                )
-                .filter(FinishedGamePlayer.player_id == interaction.user.id)
-                .order_by(FinishedGame.finished_at.desc())
-                .limit(count)
-                .all()
-            )
-            if not finished_games:
-                await interaction.followup.send(
-                    embed=Embed(
-                        description=f"{interaction.user.mention} has not played any games",
-                    ),
-                    ephemeral=True,
-                    allowed_mentions=AllowedMentions.none(),
-                )
-                return
-
-            embeds = []
-            finished_games.reverse()  # show most recent games last
-            for finished_game in finished_games:
-                # TODO: bold the callers name to make their name easier to see in the embed
-                embed: Embed = create_finished_game_embed(
-                    session, finished_game.id, interaction.guild.id
-                )
-                embed.timestamp = finished_game.finished_at
-                embeds.append(embed)
-
+        user = member or interaction.user
+        filters = GameHistoryFilters(
+            player_id=user.id,
+            queue_name=queue_name,
+            category_name=category_name,
+            map_full_name=map_full_name,
+        )
+        view = GameHistoryView(
+            interaction.user.id, f"Games for {user.mention}", filters, count
+        )
+        embeds, has_more = view.render_page(0)
+        if not embeds:
             await interaction.followup.send(
-                content=f"Last {count} games for {interaction.user.mention}",
-                embeds=embeds,
+                embed=Embed(
+                    description=f"{user.mention} has not played any games",
+                ),
                 ephemeral=True,
                 allowed_mentions=AllowedMentions.none(),
             )
+            return
+
+        view.update_buttons(has_more)
+        await interaction.followup.send(
+            content=view.content(),
+            embeds=embeds,
+            view=view,
+            ephemeral=True,
+            allowed_mentions=AllowedMentions.none(),
+        )
 
     @group.command(name="finish", description="Ends the current game you are in")
     @app_commands.check(is_command_channel)
@@ -368,9 +398,8 @@ class InProgressGameCommands(commands.Cog):
                 ephemeral=True,
             )
         async with _lock:
-            session: SQLAlchemySession
-            with Session() as session:
-                result = self.get_player_and_in_progress_game(
+            async with async_session() as session:
+                result = await self.get_player_and_in_progress_game(
                     session, interaction.user.id, game_id
                 )
                 if result is None:
@@ -401,12 +430,12 @@ class InProgressGameCommands(commands.Cog):
                 is_game_finished = await self.finish_in_progress_game(
                     session, interaction, outcome, game_player, game
                 )
-                session.commit()
+                await session.commit()
                 return is_game_finished
 
     async def finish_in_progress_game(
         self,
-        session: SQLAlchemySession,
+        session: AsyncSession,
         interaction: Interaction,
         outcome: Literal["win", "loss", "tie"],
         game_player: InProgressGamePlayer,
@@ -414,8 +443,8 @@ class InProgressGameCommands(commands.Cog):
     ) -> bool:
         assert interaction is not None
         assert interaction.guild is not None
-        queue: Queue | None = (
-            session.query(Queue).filter(Queue.id == in_progress_game.queue_id).first()
+        queue: Queue | None = await async_query_first(
+            session, Queue, Queue.id == in_progress_game.queue_id
         )
         if not queue:
             # should never happen
@@ -440,40 +469,39 @@ class InProgressGameCommands(commands.Cog):
             # tie
             winning_team = -1
 
-        players = (
-            session.query(Player)
-            .join(InProgressGamePlayer)
-            .filter(
-                InProgressGamePlayer.player_id == Player.id,
-                InProgressGamePlayer.in_progress_game_id == in_progress_game.id,
+        players: list[Player] = list(
+            await session.scalars(
+                select(Player)
+                .join(InProgressGamePlayer)
+                .where(
+                    InProgressGamePlayer.player_id == Player.id,
+                    InProgressGamePlayer.in_progress_game_id == in_progress_game.id,
+                )
             )
-        ).all()
+        )
         players_by_id: dict[int, Player] = {player.id: player for player in players}
 
-        in_progress_game_players = (
-            session.query(InProgressGamePlayer)
-            .filter(InProgressGamePlayer.in_progress_game_id == in_progress_game.id)
-            .all()
+        in_progress_game_players: list[InProgressGamePlayer] = await async_query_all(
+            session,
+            InProgressGamePlayer,
+            InProgressGamePlayer.in_progress_game_id == in_progress_game.id,
         )
 
-        db_config: Config = session.query(Config).first()
+        db_config: Config = table_cache.config()
 
-        player_category_trueskills: list[PlayerCategoryTrueskill] = []
-        for ipgp in in_progress_game_players:
-            pct = get_category_trueskill(
+        player_category_trueskills_by_id: dict[int, PlayerCategoryTrueskill] = (
+            await async_get_category_trueskills(
                 session,
                 db_config,
-                ipgp.player_id,
+                {ipgp.player_id: ipgp.position_id for ipgp in in_progress_game_players},
                 queue.map_trueskill_enabled,
                 queue.category_id,
                 in_progress_game.map_id,
-                ipgp.position_id,
             )
-            player_category_trueskills.append(pct)
-
-        player_category_trueskills_by_id = {
-            pct.player_id: pct for pct in player_category_trueskills
-        }
+        )
+        player_category_trueskills: list[PlayerCategoryTrueskill] = list(
+            player_category_trueskills_by_id.values()
+        )
 
         team0_rated_ratings_before = []
         team1_rated_ratings_before = []
@@ -501,8 +529,8 @@ class InProgressGameCommands(commands.Cog):
                     )
 
         if queue.category_id:
-            category: Category | None = (
-                session.query(Category).filter(Category.id == queue.category_id).first()
+            category: Category | None = await async_query_first(
+                session, Category, Category.id == queue.category_id
             )
             if category:
                 category_name = category.name
@@ -562,6 +590,8 @@ class InProgressGameCommands(commands.Cog):
                 team1_rated_ratings_before,
             )
 
+        finished_game_players: list[FinishedGamePlayer] = []
+
         def update_ratings(
             team_players: list[InProgressGamePlayer],
             ratings_before: list[Rating],
@@ -571,12 +601,9 @@ class InProgressGameCommands(commands.Cog):
             for i, team_gip in enumerate(team_players):
                 player = players_by_id[team_gip.player_id]
                 if team_gip.position_id:
-                    position_name = (
-                        session.query(Position)
-                        .filter(Position.id == team_gip.position_id)
-                        .first()
-                        .short_name
-                    )
+                    position_name = table_cache.get(
+                        Position, team_gip.position_id
+                    ).short_name
                 else:
                     position_name = None
                 finished_game_player = FinishedGamePlayer(
@@ -598,7 +625,7 @@ class InProgressGameCommands(commands.Cog):
                 player.rated_trueskill_sigma = trueskill_rating.sigma
 
                 # We assume that every player has a player_category_trueskill
-                # because get_category_trueskill is supposed to create it
+                # because get_category_trueskills is supposed to create it
                 pct = player_category_trueskills_by_id[player.id]
                 pct.mu = trueskill_rating.mu
                 pct.sigma = trueskill_rating.sigma
@@ -606,6 +633,7 @@ class InProgressGameCommands(commands.Cog):
                 pct.last_game_finished_at = game_finished_at
                 session.add(pct)
                 session.add(finished_game_player)
+                finished_game_players.append(finished_game_player)
 
         update_ratings(
             team0_players,
@@ -619,7 +647,10 @@ class InProgressGameCommands(commands.Cog):
             team1_rated_ratings_after,
             game_finished_at,
         )
-        session.commit()  # temporary solution until the foreign key constraint is resolved on EconomyPredictions/EconomyTransactions
+        await session.run_sync(
+            record_finished_game, finished_game, finished_game_players
+        )
+        await session.commit()  # temporary solution until the foreign key constraint is resolved on EconomyPredictions/EconomyTransactions
         if config.ECONOMY_ENABLED:
             economy_cog = self.bot.get_cog("EconomyCommands")
             if economy_cog is not None and isinstance(economy_cog, EconomyCommands):
@@ -629,9 +660,11 @@ class InProgressGameCommands(commands.Cog):
             else:
                 _log.warning("Could not get EconomyCommands cog")
 
-        session.query(InProgressGamePlayer).filter(
-            InProgressGamePlayer.in_progress_game_id == in_progress_game.id
-        ).delete()
+        await async_delete_where(
+            session,
+            InProgressGamePlayer,
+            InProgressGamePlayer.in_progress_game_id == in_progress_game.id,
+        )
         in_progress_game.is_finished = True
         session.add(
             QueueWaitlist(
@@ -646,14 +679,15 @@ class InProgressGameCommands(commands.Cog):
         )
 
         # Reward raffle tickets
-        reward = (
-            session.query(RotationMap.raffle_ticket_reward)
+        reward = await session.scalar(
+            select(RotationMap.raffle_ticket_reward)
             .join(Map, Map.id == RotationMap.map_id)
             .join(Rotation, Rotation.id == RotationMap.rotation_id)
             .join(Queue, Queue.rotation_id == Rotation.id)
-            .filter(Map.short_name == in_progress_game.map_short_name)
-            .filter(Queue.id == in_progress_game.queue_id)
-            .scalar()
+            .where(
+                Map.short_name == in_progress_game.map_short_name,
+                Queue.id == in_progress_game.queue_id,
+            )
         )
         if not reward:
             reward = config.DEFAULT_RAFFLE_VALUE
@@ -661,10 +695,18 @@ class InProgressGameCommands(commands.Cog):
         for player in players:
             player.raffle_tickets = (player.raffle_tickets or 0) + reward
             session.add(player)
-        session.commit()
+        await session.commit()
+        leaderboard.record_game(
+            category_name,
+            in_progress_game.created_at,
+            players,
+            player_category_trueskills,
+        )
+        percentile_index.update_players(players)
+        percentile_index.update_pcts(player_category_trueskills)
 
-        finished_game_embed = create_finished_game_embed(
-            session,
+        finished_game_embed = await session.run_sync(
+            create_finished_game_embed,
             finished_game.id,
             interaction.guild.id,
             (interaction.user.name, interaction.user.display_name),
@@ -688,6 +730,9 @@ class InProgressGameCommands(commands.Cog):
             main_channel = interaction.guild.get_channel(config.CHANNEL_ID)
             if isinstance(main_channel, TextChannel):
                 await main_channel.send(embed=finished_game_embed)
+        # The leaderboard is already up to date in memory, so publish it now
+        # instead of waiting for the next leaderboard_task run
+        asyncio.create_task(print_leaderboard())
         return True
 
     @group.command(
@@ -716,7 +761,7 @@ class InProgressGameCommands(commands.Cog):
             return
         else:
             try:
-                await move_game_players(game_id, interaction)
+                report = await move_game_players(game_id, interaction)
             except Exception:
                 await interaction.response.send_message(
                     embed=Embed(
@@ -725,9 +770,12 @@ class InProgressGameCommands(commands.Cog):
                     ),
                 )
             else:
+                description = f"Players moved to voice channels for game {game_id}"
+                if report:
+                    description += f" ({report.moved}/{report.attempted} moved)"
                 await interaction.response.send_message(
                     embed=Embed(
-                        description=f"Players moved to voice channels for game {game_id}",
+                        description=description,
                         colour=Colour.blue(),
                     ),
                 )
@@ -735,12 +783,13 @@ class InProgressGameCommands(commands.Cog):
     @group.command(name="show", description="Show game details")
     @app_commands.check(is_command_channel)
     @app_commands.describe(game_id="Finished game id")
+    @app_commands.autocomplete(game_id=finished_game_autocomplete)
     async def showgame(self, interaction: Interaction, game_id: str):
         session: SQLAlchemySession
         with Session() as session:
             finished_game = (
                 session.query(FinishedGame)
-                .filter(FinishedGame.game_id.startswith(game_id))
+                .filter(game_id_filter(FinishedGame, game_id))
                 .first()
             )
             if not finished_game:
@@ -765,6 +814,7 @@ class InProgressGameCommands(commands.Cog):
     @app_commands.check(is_admin_app_command)
     @app_commands.check(is_command_channel)
     @app_commands.describe(game_id="Finished game id")
+    @app_commands.autocomplete(game_id=finished_game_autocomplete)
     async def showgamedebug(self, interaction: Interaction, game_id: str):
         player_id = interaction.user.id
 
@@ -772,7 +822,7 @@ class InProgressGameCommands(commands.Cog):
         with Session() as session:
             finished_game = (
                 session.query(FinishedGame)
-                .filter(FinishedGame.game_id.startswith(game_id))
+                .filter(game_id_filter(FinishedGame, game_id))
                 .first()
             )
             if finished_game:
@@ -830,7 +880,7 @@ class InProgressGameCommands(commands.Cog):
             else:
                 in_progress_game: InProgressGame | None = (
                     session.query(InProgressGame)
-                    .filter(InProgressGame.id.startswith(game_id))
+                    .filter(game_id_filter(InProgressGame, game_id))
                     .first()
                 )
                 if not in_progress_game:
@@ -9,10 +9,10 @@ from table2ascii import Alignment, PresetStyle, table2ascii
 
 from discord_bots.checks import is_admin_app_command, is_command_channel
 from discord_bots.cogs.base import BaseCog
+from discord_bots.db_executor import db
+from discord_bots.map_stats import global_map_stats, player_map_stats
 from discord_bots.models import (
     Category,
-    FinishedGame,
-    FinishedGamePlayer,
     Map,
     PlayerCategoryTrueskill,
     Queue,
@@ -27,13 +27,39 @@ from discord_bots.utils import (
     map_full_name_autocomplete,
     map_short_name_autocomplete,
     queue_autocomplete,
-    win_rate,
 )
 from discord_bots.views.configure_map import MapConfigureView
 
 _log = logging.getLogger(__name__)
 
 
+def _rotation_map_full_names(
+    session: SQLAlchemySession, category_name: str | None
+) -> list[str] | None:
+    """
+    Names of the maps in the rotations of every queue (in the category, if
+    given). None if there are no such queues.
+    """
+    query = session.query(Queue.rotation_id)
+    if category_name:
+        # rotations are per queue and not per category
+        category: Category = (
+            session.query(Category).filter(Category.name == category_name).one()
+        )
+        query = query.filter(Queue.category_id == category.id)
+    rotation_ids = [rotation_id for (rotation_id,) in query.all()]
+    if not rotation_ids:
+        return None
+    return [
+        full_name
+        for (full_name,) in session.query(Map.full_name)
+        .join(RotationMap, RotationMap.map_id == Map.id)
+        .filter(RotationMap.rotation_id.in_(rotation_ids))
+        .order_by(Map.full_name)
+        .all()
+    ]
+
+
 class MapCommands(BaseCog):
     def __init__(self, bot: Bot):
         super().__init__(bot)
@@ -240,114 +266,41 @@ class MapCommands(BaseCog):
         self, interaction: Interaction, category_name: Optional[str] = None
     ):
         # TODO: merge with /stats by making this a subcommand
-        session: SQLAlchemySession
-        with Session() as session:
-            if category_name:
-                category: Category | None = (
-                    session.query(Category).filter(Category.name == category_name).one()
-                )
-                # get the queues for each category, since rotations are per queue and not per category
-                queues: list[Queue] | None = (
-                    session.query(Queue).filter(Queue.category_id == category.id).all()
-                )
-            else:
-                queues: list[Queue] | None = session.query(Queue).all()
-            if not queues:
-                await interaction.response.send_message(
-                    embed=Embed(
-                        description=f"Could not find any queues",
-                        colour=Colour.red(),
-                    ),
-                    ephemeral=True,
-                )
-                return
-            rotation_ids = [queue.rotation_id for queue in queues]
-            maps: list[Map] | None = (
-                session.query(Map)
-                .join(RotationMap, RotationMap.map_id == Map.id)
-                .filter(RotationMap.rotation_id.in_(rotation_ids))
-                .order_by(Map.full_name)
-                .all()
+        map_full_names = await db.read(_rotation_map_full_names, category_name)
+        if map_full_names is None:
+            await interaction.response.send_message(
+                embed=Embed(
+                    description=f"Could not find any queues",
+                    colour=Colour.red(),
+                ),
+                ephemeral=True,
             )
-            if not maps:
-                await interaction.response.send_message(
-                    embed=Embed(
-                        description=f"Could not find any maps for category '{category_name}'",
-                        colour=Colour.red(),
-                    ),
-                    ephemeral=True,
-                )
-                return
-            fgps: List[FinishedGamePlayer] | None = (
-                session.query(FinishedGamePlayer)
-                .filter(FinishedGamePlayer.player_id == interaction.user.id)
-                .all()
+            return
+        if not map_full_names:
+            await interaction.response.send_message(
+                embed=Embed(
+                    description=f"Could not find any maps for category '{category_name}'",
+                    colour=Colour.red(),
+                ),
+                ephemeral=True,
             )
-            if not fgps:
-                await interaction.response.send_message(
-                    embed=Embed(
-                        description=f"You have not played any games",
-                        colour=Colour.red(),
-                    ),
-                    ephemeral=True,
-                )
-                return
-            finished_game_ids: List[str] | None = [fgp.finished_game_id for fgp in fgps]
-            conditions = [FinishedGame.id.in_(finished_game_ids)]
-            if category_name:
-                conditions.append(FinishedGame.category_name == category_name)
-            fgs: List[FinishedGame] | None = (
-                session.query(FinishedGame).filter(*conditions).all()
+            return
+        stats = await db.read(
+            player_map_stats,
+            interaction.user.id,
+            category_name=category_name,
+            map_full_names=map_full_names,
+        )
+        if not stats:
+            await interaction.response.send_message(
+                embed=Embed(
+                    description=f"Could not find any finished games for you",
+                    colour=Colour.red(),
+                ),
+                ephemeral=True,
             )
-            if not fgs:
-                await interaction.response.send_message(
-                    embed=Embed(
-                        description=f"Could not find any finished games for you",
-                        colour=Colour.red(),
-                    ),
-                    ephemeral=True,
-                )
-                return
-            fgps_by_finished_game_id: dict[str, FinishedGamePlayer] = {
-                fgp.finished_game_id: fgp for fgp in fgps
-            }
-            cols = []
-            for m in maps:
-
-                def map_stats(finished_games: list[FinishedGame]):
-                    wins = [
-                        fg
-                        for fg in finished_games
-                        if fg.winning_team == fgps_by_finished_game_id[fg.id].team
-                    ]
-                    losses = [
-                        fg
-                        for fg in finished_games
-                        if fg.winning_team != fgps_by_finished_game_id[fg.id].team
-                        and fg.winning_team != -1
-                    ]
-                    ties = [fg for fg in finished_games if fg.winning_team == -1]
-                    return len(wins), len(losses), len(ties)
-
-                fgs_for_map = [fg for fg in fgs if fg.map_full_name == m.full_name]
-                num_games = len(fgs_for_map)
-                if num_games <= 0:
-                    continue
-                wins, losses, ties = map_stats(fgs_for_map)
-                wr = win_rate(wins, losses, ties)
-                cols.append(
-                    [
-                        m.full_name,
-                        f"{wins}",
-                        f"{losses}",
-                        f"{ties}",
-                        num_games,
-                        f"{wr}%",
-                    ]
-                )
-        cols.sort(
-            key=lambda lst: lst[-1], reverse=True
-        )  # sort by WR in descending order
+            return
+        cols = [stat.table_row() for stat in stats]
         table = table2ascii(
             header=["Map", "W", "L", "T", "Total", "WR"],
             body=cols,
@@ -384,39 +337,8 @@ class MapCommands(BaseCog):
         self, interaction: Interaction, category_name: Optional[str] = None
     ):
         # Explicitly does not use a discord.Embed, due to the limit of the Embed length (Note: this won't look pretty on mobile)
-        session: SQLAlchemySession
-        with Session() as session:
-            maps: list[Map] | None = session.query(Map).order_by(Map.full_name).all()
-
-            def map_stats(finished_games: list[FinishedGame]):
-                team0_wins = [fg for fg in finished_games if fg.winning_team == 0]
-                team1_wins = [fg for fg in finished_games if fg.winning_team == 1]
-                ties = [fg for fg in finished_games if fg.winning_team == -1]
-                return len(team0_wins), len(team1_wins), len(ties)
-
-            cols = []
-            for m in maps:
-                conditions = [FinishedGame.map_full_name == m.full_name]
-                if category_name:
-                    conditions.append(FinishedGame.category_name == category_name)
-                finished_games = session.query(FinishedGame).filter(*conditions).all()
-                num_games = len(finished_games)
-                if num_games <= 0:
-                    continue
-                team0_wins, team1_wins, ties = map_stats(finished_games)
-                team0_win_rate = win_rate(team0_wins, team1_wins, ties)
-                team1_win_rate = win_rate(team1_wins, team0_wins, ties)
-                cols.append(
-                    [
-                        m.full_name,
-                        team0_wins,
-                        f"{team0_win_rate}%",
-                        team1_wins,
-                        f"{team1_win_rate}%",
-                        ties,
-                        len(finished_games),
-                    ]
-                )
+        stats = await db.read(global_map_stats, category_name=category_name)
+        cols = [stat.table_row() for stat in stats]
         table = table2ascii(
             header=["Map", "Team0", "WR", "Team1", "WR", "Ties", "Total"],
             body=cols,
@@ -14,6 +14,7 @@ from discord_bots.bot import bot
 from discord_bots.checks import is_admin_app_command, is_command_channel
 from discord_bots.cogs.base import BaseCog
 from discord_bots.config import ENABLE_VOICE_MOVE, LEADERBOARD_CHANNEL
+from discord_bots.leaderboard import leaderboard
 from discord_bots.models import (
     Commend,
     FinishedGame,
@@ -22,6 +23,7 @@ from discord_bots.models import (
     PlayerCategoryTrueskill,
     Session,
 )
+from discord_bots.percentiles import percentile_index
 
 _log = logging.getLogger(__name__)
 
@@ -235,6 +237,7 @@ class PlayerCommands(BaseCog):
             if player:
                 player.leaderboard_enabled = option
                 session.commit()
+                leaderboard.update_player(player.id, player.name, option)
             else:
                 await interaction.response.send_message(
                     embed=Embed(
@@ -375,6 +378,9 @@ class PlayerCommands(BaseCog):
                 player_category_trueskill.mu = mu
 
             session.commit()
+            leaderboard.invalidate()
+            percentile_index.update_players([player])
+            percentile_index.update_pcts(player_category_trueskills)
             embed = Embed(
                 description=f"Player <@{member.id}> mu set to **{mu}** by <@{interaction.user.id}>",
                 colour=Colour.blue(),
@@ -425,6 +431,9 @@ class PlayerCommands(BaseCog):
             for player_category_trueskill in player_category_trueskills:
                 player_category_trueskill.sigma = sigma
             session.commit()
+            leaderboard.invalidate()
+            percentile_index.update_players([player])
+            percentile_index.update_pcts(player_category_trueskills)
             embed = Embed(
                 description=f"Player <@{member.id}> sigma set to **{sigma}** by <@{interaction.user.id}>",
                 colour=Colour.blue(),
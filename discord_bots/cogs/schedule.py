@@ -2,9 +2,10 @@ import asyncio
 import logging
 import pytz
 import re
+from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
-from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.session import Session as SQLAlchemySession
 
 import discord
 
@@ -16,7 +17,6 @@ from discord import (
     Embed,
     Guild,
     Interaction,
-    Message,
     SelectOption,
     TextChannel,
     TextStyle,
@@ -39,6 +39,34 @@ from discord_bots.models import (
 _log = logging.getLogger(__name__)
 
 
+@dataclass
+class ScheduleSlot:
+    schedule_id: str
+    datetime: datetime
+    player_ids: list[int]
+
+
+@dataclass
+class ScheduleDay:
+    """
+    Everything needed to render one schedule embed, loaded up front so that
+    building the embeds doesn't need the database
+    """
+
+    nth_embed: int
+    message_id: int | None
+    slots: list[ScheduleSlot]
+
+    def render_key(self) -> tuple:
+        return (
+            self.message_id,
+            tuple(
+                (slot.schedule_id, slot.datetime, tuple(slot.player_ids))
+                for slot in self.slots
+            ),
+        )
+
+
 class ScheduleCommands(BaseCog):
     def __init__(self, bot: Bot):
         super().__init__(bot)
@@ -49,14 +77,12 @@ class ScheduleCommands(BaseCog):
         if not ScheduleUtils.is_active():
             return
 
-        for nth_embed in range(7):
-            self.views.append(ScheduleView(nth_embed))
-            first_schedule = ScheduleUtils.get_schedules_for_nth_embed(nth_embed)[0]
-            self.bot.add_view(
-                ScheduleView(nth_embed), message_id=first_schedule.message_id
-            )
-
-        ScopedSession.remove()
+        with ScopedSession() as session:
+            week = ScheduleUtils.load_week(session)
+        for day in week:
+            view = ScheduleView(day)
+            self.views.append(view)
+            self.bot.add_view(view, message_id=day.message_id)
 
     async def cog_unload(self) -> None:
         for view in self.views:
@@ -150,16 +176,15 @@ class ScheduleCommands(BaseCog):
 
 
 class ScheduleView(View):
-    def __init__(self, nth_embed: str):
+    def __init__(self, day: ScheduleDay):
         super().__init__(timeout=None)
         # represents the nth embed in the schedule channel, where n=0 is today, listed first.
-        self.nth_embed = nth_embed
+        self.nth_embed = day.nth_embed
+        self.day = day
         self.create_buttons()
 
     def create_buttons(self):
-        for i, schedule in enumerate(
-            ScheduleUtils.get_schedules_for_nth_embed(self.nth_embed), start=1
-        ):
+        for i, slot in enumerate(self.day.slots, start=1):
             if i == 1:
                 label = "First Time"
             elif i == 2:
@@ -173,8 +198,8 @@ class ScheduleView(View):
                 emoji="⏱️",
             )
             button_time.callback = (
-                lambda interaction, schedule=schedule: self.button_time_callback(
-                    interaction, schedule
+                lambda interaction, slot=slot: self.button_time_callback(
+                    interaction, slot
                 )
             )
             self.add_item(button_time)
@@ -188,9 +213,7 @@ class ScheduleView(View):
         button_day.callback = lambda interaction: self.button_day_callback(interaction)
         self.add_item(button_day)
 
-        ScopedSession.remove()
-
-    async def button_time_callback(self, interaction: Interaction, schedule: Schedule):
+    async def button_time_callback(self, interaction: Interaction, slot: ScheduleSlot):
         with ScopedSession() as session:
             player: Player = (
                 session.query(Player).filter(Player.id == interaction.user.id).first()
@@ -198,7 +221,7 @@ class ScheduleView(View):
             schedule_player: SchedulePlayer = (
                 session.query(SchedulePlayer)
                 .filter(
-                    SchedulePlayer.schedule_id == schedule.id,
+                    SchedulePlayer.schedule_id == slot.schedule_id,
                     SchedulePlayer.player_id == player.id,
                 )
                 .first()
@@ -208,11 +231,13 @@ class ScheduleView(View):
                 session.delete(schedule_player)
             else:
                 session.add(
-                    SchedulePlayer(schedule_id=schedule.id, player_id=player.id)
+                    SchedulePlayer(schedule_id=slot.schedule_id, player_id=player.id)
                 )
             session.commit()
 
-        await ScheduleUtils.rebuild_embed(interaction.guild, self.nth_embed)
+        await ScheduleUtils.rebuild_embed(
+            interaction.guild, self.nth_embed, self.day.message_id
+        )
         await interaction.response.defer()
 
     async def button_day_callback(self, interaction: Interaction):
@@ -220,20 +245,28 @@ class ScheduleView(View):
             player: Player = (
                 session.query(Player).filter(Player.id == interaction.user.id).first()
             )
-            schedule_players: list[SchedulePlayer] = (
-                session.query(SchedulePlayer)
-                .filter(SchedulePlayer.player_id == player.id)
+            # the view can be behind the database (e.g. after a double click),
+            # so check which slots the player already has instead
+            schedule_ids = [slot.schedule_id for slot in self.day.slots]
+            existing_ids: set[str] = {
+                schedule_id
+                for (schedule_id,) in session.query(SchedulePlayer.schedule_id)
+                .filter(
+                    SchedulePlayer.player_id == player.id,
+                    SchedulePlayer.schedule_id.in_(schedule_ids),
+                )
                 .all()
-            )
-            schedule_ids = [x.schedule_id for x in schedule_players]
-            for schedule in ScheduleUtils.get_schedules_for_nth_embed(self.nth_embed):
-                if schedule.id not in schedule_ids:
+            }
+            for schedule_id in schedule_ids:
+                if schedule_id not in existing_ids:
                     session.add(
-                        SchedulePlayer(schedule_id=schedule.id, player_id=player.id)
+                        SchedulePlayer(schedule_id=schedule_id, player_id=player.id)
                     )
             session.commit()
 
-        await ScheduleUtils.rebuild_embed(interaction.guild, self.nth_embed)
+        await ScheduleUtils.rebuild_embed(
+            interaction.guild, self.nth_embed, self.day.message_id
+        )
         await interaction.response.defer()
 
 
@@ -325,16 +358,12 @@ class ScheduleModal(discord.ui.Modal, title="Enter up to three schedule times.")
                     _log.error(f"integrity error {exc}")
                     session.rollback()
 
-            # run two separate loops because my method for grouping schedules together in embeds relies on them all being added to the database first
-            coroutines = []
-            for nth_embed in range(7):
-                coroutines.append(
-                    ScheduleUtils.rebuild_embed(interaction.guild, nth_embed)
-                )
-            try:
-                await asyncio.gather(*coroutines)
-            except Exception as exc:
-                _log.exception(f"exception {exc}")
+        # build the embeds after all the schedules are added, since grouping
+        # schedules into days relies on them all being in the database
+        try:
+            await ScheduleUtils.rebuild_embeds(interaction.guild)
+        except Exception as exc:
+            _log.exception(f"exception {exc}")
 
         await interaction.followup.send(
             embed=Embed(description="Schedule created", colour=Colour.green()),
@@ -346,50 +375,152 @@ class ScheduleModal(discord.ui.Modal, title="Enter up to three schedule times.")
 
 
 class ScheduleUtils:
+    # nth_embed -> render_key of what was last posted, used to skip edits
+    # for days that haven't changed
+    _rendered: dict[int, tuple] = {}
+
+    @classmethod
+    def load_week(cls, session: SQLAlchemySession) -> list[ScheduleDay]:
+        """
+        Load every schedule along with its players in a single query and group
+        them into days, n=0 being today
+        """
+        slots: list[tuple[Schedule, ScheduleSlot]] = cls._load_slots(
+            session.query(Schedule, SchedulePlayer.player_id)
+            .outerjoin(SchedulePlayer, SchedulePlayer.schedule_id == Schedule.id)
+            .order_by(Schedule.datetime.asc(), SchedulePlayer.id.asc())
+        )
+        schedules_per_day = len(slots) // 7
+        week: list[ScheduleDay] = []
+        for nth_embed in range(7):
+            day_slots = slots[
+                nth_embed * schedules_per_day : (nth_embed + 1) * schedules_per_day
+            ]
+            week.append(
+                ScheduleDay(
+                    nth_embed=nth_embed,
+                    message_id=day_slots[0][0].message_id if day_slots else None,
+                    slots=[slot for _, slot in day_slots],
+                )
+            )
+        return week
+
     @classmethod
-    async def rebuild_embed(self, guild: Guild, nth_embed: int):
+    def load_day(
+        cls, session: SQLAlchemySession, nth_embed: int, message_id: int
+    ) -> ScheduleDay:
+        """
+        Load a single day, the schedules of a day all share the same message
+        """
+        slots = cls._load_slots(
+            session.query(Schedule, SchedulePlayer.player_id)
+            .outerjoin(SchedulePlayer, SchedulePlayer.schedule_id == Schedule.id)
+            .filter(Schedule.message_id == message_id)
+            .order_by(Schedule.datetime.asc(), SchedulePlayer.id.asc())
+        )
+        return ScheduleDay(
+            nth_embed=nth_embed,
+            message_id=message_id,
+            slots=[slot for _, slot in slots],
+        )
+
+    @classmethod
+    def _load_slots(cls, query) -> list[tuple[Schedule, ScheduleSlot]]:
+        slots_by_id: dict[str, tuple[Schedule, ScheduleSlot]] = {}
+        for schedule, player_id in query:
+            if schedule.id not in slots_by_id:
+                slots_by_id[schedule.id] = (
+                    schedule,
+                    ScheduleSlot(
+                        schedule_id=schedule.id,
+                        datetime=schedule.datetime,
+                        player_ids=[],
+                    ),
+                )
+            if player_id is not None:
+                slots_by_id[schedule.id][1].player_ids.append(player_id)
+        # dicts preserve insertion order, so this is still sorted by datetime
+        return list(slots_by_id.values())
+
+    @classmethod
+    def build_embed(cls, day: ScheduleDay) -> Embed:
+        embed = Embed(
+            title=ScheduleUtils.get_embed_title(day.nth_embed), colour=Colour.blue()
+        )
+        utc_tz = pytz.utc
+        for slot in day.slots:
+            utc_datetime = utc_tz.localize(slot.datetime)
+            timestamp = discord.utils.format_dt(utc_datetime)
+            if not slot.player_ids:
+                value = "> \n** **"  # create column indentation for empty schedules
+            else:
+                value = "\n".join(
+                    [f"> <@{player_id}>" for player_id in slot.player_ids]
+                )
+
+            embed.add_field(
+                name=timestamp,
+                value=value,
+                inline=True,
+            )
+        return embed
+
+    @classmethod
+    async def publish_days(cls, guild: Guild, days: list[ScheduleDay]):
+        """
+        Edit the embeds for the given days, skipping the ones that haven't
+        changed since they were last posted. Edits run concurrently.
+        """
         with ScopedSession() as session:
             schedule_channel_id = (
                 session.query(DiscordChannel.channel_id)
                 .filter(DiscordChannel.name == "schedule")
                 .scalar()
             )
-            schedule_channel = get(guild.text_channels, id=schedule_channel_id)
-
-            schedules_for_nth_embed = ScheduleUtils.get_schedules_for_nth_embed(
-                nth_embed
-            )
-            message: Message = schedule_channel.get_partial_message(
-                schedules_for_nth_embed[0].message_id
-            )
-
-            embed = Embed(
-                title=ScheduleUtils.get_embed_title(nth_embed), colour=Colour.blue()
-            )
+        schedule_channel = get(guild.text_channels, id=schedule_channel_id)
+        if not schedule_channel:
+            _log.warning("[publish_days] Could not find schedule channel")
+            return
 
-            utc_tz = pytz.utc
-            for schedule in schedules_for_nth_embed:
-                utc_datetime = utc_tz.localize(schedule.datetime)
-                timestamp = discord.utils.format_dt(utc_datetime)
-                players_scheduled = (
-                    session.query(Player)
-                    .join(SchedulePlayer, SchedulePlayer.player_id == Player.id)
-                    .filter(SchedulePlayer.schedule_id == schedule.id)
-                    .all()
+        changed_days = [
+            day
+            for day in days
+            if day.message_id and cls._rendered.get(day.nth_embed) != day.render_key()
+        ]
+        results = await asyncio.gather(
+            *[
+                schedule_channel.get_partial_message(day.message_id).edit(
+                    embed=cls.build_embed(day), view=ScheduleView(day)
                 )
-                if not players_scheduled:
-                    value = "> \n** **"  # create column indentation for empty schedules
-                else:
-                    value = "\n".join(
-                        [f"> <@{player.id}>" for player in players_scheduled]
-                    )
-
-                embed.add_field(
-                    name=timestamp,
-                    value=value,
-                    inline=True,
+                for day in changed_days
+            ],
+            return_exceptions=True,
+        )
+        for day, result in zip(changed_days, results):
+            if isinstance(result, Exception):
+                _log.error(
+                    f"[publish_days] Failed to edit schedule embed {day.nth_embed}: {result}"
                 )
-            await message.edit(embed=embed, view=ScheduleView(nth_embed))
+                cls._rendered.pop(day.nth_embed, None)
+            else:
+                cls._rendered[day.nth_embed] = day.render_key()
+
+    @classmethod
+    async def rebuild_embeds(cls, guild: Guild):
+        with ScopedSession() as session:
+            week = ScheduleUtils.load_week(session)
+        await ScheduleUtils.publish_days(guild, week)
+
+    @classmethod
+    async def rebuild_embed(
+        cls, guild: Guild, nth_embed: int, message_id: int | None = None
+    ):
+        with ScopedSession() as session:
+            if message_id:
+                day = ScheduleUtils.load_day(session, nth_embed, message_id)
+            else:
+                day = ScheduleUtils.load_week(session)[nth_embed]
+        await ScheduleUtils.publish_days(guild, [day])
 
     @classmethod
     def get_embed_title(cls, nth_embed: int) -> str:
@@ -401,19 +532,20 @@ class ScheduleUtils:
             return f"{nth_embed} Days From Now"
 
     @classmethod
-    def get_schedules_for_nth_embed(cls, nth_embed: int) -> list[Schedule]:
-        session = (
-            ScopedSession()
-        )  # this needs to be left open for use in the schedule task
-        num_schedules: int = session.query(func.count(Schedule.id)).scalar()
-        schedules_per_day = num_schedules / 7
-        offset = nth_embed * schedules_per_day
-        return (
-            session.query(Schedule)
-            .order_by(Schedule.datetime.asc())
-            .slice(offset, offset + schedules_per_day)
-            .all()
+    def get_schedules_by_day(cls, session: SQLAlchemySession) -> list[list[Schedule]]:
+        """
+        All schedules grouped into days, n=0 being today
+        """
+        schedules: list[Schedule] = (
+            session.query(Schedule).order_by(Schedule.datetime.asc()).all()
         )
+        schedules_per_day = len(schedules) // 7
+        return [
+            schedules[
+                nth_embed * schedules_per_day : (nth_embed + 1) * schedules_per_day
+            ]
+            for nth_embed in range(7)
+        ]
 
     @classmethod
     def is_active(cls) -> bool:
@@ -9,7 +9,10 @@ from sqlalchemy.orm.session import Session as SQLAlchemySession
 
 from discord_bots.checks import is_admin_app_command, is_command_channel
 from discord_bots.cogs.base import BaseCog
+from discord_bots.leaderboard import leaderboard
 from discord_bots.models import Config, Player, PlayerCategoryTrueskill, Queue, Session
+from discord_bots.percentiles import percentile_index
+from discord_bots.table_cache import table_cache
 from discord_bots.utils import mean, print_leaderboard
 
 _log = logging.getLogger(__name__)
@@ -24,19 +27,17 @@ class TrueskillCommands(BaseCog):
     @group.command(name="info", description="Explanation of Trueskill")
     @app_commands.check(is_command_channel)
     async def trueskill(self, interaction: Interaction):
-        with Session() as session:
-            config = session.query(Config).first()
-
-            output = ""
-            output += f"**mu (μ)**: The average skill of the gamer (default: {config.default_trueskill_mu:.1f})\n"
-            output += f"\n**sigma (σ)**: The degree of uncertainty in the gamer's skill (default: {config.default_trueskill_sigma:.1f})\n"
-            output += f'\n**tau (τ)**: The "dynamics" factor, greater values increase player position volatility (default: {config.default_trueskill_tau:.1f})\n'
-            output += "\n**Reference**: https://www.microsoft.com/en-us/research/project/trueskill-ranking-system"
-            output += "\n**Implementation**: https://trueskill.org/"
-            thumbnail = "https://www.microsoft.com/en-us/research/uploads/prod/2016/02/trueskill-skilldia.jpg"
-            embed = Embed(title="Trueskill", description=output, colour=Colour.blue())
-            embed.set_thumbnail(url=thumbnail)
-            await interaction.response.send_message(embed=embed)
+        config = table_cache.config()
+        output = ""
+        output += f"**mu (μ)**: The average skill of the gamer (default: {config.default_trueskill_mu:.1f})\n"
+        output += f"\n**sigma (σ)**: The degree of uncertainty in the gamer's skill (default: {config.default_trueskill_sigma:.1f})\n"
+        output += f'\n**tau (τ)**: The "dynamics" factor, greater values increase player position volatility (default: {config.default_trueskill_tau:.1f})\n'
+        output += "\n**Reference**: https://www.microsoft.com/en-us/research/project/trueskill-ranking-system"
+        output += "\n**Implementation**: https://trueskill.org/"
+        thumbnail = "https://www.microsoft.com/en-us/research/uploads/prod/2016/02/trueskill-skilldia.jpg"
+        embed = Embed(title="Trueskill", description=output, colour=Colour.blue())
+        embed.set_thumbnail(url=thumbnail)
+        await interaction.response.send_message(embed=embed)
 
     @group.command(
         name="resetplayer", description="Resets a players trueskill values to default"
@@ -75,6 +76,9 @@ class TrueskillCommands(BaseCog):
             player.rated_trueskill_sigma = config.default_trueskill_sigma
 
             session.commit()
+            leaderboard.invalidate()
+            percentile_index.update_players([player])
+            percentile_index.update_pcts(pcts)
         await interaction.response.send_message(
             embed=Embed(
                 description=f"{escape_markdown(member.name)} trueskill reset.",
@@ -26,21 +26,33 @@ from discord.guild import Guild
 from discord.member import Member
 from discord.utils import escape_markdown
 from PIL import Image
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session as SQLAlchemySession
 from trueskill import Rating
 
 import discord_bots.config as config
+from discord_bots.async_db_utils import (
+    async_delete_where,
+    async_query_all,
+    async_query_first,
+    async_session,
+)
 from discord_bots.checks import is_admin
+from discord_bots.game_view_model import (
+    async_load_game_view_model,
+    load_game_view_models,
+)
 from discord_bots.utils import (
     add_empty_field,
+    async_get_category_trueskills,
+    async_is_in_game,
     create_condensed_in_progress_game_embed,
     create_in_progress_game_embed,
     del_player_from_queues_and_waitlists,
     execute_map_rotation,
     flatten_list,
-    get_category_trueskill,
     get_player_game,
     get_team_name_diff,
     get_team_voice_channels,
@@ -84,6 +96,7 @@ from .models import (
 )
 from .names import generate_be_name, generate_ds_name
 from .queues import AddPlayerQueueMessage, add_player_queue, waitlist_messages
+from .table_cache import table_cache
 from .twitch import twitch
 
 _log = logging.getLogger(__name__)
@@ -141,13 +154,18 @@ async def get_position_combinations(
 
 
 async def get_even_teams(
-    session: SQLAlchemySession,
+    session: AsyncSession,
     player_ids: list[int],
     team_size: int,
     queue_id: str,
     map_id: str,
     queue_category_id: str | None,
-) -> tuple[list[Player], float, dict[Player, QueuePosition]]:
+) -> tuple[
+    list[Player],
+    float,
+    dict[Player, QueuePosition],
+    dict[int, PlayerCategoryTrueskill],
+]:
     """
     This is the one used when a new game is created. The other methods are for the showgamedebug command
     TODO: Tests
@@ -156,21 +174,26 @@ async def get_even_teams(
     Try to figure out even teams, the first half of the returning list is
     the first team, the second half is the second team.
 
-    :returns: list of players and win probability for the first team
+    This commits the session if it has to create category trueskills, so
+    call it before adding anything to the session that shouldn't be committed
+    yet.
+
+    :returns: list of players, win probability for the first team, the
+    position of each player and the category trueskills used, by player id
     """
-    db_config: Config = session.query(Config).first()
-    players: list[Player] = (
-        session.query(Player).filter(Player.id.in_(player_ids)).all()
+    db_config: Config | None = table_cache.config()
+    players: list[Player] = await async_query_all(
+        session, Player, Player.id.in_(player_ids)
     )
-    queue_positions = (
-        session.query(QueuePosition).filter(QueuePosition.queue_id == queue_id).all()
+    queue_positions: list[QueuePosition] = table_cache.filter(
+        QueuePosition, queue_id=queue_id
     )
-    queue = session.query(Queue).filter(Queue.id == queue_id).first()
+    queue: Queue | None = table_cache.get(Queue, queue_id)
 
     # Shuffling is important! This ensures captains and/or positions are randomly distributed!
     shuffle(players)
 
-    player_category_trueskills = {}
+    player_category_trueskills: dict[int, PlayerCategoryTrueskill] = {}
     queue_position_count = 2 * sum([qp.count for qp in queue_positions])
     should_use_positions = len(queue_positions) > 0 and queue_position_count == len(
         player_ids
@@ -181,31 +204,28 @@ async def get_even_teams(
         player_combinations, player_to_position = await get_position_combinations(
             queue_positions, players
         )
-        for player, queue_position in player_to_position.items():
-            pct = get_category_trueskill(
+        player_category_trueskills = await async_get_category_trueskills(
+            session,
+            db_config,
+            {
+                player.id: queue_position.position_id
+                for player, queue_position in player_to_position.items()
+            },
+            queue.map_trueskill_enabled,
+            queue_category_id,
+            map_id,
+        )
+        all_combinations: list[list[Player]] = player_combinations
+    else:
+        if queue_category_id:
+            player_category_trueskills = await async_get_category_trueskills(
                 session,
                 db_config,
-                player.id,
+                {player_id: None for player_id in player_ids},
                 queue.map_trueskill_enabled,
                 queue_category_id,
                 map_id,
-                queue_position.position_id,
             )
-            player_category_trueskills[player.id] = pct
-        all_combinations: list[list[Player]] = player_combinations
-    else:
-        if queue_category_id:
-            for player_id in player_ids:
-                pct = get_category_trueskill(
-                    session,
-                    db_config,
-                    player_id,
-                    queue.map_trueskill_enabled,
-                    queue_category_id,
-                    map_id,
-                    None,
-                )
-                player_category_trueskills[player_id] = pct
         all_combinations: list[list[Player]] = list(combinations(players, team_size))
 
     best_win_prob_so_far: float = 0.0
@@ -258,7 +278,12 @@ async def get_even_teams(
 
     _log.debug(f"Found team evenness: {best_team_evenness_so_far} interations: {i}")
 
-    return best_teams_so_far, best_win_prob_so_far, player_to_position
+    return (
+        best_teams_so_far,
+        best_win_prob_so_far,
+        player_to_position,
+        player_category_trueskills,
+    )
 
 
 async def create_game(
@@ -273,20 +298,18 @@ async def create_game(
     channel = guild.get_channel(channel_id)
     if not channel:
         return
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        queue: Queue | None = session.query(Queue).filter(Queue.id == queue_id).first()
+    async with async_session() as session:
+        queue: Queue | None = table_cache.get(Queue, queue_id)
         if not queue:
             _log.error(f"[create_game] could not find queue with id {queue_id}")
             return
 
-        next_rotation_map: RotationMap | None = (
-            session.query(RotationMap)
+        next_rotation_map: RotationMap | None = await session.scalar(
+            select(RotationMap)
             .join(Rotation, Rotation.id == RotationMap.rotation_id)
             .join(Queue, Queue.rotation_id == Rotation.id)
-            .filter(Queue.id == queue.id)
-            .filter(RotationMap.is_next == True)
-            .first()
+            .where(Queue.id == queue.id, RotationMap.is_next == True)
+            .limit(1)
         )
         if not next_rotation_map:
             raise Exception("No next map!")
@@ -298,21 +321,20 @@ async def create_game(
 
         next_map = None
         if rolled_random_map:
-            maps: List[Map] = session.query(Map).all()
+            maps: List[Map] = table_cache.all(Map)
             random_map = choice(maps)
             next_map = random_map
         else:
-            next_map: Map | None = (
-                session.query(Map).filter(Map.id == next_rotation_map.map_id).first()
-            )
+            next_map: Map | None = table_cache.get(Map, next_rotation_map.map_id)
 
         if len(player_ids) == 1:
             # Useful for debugging, no real world application
-            players = session.query(Player).filter(Player.id == player_ids[0]).all()
+            players = await async_query_all(session, Player, Player.id == player_ids[0])
             win_prob = 0.0
             player_to_position = (
                 {}
             )  # TODO: Should get the position, but not immediate need right now
+            player_category_trueskill_by_id = {}
         else:
             """
             # run get_even_teams in a separate process, so that it doesn't block the event loop
@@ -329,7 +351,12 @@ async def create_game(
                 players = result[0]
                 win_prob = result[1]
             """
-            players, win_prob, player_to_position = await get_even_teams(
+            (
+                players,
+                win_prob,
+                player_to_position,
+                player_category_trueskill_by_id,
+            ) = await get_even_teams(
                 session,
                 player_ids,
                 len(player_ids) // 2,
@@ -337,32 +364,17 @@ async def create_game(
                 next_map.id,
                 queue.category_id,
             )
-        category = (
-            session.query(Category).filter(Category.id == queue.category_id).first()
-        )
-        db_config: Config = session.query(Config).first()
+        category: Category | None = table_cache.get(Category, queue.category_id)
         player_category_trueskills: list[PlayerCategoryTrueskill] = []
         if len(player_to_position) > 0:
-            for player, queue_position in player_to_position.items():
-                pct = get_category_trueskill(
-                    session,
-                    db_config,
-                    player.id,
-                    queue.map_trueskill_enabled,
-                    queue.category_id,
-                    next_map.id,
-                    queue_position.position_id,
-                )
-                player_category_trueskills.append(pct)
+            player_category_trueskills = list(player_category_trueskill_by_id.values())
         elif category:
-            player_category_trueskills: list[PlayerCategoryTrueskill] = (
-                session.query(PlayerCategoryTrueskill)
-                .filter(
-                    PlayerCategoryTrueskill.category_id == category.id,
-                    PlayerCategoryTrueskill.map_id == next_map.id,
-                    PlayerCategoryTrueskill.player_id.in_(player_ids),
-                )
-                .all()
+            player_category_trueskills = await async_query_all(
+                session,
+                PlayerCategoryTrueskill,
+                PlayerCategoryTrueskill.category_id == category.id,
+                PlayerCategoryTrueskill.map_id == next_map.id,
+                PlayerCategoryTrueskill.player_id.in_(player_ids),
             )
         if player_category_trueskills:
             average_trueskill = mean([x.mu for x in player_category_trueskills])
@@ -411,7 +423,12 @@ async def create_game(
             session.add(game_player)
 
         short_game_id = short_uuid(game.id)
-        embed: Embed = await create_in_progress_game_embed(session, game, guild)
+        embed: Embed = await create_in_progress_game_embed(
+            None,
+            game,
+            guild,
+            game_view=await async_load_game_view_model(session, game.id),
+        )
         embed.title = f"🚩 Game '{queue.name}' ({short_uuid(game.id)}) has begun!"
 
         category_channel: discord.abc.GuildChannel | None = guild.get_channel(
@@ -434,12 +451,12 @@ async def create_game(
             )
             session.add(
                 InProgressGameChannel(
-                    in_progress_game_id=game.id, channel_id=be_voice_channel.id
+                    in_progress_game_id=game.id, channel_id=be_voice_channel.id, team=0
                 )
             )
             session.add(
                 InProgressGameChannel(
-                    in_progress_game_id=game.id, channel_id=ds_voice_channel.id
+                    in_progress_game_id=game.id, channel_id=ds_voice_channel.id, team=1
                 )
             )
         else:
@@ -490,8 +507,10 @@ async def create_game(
         else:
             _log.warning("Could not get InProgressGameCommands")
 
-        session.query(QueuePlayer).filter(QueuePlayer.player_id.in_(player_ids)).delete()  # type: ignore
-        session.commit()
+        await async_delete_where(
+            session, QueuePlayer, QueuePlayer.player_id.in_(player_ids)
+        )
+        await session.commit()
 
         if not rolled_random_map:
             await execute_map_rotation(queue.rotation_id, False)
@@ -504,7 +523,7 @@ async def create_game(
             )
             if prediction_message_id:
                 game.prediction_message_id = prediction_message_id
-                session.commit()
+                await session.commit()
 
         await channel.send(embed=embed)
         if (
@@ -536,10 +555,9 @@ async def add_player_to_queue(
     added to the queue, the second represents whether the queue popped as a
     result.
     """
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        queue_roles = (
-            session.query(QueueRole).filter(QueueRole.queue_id == queue_id).all()
+    async with async_session() as session:
+        queue_roles: list[QueueRole] = await async_query_all(
+            session, QueueRole, QueueRole.queue_id == queue_id
         )
 
         # Zero queue roles means no role restrictions
@@ -553,23 +571,24 @@ async def add_player_to_queue(
             if not has_role:
                 return False, False
 
-        if is_in_game(player_id):
+        if await async_is_in_game(session, player_id):
             return False, False
 
-        player: Player = session.query(Player).filter(Player.id == player_id).first()
-        queue: Queue = session.query(Queue).filter(Queue.id == queue_id).first()
-        category = (
-            session.query(Category).filter(Category.id == queue.category_id).first()
+        player: Player | None = await async_query_first(
+            session, Player, Player.id == player_id
+        )
+        queue: Queue | None = await async_query_first(
+            session, Queue, Queue.id == queue_id
         )
+        if not player or not queue:
+            return False, False
         player_category_trueskill: PlayerCategoryTrueskill | None = None
-        if category:
-            player_category_trueskill = (
-                session.query(PlayerCategoryTrueskill)
-                .filter(
-                    PlayerCategoryTrueskill.player_id == player_id,
-                    PlayerCategoryTrueskill.category_id == category.id,
-                )
-                .first()
+        if queue.category_id:
+            player_category_trueskill = await async_query_first(
+                session,
+                PlayerCategoryTrueskill,
+                PlayerCategoryTrueskill.player_id == player_id,
+                PlayerCategoryTrueskill.category_id == queue.category_id,
             )
         # TODO: This should be done in the calling function so that the user can given a proper message indicating that they don't meet the requirements
         player_rank = player.rated_trueskill_mu - (3 * player.rated_trueskill_sigma)
@@ -593,27 +612,24 @@ async def add_player_to_queue(
             )
         )
         try:
-            session.commit()
+            await session.commit()
         except IntegrityError:
-            session.rollback()
+            await session.rollback()
             return False, False
 
-        queue: Queue = session.query(Queue).filter(Queue.id == queue_id).first()
-        queue_players: list[QueuePlayer] = (
-            session.query(QueuePlayer).filter(QueuePlayer.queue_id == queue_id).all()
+        queue_players: list[QueuePlayer] = await async_query_all(
+            session, QueuePlayer, QueuePlayer.queue_id == queue_id
         )
         if len(queue_players) == queue.size and not queue.is_sweaty:  # Pop!
             player_ids: list[int] = list(map(lambda x: x.player_id, queue_players))
             await create_game(queue.id, player_ids, channel.id, guild.id)
             return True, True
 
-        queue_notifications: list[QueueNotification] = (
-            session.query(QueueNotification)
-            .filter(
-                QueueNotification.queue_id == queue_id,
-                QueueNotification.size == len(queue_players),
-            )
-            .all()
+        queue_notifications: list[QueueNotification] = await async_query_all(
+            session,
+            QueueNotification,
+            QueueNotification.queue_id == queue_id,
+            QueueNotification.size == len(queue_players),
         )
         for queue_notification in queue_notifications:
             member: Member | None = guild.get_member(queue_notification.player_id)
@@ -627,8 +643,8 @@ async def add_player_to_queue(
                     )
                 except Exception:
                     pass
-            session.delete(queue_notification)
-        session.commit()
+            await session.delete(queue_notification)
+        await session.commit()
 
         return True, False
 
@@ -939,7 +955,8 @@ async def autosub(ctx: Context, member: Member = None):
         embed_description=f"Auto-substituted **{subbed_in_player.name}** in for **{subbed_out_player_name}**",
         colour=Colour.yellow(),
     )
-    await _rebalance_game(game, session, message)
+    await _rebalance_game(game.id, message)
+    session.refresh(game)
     embed: discord.Embed = await create_in_progress_game_embed(
         session, game, guild, False
     )
@@ -1173,6 +1190,18 @@ async def status(ctx: Context, *args):
             await ctx.channel.send("No Rotations")
             return
 
+        # load every running game once, not once per rotation
+        games_by_queue: dict[str, list[InProgressGame]] = defaultdict(list)
+        running_games: list[InProgressGame] = (
+            session.query(InProgressGame)
+            .filter(InProgressGame.is_finished == False)
+            .all()
+        )
+        for game in running_games:
+            if game.queue_id:
+                games_by_queue[game.queue_id].append(game)
+        game_views = load_game_view_models(session, [game.id for game in running_games])
+
         embed = Embed(title="Queues", color=Colour.blue())
         ipg_embeds: list[Embed] = []
         rotation_queues: list[Queue] | None
@@ -1191,13 +1220,6 @@ async def status(ctx: Context, *args):
             if not rotation_queues:
                 continue
 
-            games_by_queue: dict[str, list[InProgressGame]] = defaultdict(list)
-            for game in session.query(InProgressGame).filter(
-                InProgressGame.is_finished == False
-            ):
-                if game.queue_id:
-                    games_by_queue[game.queue_id].append(game)
-
             next_rotation_map: RotationMap | None = (
                 session.query(RotationMap)
                 .filter(RotationMap.rotation_id == rotation.id)
@@ -1288,6 +1310,7 @@ async def status(ctx: Context, *args):
                         ipg_embed = await create_condensed_in_progress_game_embed(
                             session,
                             game,
+                            game_views.get(game.id),
                         )
                         ipg_embeds.append(ipg_embed)
         await ctx.channel.send(
@@ -1343,107 +1366,106 @@ async def streams(ctx: Context):
 
 
 async def _rebalance_game(
-    game: InProgressGame,
-    session: SQLAlchemySession,
+    game_id: str,
     message: Message,
 ):
     """
-    Recreate the players on each team - use this after subbing a player
+    Recreate the players on each team - use this after subbing a player.
+    Refresh the game afterwards, its ratings change.
     """
     assert message.guild
     assert message.channel
-    queue: Queue = session.query(Queue).filter(Queue.id == game.queue_id).first()
-    db_config: Config = session.query(Config).first()
+    async with async_session() as session:
+        game: InProgressGame | None = await async_query_first(
+            session, InProgressGame, InProgressGame.id == game_id
+        )
+        if not game:
+            _log.error(f"[_rebalance_game] could not find game with id {game_id}")
+            return
+        queue: Queue = table_cache.get(Queue, game.queue_id)
 
-    game_players = (
-        session.query(InProgressGamePlayer)
-        .filter(InProgressGamePlayer.in_progress_game_id == game.id)
-        .all()
-    )
-    player_ids: list[int] = list(map(lambda x: x.player_id, game_players))
-    """
-    # run get_even_teams in a separate process, so that it doesn't block the event loop
-    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
-    with concurrent.futures.ProcessPoolExecutor() as pool:
-        result = await loop.run_in_executor(
-            pool,
-            get_even_teams,
+        game_players: list[InProgressGamePlayer] = await async_query_all(
+            session,
+            InProgressGamePlayer,
+            InProgressGamePlayer.in_progress_game_id == game.id,
+        )
+        player_ids: list[int] = list(map(lambda x: x.player_id, game_players))
+        """
+        # run get_even_teams in a separate process, so that it doesn't block the event loop
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        with concurrent.futures.ProcessPoolExecutor() as pool:
+            result = await loop.run_in_executor(
+                pool,
+                get_even_teams,
+                player_ids,
+                len(player_ids) // 2,
+                queue.is_rated,
+                queue.category_id,
+            )
+            players = result[0]
+            win_prob = result[1]
+        """
+        (
+            players,
+            win_prob,
+            player_to_position,
+            player_category_trueskill_by_id,
+        ) = await get_even_teams(
+            session,
             player_ids,
             len(player_ids) // 2,
-            queue.is_rated,
+            queue.id,
+            game.map_id,
             queue.category_id,
         )
-        players = result[0]
-        win_prob = result[1]
-    """
-    players, win_prob, player_to_position = await get_even_teams(
-        session,
-        player_ids,
-        len(player_ids) // 2,
-        queue.id,
-        game.map_id,
-        queue.category_id,
-    )
-    for game_player in game_players:
-        session.delete(game_player)
-    game.win_probability = win_prob
-    category = session.query(Category).filter(Category.id == queue.category_id).first()
-    player_category_trueskills: list[PlayerCategoryTrueskill] = []
-    if len(player_to_position) > 0:
-        for player, queue_position in player_to_position.items():
-            pct = get_category_trueskill(
+        for game_player in game_players:
+            await session.delete(game_player)
+        game.win_probability = win_prob
+        category: Category | None = table_cache.get(Category, queue.category_id)
+        player_category_trueskills: list[PlayerCategoryTrueskill] = []
+        if len(player_to_position) > 0:
+            player_category_trueskills = list(player_category_trueskill_by_id.values())
+        elif category:
+            player_category_trueskills = await async_query_all(
                 session,
-                db_config,
-                player.id,
-                queue.map_trueskill_enabled,
-                queue.category_id,
-                game.map_id,
-                queue_position.position_id,
-            )
-            player_category_trueskills.append(pct)
-    elif category:
-        player_category_trueskills: list[PlayerCategoryTrueskill] = (
-            session.query(PlayerCategoryTrueskill)
-            .filter(
+                PlayerCategoryTrueskill,
                 PlayerCategoryTrueskill.category_id == category.id,
                 PlayerCategoryTrueskill.player_id.in_(player_ids),
             )
-            .all()
-        )
-    if player_category_trueskills:
-        average_trueskill = mean([x.mu for x in player_category_trueskills])
-    else:
-        average_trueskill = mean([x.rated_trueskill_mu for x in players])
-
-    game.average_trueskill = average_trueskill
-    team0_players = players[: len(players) // 2]
-    team1_players = players[len(players) // 2 :]
-    for player in team0_players:
-        game_player = InProgressGamePlayer(
-            in_progress_game_id=game.id,
-            player_id=player.id,
-            position_id=(
-                player_to_position[player].position_id
-                if player in player_to_position
-                else None
-            ),
-            team=0,
-        )
-        session.add(game_player)
-    for player in team1_players:
-        game_player = InProgressGamePlayer(
-            in_progress_game_id=game.id,
-            player_id=player.id,
-            position_id=(
-                player_to_position[player].position_id
-                if player in player_to_position
-                else None
-            ),
-            team=1,
-        )
-        session.add(game_player)
+        if player_category_trueskills:
+            average_trueskill = mean([x.mu for x in player_category_trueskills])
+        else:
+            average_trueskill = mean([x.rated_trueskill_mu for x in players])
 
-    session.commit()
+        game.average_trueskill = average_trueskill
+        team0_players = players[: len(players) // 2]
+        team1_players = players[len(players) // 2 :]
+        for player in team0_players:
+            game_player = InProgressGamePlayer(
+                in_progress_game_id=game.id,
+                player_id=player.id,
+                position_id=(
+                    player_to_position[player].position_id
+                    if player in player_to_position
+                    else None
+                ),
+                team=0,
+            )
+            session.add(game_player)
+        for player in team1_players:
+            game_player = InProgressGamePlayer(
+                in_progress_game_id=game.id,
+                player_id=player.id,
+                position_id=(
+                    player_to_position[player].position_id
+                    if player in player_to_position
+                    else None
+                ),
+                team=1,
+            )
+            session.add(game_player)
+
+        await session.commit()
 
     if config.ECONOMY_ENABLED:
         try:
@@ -1602,7 +1624,8 @@ async def sub(ctx: Context, member: Member):
         [res[1] for res in results if res] if results else []
     )
 
-    await _rebalance_game(game, session, message)
+    await _rebalance_game(game.id, message)
+    session.refresh(game)
     embed: discord.Embed = await create_in_progress_game_embed(
         session, game, guild, False
     )
@@ -162,6 +162,9 @@ MOCK_COMMAND_USERS: list[int] = list(
 ENABLE_VOICE_MOVE: bool = _to_bool(key="ENABLE_VOICE_MOVE", default=False)
 DEFAULT_VOICE_MOVE: bool = _to_bool(key="DEFAULT_VOICE_MOVE", default=False)
 VOICE_MOVE_LOBBY: int = _to_int(key="VOICE_MOVE_LOBBY", required=False)
+VOICE_MOVE_CONCURRENCY: int = _to_int(key="VOICE_MOVE_CONCURRENCY", default=4)
+VOICE_MOVE_INTERVAL: float = _to_float(key="VOICE_MOVE_INTERVAL", default=0.1)
+VOICE_MOVE_MAX_RETRIES: int = _to_int(key="VOICE_MOVE_MAX_RETRIES", default=3)
 ALLOW_VULGAR_NAMES: bool = _to_bool(key="ALLOW_VULGAR_NAMES", default=False)
 ENABLE_DEBUG: bool = _to_bool(key="ENABLE_DEBUG", default=False)
 ENABLE_RAFFLE: bool = _to_bool(key="ENABLE_RAFFLE", default=False)
@@ -200,6 +203,25 @@ MAP_VOTE_THRESHOLD: int = _to_int(key="MAP_VOTE_THRESHOLD", default=7)
 STATS_DIR: str | None = _to_str(key="STATS_DIR")
 STATS_WIDTH = _to_int(key="STATS_WIDTH")
 STATS_HEIGHT = _to_int(key="STATS_HEIGHT")
+STATS_RENDER_WORKERS: int = _to_int(key="STATS_RENDER_WORKERS", default=1)
+STATS_RENDER_QUEUE_SIZE: int = _to_int(key="STATS_RENDER_QUEUE_SIZE", default=10)
+FINISHED_GAME_CACHE_SIZE: int = _to_int(key="FINISHED_GAME_CACHE_SIZE", default=512)
+FINISHED_GAME_CACHE_PATH: str | None = _to_str(key="FINISHED_GAME_CACHE_PATH")
+DB_EXECUTOR_THREADS: int = _to_int(key="DB_EXECUTOR_THREADS", default=0)
+DB_EXECUTOR_SLOW_CALL_MS: int = _to_int(key="DB_EXECUTOR_SLOW_CALL_MS", default=500)
+DB_EXECUTOR_READ_THREADS: int = _to_int(key="DB_EXECUTOR_READ_THREADS", default=4)
+DB_EXECUTOR_WRITE_BATCH_SIZE: int = _to_int(
+    key="DB_EXECUTOR_WRITE_BATCH_SIZE", default=50
+)
+SQLITE_BUSY_TIMEOUT_MS: int = _to_int(key="SQLITE_BUSY_TIMEOUT_MS", default=15000)
+SQLITE_CACHE_SIZE_MB: int = _to_int(key="SQLITE_CACHE_SIZE_MB", default=64)
+SQLITE_MMAP_SIZE_MB: int = _to_int(key="SQLITE_MMAP_SIZE_MB", default=256)
+QUERY_COUNT_WARNING: int = _to_int(key="QUERY_COUNT_WARNING", default=50)
+QUERY_TIME_WARNING_MS: int = _to_int(key="QUERY_TIME_WARNING_MS", default=1000)
+TABLE_CACHE_CHECK_SECONDS: int = _to_int(key="TABLE_CACHE_CHECK_SECONDS", default=5)
+ACTIVITY_FLUSH_SECONDS: int = _to_int(key="ACTIVITY_FLUSH_SECONDS", default=5)
+ARCHIVE_AFTER_DAYS: int = _to_int(key="ARCHIVE_AFTER_DAYS", default=0)
+ARCHIVE_BATCH_SIZE: int = _to_int(key="ARCHIVE_BATCH_SIZE", default=500)
 ECONOMY_ENABLED: bool = _to_bool(key="ECONOMY_ENABLED", default=False)
 CURRENCY_NAME: str = _to_str(key="CURRENCY_NAME", default="Shazbucks")
 STARTING_CURRENCY: int = _to_int(key="STARTING_CURRENCY", default=100)
@@ -0,0 +1,351 @@
+# Runs synchronous SQLAlchemy work on a thread pool instead of the event loop,
+# as a bridge until every code path uses AsyncSession. Each worker thread owns
+# one Session, which is closed after every call so that no objects or
+# connections are kept between calls.
+#
+# On SQLite the pool has a single thread, so every call made through the
+# executor (and all of its writes) is serialized. Work that only reads can use
+# read() instead, which runs on a separate pool of read only connections that
+# never wait on the writer (see read_engine in models.py). Small writes can use
+# write(), which queues them for one writer task that commits them in batches.
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Concatenate, ParamSpec, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+import discord_bots.config as config
+from discord_bots.models import ReadSession, Session, engine
+
+_log = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+def _name(fn: Callable) -> str:
+    return getattr(fn, "__qualname__", repr(fn))
+
+
+@dataclass
+class _PendingWrite:
+    fn: Callable
+    args: tuple
+    kwargs: dict
+    future: asyncio.Future
+    submitted_at: float
+    # The caller's context, so that its queries are attributed to it (see
+    # query_stats.py)
+    context: contextvars.Context
+
+
+@dataclass
+class _WriteError:
+    # Wraps the exception of a single failed write, so that it is told apart
+    # from a write that returns an exception
+    exception: Exception
+
+
+@dataclass
+class DBCallStats:
+    calls: int = 0
+    errors: int = 0
+    # Time spent waiting for a worker thread
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    # Time spent running the function
+    run_seconds: float = 0.0
+    max_run_seconds: float = 0.0
+
+    def record(self, wait_seconds: float, run_seconds: float, failed: bool):
+        self.calls += 1
+        self.errors += int(failed)
+        self.wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self.run_seconds += run_seconds
+        self.max_run_seconds = max(self.max_run_seconds, run_seconds)
+
+
+class DBExecutor:
+    def __init__(
+        self,
+        engine: Engine,
+        threads: int,
+        slow_call_ms: int,
+        read_threads: int = 4,
+        write_batch_size: int = 50,
+    ):
+        if engine.dialect.name == "sqlite":
+            threads = 1
+        elif threads <= 0:
+            # One thread per pooled connection, so workers never wait on the
+            # connection pool
+            threads = engine.pool.size() if hasattr(engine.pool, "size") else 1
+        self.threads = max(threads, 1)
+        self._slow_call_seconds = slow_call_ms / 1000
+        self.read_threads = max(read_threads, 1)
+        self._write_batch_size = max(write_batch_size, 1)
+        self._pool: ThreadPoolExecutor | None = None
+        self._read_pool: ThreadPoolExecutor | None = None
+        self._local = threading.local()
+        self._writes: asyncio.Queue[_PendingWrite] | None = None
+        self._writer: asyncio.Task | None = None
+        self._stats: dict[str, DBCallStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.threads, thread_name_prefix="db"
+            )
+        return self._pool
+
+    def _read_executor(self) -> ThreadPoolExecutor:
+        if self._read_pool is None:
+            self._read_pool = ThreadPoolExecutor(
+                max_workers=self.read_threads, thread_name_prefix="db-read"
+            )
+        return self._read_pool
+
+    def _session(self, read_only: bool = False) -> SQLAlchemySession:
+        # Worker threads only ever run one kind of work, so one session each
+        session: SQLAlchemySession | None = getattr(self._local, "session", None)
+        if session is None:
+            session = ReadSession() if read_only else Session()
+            self._local.session = session
+        return session
+
+    def _call(
+        self,
+        submitted_at: float,
+        fn: Callable[..., T],
+        args: tuple,
+        kwargs: dict,
+        read_only: bool = False,
+    ) -> T:
+        started_at = time.perf_counter()
+        session = self._session(read_only)
+        failed = False
+        try:
+            return fn(session, *args, **kwargs)
+        except Exception:
+            failed = True
+            session.rollback()
+            raise
+        finally:
+            session.close()
+            finished_at = time.perf_counter()
+            self._record(
+                _name(fn),
+                started_at - submitted_at,
+                finished_at - started_at,
+                failed,
+            )
+
+    def _record(self, name: str, wait_seconds: float, run_seconds: float, failed: bool):
+        with self._stats_lock:
+            self._stats.setdefault(name, DBCallStats()).record(
+                wait_seconds, run_seconds, failed
+            )
+        if wait_seconds + run_seconds >= self._slow_call_seconds:
+            _log.warning(
+                f"[DBExecutor] Slow call {name}: waited {1000 * wait_seconds:.1f}ms, ran {1000 * run_seconds:.1f}ms"
+            )
+
+    async def run(
+        self,
+        fn: Callable[Concatenate[SQLAlchemySession, P], T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """
+        Run fn(session, *args, **kwargs) on a worker thread and return its
+        result. The session is closed afterwards, so fn should return plain
+        values or objects whose attributes are already loaded, and commit
+        anything it writes.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor(),
+            functools.partial(
+                contextvars.copy_context().run,
+                self._call,
+                time.perf_counter(),
+                fn,
+                args,
+                kwargs,
+            ),
+        )
+
+    async def read(
+        self,
+        fn: Callable[Concatenate[SQLAlchemySession, P], T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """
+        Like run, for fn that only reads. Runs on the read pool, so it doesn't
+        wait behind writes.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._read_executor(),
+            functools.partial(
+                contextvars.copy_context().run,
+                self._call,
+                time.perf_counter(),
+                fn,
+                args,
+                kwargs,
+                read_only=True,
+            ),
+        )
+
+    async def write(
+        self,
+        fn: Callable[Concatenate[SQLAlchemySession, P], T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """
+        Queue fn(session, *args, **kwargs) for the writer and return its
+        result once it is committed. Writes queued together are committed
+        together, so fn must not commit itself. If any write in a batch fails
+        the batch is rolled back and each write is retried on its own, so fn
+        may run twice and should have no side effects outside of the session.
+        """
+        if self._writes is None:
+            self._writes = asyncio.Queue()
+        if self._writer is None or self._writer.done():
+            # Don't inherit the context of whichever caller starts the writer
+            self._writer = asyncio.create_task(
+                self._write_loop(), context=contextvars.Context()
+            )
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait(
+            _PendingWrite(
+                fn,
+                args,
+                kwargs,
+                future,
+                time.perf_counter(),
+                contextvars.copy_context(),
+            )
+        )
+        return await future
+
+    async def _write_loop(self):
+        assert self._writes is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._writes.get()]
+            while len(batch) < self._write_batch_size and not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            try:
+                results = await loop.run_in_executor(
+                    self._executor(), self._write_batch, batch
+                )
+            except Exception as e:
+                results = [_WriteError(e)] * len(batch)
+            for pending, result in zip(batch, results):
+                if pending.future.done():
+                    continue
+                if isinstance(result, _WriteError):
+                    pending.future.set_exception(result.exception)
+                else:
+                    pending.future.set_result(result)
+
+    def _write_batch(self, batch: list[_PendingWrite]) -> list:
+        session = self._session()
+        try:
+            started_at = time.perf_counter()
+            try:
+                results = [
+                    pending.context.run(
+                        pending.fn, session, *pending.args, **pending.kwargs
+                    )
+                    for pending in batch
+                ]
+                session.commit()
+            except Exception:
+                session.rollback()
+                if len(batch) == 1:
+                    self._record(
+                        _name(batch[0].fn),
+                        started_at - batch[0].submitted_at,
+                        time.perf_counter() - started_at,
+                        True,
+                    )
+                    raise
+                _log.warning(
+                    f"[DBExecutor._write_batch] Batch of {len(batch)} writes failed, retrying them one by one"
+                )
+            else:
+                run_seconds = (time.perf_counter() - started_at) / len(batch)
+                for pending in batch:
+                    self._record(
+                        _name(pending.fn),
+                        started_at - pending.submitted_at,
+                        run_seconds,
+                        False,
+                    )
+                return results
+            results = []
+            for pending in batch:
+                started_at = time.perf_counter()
+                try:
+                    results.append(
+                        pending.context.run(
+                            pending.fn, session, *pending.args, **pending.kwargs
+                        )
+                    )
+                    session.commit()
+                    failed = False
+                except Exception as e:
+                    session.rollback()
+                    results.append(_WriteError(e))
+                    failed = True
+                self._record(
+                    _name(pending.fn),
+                    started_at - pending.submitted_at,
+                    time.perf_counter() - started_at,
+                    failed,
+                )
+            return results
+        finally:
+            session.close()
+
+    def stats(self) -> dict[str, DBCallStats]:
+        """
+        A snapshot of the call stats, keyed by function name
+        """
+        with self._stats_lock:
+            return {name: replace(stats) for name, stats in self._stats.items()}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
+
+    def shutdown(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        for pool in (self._pool, self._read_pool):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self._pool = None
+        self._read_pool = None
+
+
+db = DBExecutor(
+    engine,
+    threads=config.DB_EXECUTOR_THREADS,
+    slow_call_ms=config.DB_EXECUTOR_SLOW_CALL_MS,
+    read_threads=config.DB_EXECUTOR_READ_THREADS,
+    write_batch_size=config.DB_EXECUTOR_WRITE_BATCH_SIZE,
+)
@@ -0,0 +1,117 @@
+# Size bounded cache of rendered finished games. Finished games only change
+# when an admin edits the winner or deletes the game, so their embeds and text
+# can be rendered once and reused. Entries are keyed by the game id, the kind
+# of rendering and a version stamp (the winning team), and can optionally be
+# persisted with shelve so that they survive restarts.
+import logging
+import shelve
+from collections import OrderedDict
+from typing import Any
+
+import discord_bots.config as config
+
+_log = logging.getLogger(__name__)
+
+EMBED = "embed"
+TEXT = "text"
+DEBUG_TEXT = "debug_text"
+
+
+def _key(kind: str, finished_game_id: str, version: object) -> str:
+    return f"{kind}:{finished_game_id}:{version}"
+
+
+def _finished_game_id(key: str) -> str:
+    return key.split(":")[1]
+
+
+class FinishedGameCache:
+    def __init__(self, max_size: int, path: str | None = None):
+        self._max_size = max(max_size, 0)
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        # finished game id -> keys, so that every rendering of a game can be
+        # dropped at once
+        self._keys_by_game: dict[str, set[str]] = {}
+        self._shelf: shelve.Shelf | None = None
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self._open(path)
+
+    def _open(self, path: str):
+        try:
+            self._shelf = shelve.open(path)
+        except Exception:
+            _log.exception(f"[FinishedGameCache._open] Could not open {path}")
+            return
+        # Only as many entries as fit in memory are persisted, so warm the
+        # cache with all of them
+        for key in list(self._shelf.keys()):
+            try:
+                self._set(key, self._shelf[key], persist=False)
+            except Exception:
+                _log.exception(f"[FinishedGameCache._open] Dropping entry {key}")
+                del self._shelf[key]
+        _log.info(
+            f"[FinishedGameCache._open] Loaded {len(self._entries)} entries from {path}"
+        )
+
+    def get(self, kind: str, finished_game_id: str, version: object) -> Any | None:
+        key = _key(kind, finished_game_id, version)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, kind: str, finished_game_id: str, version: object, value: Any):
+        if self._max_size <= 0:
+            return
+        self._set(_key(kind, finished_game_id, version), value, persist=True)
+        self._sync()
+
+    def invalidate(self, finished_game_id: str):
+        for key in self._keys_by_game.pop(finished_game_id, set()):
+            self._entries.pop(key, None)
+            if self._shelf is not None:
+                self._shelf.pop(key, None)
+        self._sync()
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_game.clear()
+        if self._shelf is not None:
+            self._shelf.clear()
+        self._sync()
+
+    def close(self):
+        if self._shelf is not None:
+            self._shelf.close()
+            self._shelf = None
+
+    def _set(self, key: str, value: Any, persist: bool):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._keys_by_game.setdefault(_finished_game_id(key), set()).add(key)
+        if persist and self._shelf is not None:
+            self._shelf[key] = value
+        while len(self._entries) > self._max_size:
+            evicted_key, _ = self._entries.popitem(last=False)
+            keys = self._keys_by_game.get(_finished_game_id(evicted_key))
+            if keys is not None:
+                keys.discard(evicted_key)
+                if not keys:
+                    del self._keys_by_game[_finished_game_id(evicted_key)]
+            if self._shelf is not None:
+                self._shelf.pop(evicted_key, None)
+
+    def _sync(self):
+        if self._shelf is not None:
+            self._shelf.sync()
+
+
+finished_game_cache = FinishedGameCache(
+    max_size=config.FINISHED_GAME_CACHE_SIZE, path=config.FINISHED_GAME_CACHE_PATH
+)
@@ -0,0 +1,135 @@
+# Loads pages of finished games for /game history. Pages are keyset paginated
+# on (finished_at, id), newest first, so that every page costs the same no
+# matter how far back the history goes.
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import and_, exists, or_, select
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+from discord_bots.models import FinishedGame, FinishedGamePlayer, Map
+
+# (finished_at, id) of the last game on a page
+GameHistoryCursor = tuple[datetime, str]
+
+
+@dataclass(frozen=True)
+class GameHistoryFilters:
+    player_id: int | None = None
+    queue_name: str | None = None
+    category_name: str | None = None
+    map_full_name: str | None = None
+
+
+@dataclass
+class GameHistoryEntry:
+    finished_game: FinishedGame
+    finished_game_players: list[FinishedGamePlayer] = field(default_factory=list)
+    map: Map | None = None
+
+
+@dataclass
+class GameHistoryPage:
+    # Newest game first
+    entries: list[GameHistoryEntry]
+    has_more: bool
+
+    @property
+    def next_cursor(self) -> GameHistoryCursor | None:
+        if not self.has_more or not self.entries:
+            return None
+        last_game = self.entries[-1].finished_game
+        return (last_game.finished_at, last_game.id)
+
+
+def load_game_history_page(
+    session: SQLAlchemySession,
+    filters: GameHistoryFilters,
+    page_size: int,
+    after: GameHistoryCursor | None = None,
+) -> GameHistoryPage:
+    """
+    Load the page of games that finished before the cursor, along with their
+    players, in one query. Maps are looked up afterwards in one more query.
+    """
+    page_query = select(FinishedGame.id)
+    if filters.player_id is not None:
+        player_fgp = aliased(FinishedGamePlayer)
+        page_query = page_query.where(
+            exists().where(
+                player_fgp.finished_game_id == FinishedGame.id,
+                player_fgp.player_id == filters.player_id,
+            )
+        )
+    if filters.queue_name:
+        page_query = page_query.where(FinishedGame.queue_name == filters.queue_name)
+    if filters.category_name:
+        page_query = page_query.where(
+            FinishedGame.category_name == filters.category_name
+        )
+    if filters.map_full_name:
+        page_query = page_query.where(
+            FinishedGame.map_full_name == filters.map_full_name
+        )
+    if after is not None:
+        after_finished_at, after_id = after
+        page_query = page_query.where(
+            or_(
+                FinishedGame.finished_at < after_finished_at,
+                and_(
+                    FinishedGame.finished_at == after_finished_at,
+                    FinishedGame.id < after_id,
+                ),
+            )
+        )
+    # Fetch one extra game to find out whether there is another page
+    page_ids = (
+        page_query.order_by(FinishedGame.finished_at.desc(), FinishedGame.id.desc())
+        .limit(page_size + 1)
+        .subquery()
+    )
+
+    rows: list[tuple[FinishedGame, FinishedGamePlayer | None]] = (
+        session.query(FinishedGame, FinishedGamePlayer)
+        .join(page_ids, page_ids.c.id == FinishedGame.id)
+        .join(
+            FinishedGamePlayer,
+            FinishedGamePlayer.finished_game_id == FinishedGame.id,
+            isouter=True,
+        )
+        .order_by(FinishedGame.finished_at.desc(), FinishedGame.id.desc())
+        .all()
+    )
+    entries_by_id: dict[str, GameHistoryEntry] = {}
+    for finished_game, finished_game_player in rows:
+        entry = entries_by_id.get(finished_game.id)
+        if entry is None:
+            entry = GameHistoryEntry(finished_game)
+            entries_by_id[finished_game.id] = entry
+        if finished_game_player is not None:
+            entry.finished_game_players.append(finished_game_player)
+    entries = list(entries_by_id.values())
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+
+    map_names = {entry.finished_game.map_full_name for entry in entries}
+    map_short_names = {entry.finished_game.map_short_name for entry in entries}
+    if entries:
+        maps: list[Map] = (
+            session.query(Map)
+            .filter(
+                or_(
+                    Map.full_name.in_(map_names),
+                    Map.short_name.in_(map_short_names),
+                )
+            )
+            .all()
+        )
+        maps_by_full_name = {map.full_name: map for map in maps}
+        maps_by_short_name = {map.short_name: map for map in maps}
+        for entry in entries:
+            entry.map = maps_by_full_name.get(
+                entry.finished_game.map_full_name
+            ) or maps_by_short_name.get(entry.finished_game.map_short_name)
+    return GameHistoryPage(entries, has_more)
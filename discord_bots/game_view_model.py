@@ -0,0 +1,180 @@
+# Read-only snapshot of an in progress game with everything needed to render
+# it: queue, category, map, players, teams, positions and category ratings.
+# Games are loaded in bulk with two queries no matter how many there are.
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+from discord_bots.models import (
+    Category,
+    InProgressGame,
+    InProgressGamePlayer,
+    Map,
+    Player,
+    PlayerCategoryTrueskill,
+    Position,
+    Queue,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class GamePlayerViewModel:
+    player_id: int
+    name: str
+    team: int
+    position_name: str | None
+    rated_trueskill_mu: float
+    rated_trueskill_sigma: float
+    move_enabled: bool
+    # Category rating, None for uncategorized queues or players without one
+    category_mu: float | None
+    category_sigma: float | None
+
+    @property
+    def display_name(self) -> str:
+        if self.position_name:
+            return f"{self.name} ({self.position_name})"
+        return self.name
+
+
+@dataclass(frozen=True, slots=True)
+class GameViewModel:
+    id: str
+    queue_id: str | None
+    queue_name: str | None
+    category_id: str | None
+    category_name: str | None
+    map_full_name: str
+    map_short_name: str
+    map_image_url: str | None
+    average_trueskill: float
+    win_probability: float
+    team0_name: str
+    team1_name: str
+    code: str | None
+    created_at: datetime
+    # By team, then by InProgressGamePlayer id. The ids are random uuids, so
+    # the first player on each team (shown as its captain) is an arbitrary but
+    # stable pick.
+    players: tuple[GamePlayerViewModel, ...]
+
+    def team(self, team: int) -> tuple[GamePlayerViewModel, ...]:
+        return tuple(player for player in self.players if player.team == team)
+
+
+def load_game_view_models(
+    session: SQLAlchemySession, game_ids: list[str]
+) -> dict[str, GameViewModel]:
+    """
+    Load the given in progress games, keyed by id. Ids that don't exist are
+    left out.
+    """
+    if not game_ids:
+        return {}
+    games: list[tuple[InProgressGame, Queue | None, Category | None, Map | None]] = (
+        session.query(InProgressGame, Queue, Category, Map)
+        .outerjoin(Queue, Queue.id == InProgressGame.queue_id)
+        .outerjoin(Category, Category.id == Queue.category_id)
+        .outerjoin(Map, Map.id == InProgressGame.map_id)
+        .filter(InProgressGame.id.in_(game_ids))
+        .all()
+    )
+    player_rows = (
+        session.query(
+            InProgressGamePlayer.in_progress_game_id,
+            InProgressGamePlayer.team,
+            Player.id,
+            Player.name,
+            Player.rated_trueskill_mu,
+            Player.rated_trueskill_sigma,
+            Player.move_enabled,
+            Position.short_name,
+            PlayerCategoryTrueskill.mu,
+            PlayerCategoryTrueskill.sigma,
+        )
+        .join(Player, Player.id == InProgressGamePlayer.player_id)
+        .join(
+            InProgressGame,
+            InProgressGame.id == InProgressGamePlayer.in_progress_game_id,
+        )
+        .outerjoin(Queue, Queue.id == InProgressGame.queue_id)
+        .outerjoin(Position, Position.id == InProgressGamePlayer.position_id)
+        .outerjoin(
+            PlayerCategoryTrueskill,
+            and_(
+                PlayerCategoryTrueskill.player_id == Player.id,
+                PlayerCategoryTrueskill.category_id == Queue.category_id,
+                PlayerCategoryTrueskill.map_id.is_(None),
+                PlayerCategoryTrueskill.position_id.is_(None),
+            ),
+        )
+        .filter(InProgressGamePlayer.in_progress_game_id.in_(game_ids))
+        .order_by(InProgressGamePlayer.team, InProgressGamePlayer.id)
+        .all()
+    )
+    players_by_game_id: dict[str, list[GamePlayerViewModel]] = {}
+    for (
+        game_id,
+        team,
+        player_id,
+        name,
+        mu,
+        sigma,
+        move_enabled,
+        position_name,
+        category_mu,
+        category_sigma,
+    ) in player_rows:
+        players_by_game_id.setdefault(game_id, []).append(
+            GamePlayerViewModel(
+                player_id=player_id,
+                name=name,
+                team=team,
+                position_name=position_name,
+                rated_trueskill_mu=mu,
+                rated_trueskill_sigma=sigma,
+                move_enabled=bool(move_enabled),
+                category_mu=category_mu,
+                category_sigma=category_sigma,
+            )
+        )
+
+    view_models: dict[str, GameViewModel] = {}
+    for game, queue, category, map in games:
+        view_models[game.id] = GameViewModel(
+            id=game.id,
+            queue_id=game.queue_id,
+            queue_name=queue.name if queue else None,
+            category_id=category.id if category else None,
+            category_name=category.name if category else None,
+            map_full_name=game.map_full_name,
+            map_short_name=game.map_short_name,
+            map_image_url=map.image_url if map else None,
+            average_trueskill=game.average_trueskill,
+            win_probability=game.win_probability,
+            team0_name=game.team0_name,
+            team1_name=game.team1_name,
+            code=game.code,
+            created_at=game.created_at,
+            players=tuple(players_by_game_id.get(game.id, [])),
+        )
+    return view_models
+
+
+def load_game_view_model(
+    session: SQLAlchemySession, game_id: str
+) -> GameViewModel | None:
+    return load_game_view_models(session, [game_id]).get(game_id)
+
+
+async def async_load_game_view_model(
+    session: AsyncSession, game_id: str
+) -> GameViewModel | None:
+    """
+    Async version of load_game_view_model. Sees the session's pending changes,
+    e.g. a game that isn't committed yet.
+    """
+    return await session.run_sync(load_game_view_model, game_id)
@@ -0,0 +1,193 @@
+# In-memory materialized leaderboard. Built once from the database and then
+# kept up to date as games finish, so rendering the leaderboard never has to
+# run the 30 day aggregate or look players up one at a time.
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sortedcontainers import SortedKeyList, SortedList
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+from discord_bots.models import (
+    FinishedGame,
+    FinishedGamePlayer,
+    Player,
+    PlayerCategoryTrueskill,
+)
+
+_log = logging.getLogger(__name__)
+
+LEADERBOARD_WINDOW = timedelta(days=30)
+
+
+@dataclass
+class LeaderboardEntry:
+    pct_id: str
+    player_id: int
+    category_id: str
+    rank: float
+    mu: float
+    sigma: float
+
+
+@dataclass
+class LeaderboardPlayer:
+    name: str
+    leaderboard_enabled: bool
+
+
+class Leaderboard:
+    """
+    Rank ordered PlayerCategoryTrueskill entries per category, plus the start
+    times of each player's games per category over the rolling window used
+    for the min_games_for_leaderboard requirement.
+
+    Anything that changes ratings outside of finishing a game (resets, decay,
+    setmu, category edits, game edits) should call invalidate(), which causes
+    a full rebuild the next time the leaderboard is read.
+    """
+
+    def __init__(self):
+        self._entries_by_category: dict[str, SortedKeyList] = {}
+        self._entries_by_pct_id: dict[str, LeaderboardEntry] = {}
+        # category name -> player id -> game start times
+        self._games_by_category: dict[str, dict[int, SortedList]] = {}
+        self._players: dict[int, LeaderboardPlayer] = {}
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def invalidate(self):
+        self._loaded = False
+
+    def load(self, session: SQLAlchemySession):
+        self._entries_by_category = {}
+        self._entries_by_pct_id = {}
+        self._games_by_category = {}
+        self._players = {}
+
+        for player_id, name, leaderboard_enabled in session.query(
+            Player.id, Player.name, Player.leaderboard_enabled
+        ):
+            self._players[player_id] = LeaderboardPlayer(
+                name=name, leaderboard_enabled=bool(leaderboard_enabled)
+            )
+
+        pct: PlayerCategoryTrueskill
+        for pct in session.query(PlayerCategoryTrueskill):
+            self._upsert_entry(pct)
+
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - LEADERBOARD_WINDOW
+        for player_id, category_name, started_at in (
+            session.query(
+                FinishedGamePlayer.player_id,
+                FinishedGame.category_name,
+                FinishedGame.started_at,
+            )
+            .join(FinishedGame, FinishedGame.id == FinishedGamePlayer.finished_game_id)
+            .filter(FinishedGame.started_at > cutoff)
+            .filter(FinishedGame.category_name != None)
+        ):
+            self._add_game(category_name, player_id, started_at)
+
+        self._loaded = True
+        _log.info(
+            f"[Leaderboard.load] Loaded {len(self._entries_by_pct_id)} entries across {len(self._entries_by_category)} categories"
+        )
+
+    def ensure_loaded(self, session: SQLAlchemySession):
+        if not self._loaded:
+            self.load(session)
+
+    def record_game(
+        self,
+        category_name: str | None,
+        started_at: datetime,
+        players: list[Player],
+        pcts: list[PlayerCategoryTrueskill],
+    ):
+        """
+        Apply the result of a finished game. Call this after the rating changes
+        have been committed.
+        """
+        if not self._loaded:
+            # The next read rebuilds everything from the database anyway
+            return
+        for player in players:
+            self.update_player(player.id, player.name, player.leaderboard_enabled)
+            if category_name:
+                self._add_game(category_name, player.id, started_at)
+        for pct in pcts:
+            self._upsert_entry(pct)
+
+    def update_player(self, player_id: int, name: str, leaderboard_enabled: bool):
+        self._players[player_id] = LeaderboardPlayer(
+            name=name, leaderboard_enabled=bool(leaderboard_enabled)
+        )
+
+    def top(
+        self,
+        category_id: str,
+        category_name: str,
+        min_games: int,
+        limit: int = 10,
+        now: datetime | None = None,
+    ) -> list[tuple[LeaderboardEntry, LeaderboardPlayer]]:
+        entries: SortedKeyList | None = self._entries_by_category.get(category_id)
+        if not entries:
+            return []
+        if now is None:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+        cutoff = now - LEADERBOARD_WINDOW
+        games_by_player = self._games_by_category.get(category_name, {})
+
+        result: list[tuple[LeaderboardEntry, LeaderboardPlayer]] = []
+        entry: LeaderboardEntry
+        for entry in entries:
+            player = self._players.get(entry.player_id)
+            if not player or not player.leaderboard_enabled:
+                continue
+            # Players always need at least one game in the window to show up
+            games = games_by_player.get(entry.player_id)
+            if not games:
+                continue
+            # Drop games that have aged out of the window
+            del games[: games.bisect_right(cutoff)]
+            if len(games) < max(min_games, 1):
+                continue
+            result.append((entry, player))
+            if len(result) >= limit:
+                break
+        return result
+
+    def _upsert_entry(self, pct: PlayerCategoryTrueskill):
+        existing = self._entries_by_pct_id.get(pct.id)
+        if existing:
+            self._entries_by_category[existing.category_id].remove(existing)
+        entry = LeaderboardEntry(
+            pct_id=pct.id,
+            player_id=pct.player_id,
+            category_id=pct.category_id,
+            rank=pct.rank,
+            mu=pct.mu,
+            sigma=pct.sigma,
+        )
+        self._entries_by_pct_id[pct.id] = entry
+        if pct.category_id not in self._entries_by_category:
+            self._entries_by_category[pct.category_id] = SortedKeyList(
+                key=lambda e: (-e.rank, e.pct_id)
+            )
+        self._entries_by_category[pct.category_id].add(entry)
+
+    def _add_game(self, category_name: str, player_id: int, started_at: datetime):
+        if started_at.tzinfo is not None:
+            started_at = started_at.astimezone(timezone.utc).replace(tzinfo=None)
+        games_by_player = self._games_by_category.setdefault(category_name, {})
+        if player_id not in games_by_player:
+            games_by_player[player_id] = SortedList()
+        games_by_player[player_id].add(started_at)
+
+
+leaderboard = Leaderboard()
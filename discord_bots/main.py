@@ -6,17 +6,20 @@ from datetime import datetime, timezone
 import discord
 from discord import Colour, Embed, Interaction, Member, Message, Reaction
 from discord.abc import User
-from discord.app_commands import AppCommandError, errors
+from discord.app_commands import AppCommandError, Command, ContextMenu, errors
 from discord.ext.commands import CommandError, CommandNotFound, Context, UserInputError
 from trueskill import setup as trueskill_setup
 
 import discord_bots.config as config
+from discord_bots.activity import activity_tracker
+from discord_bots.archive import MIN_ARCHIVE_AFTER_DAYS
 from discord_bots.async_db_utils import (
     async_delete_by_id,
     async_query_first,
     async_session,
 )
 from discord_bots.cogs.admin import AdminCommands
+from discord_bots.cogs.archive import ArchiveCommands
 from discord_bots.cogs.category import CategoryCommands
 from discord_bots.cogs.common import CommonCommands
 from discord_bots.cogs.config import ConfigCommands
@@ -35,6 +38,10 @@ from discord_bots.cogs.rotation import RotationCommands
 from discord_bots.cogs.schedule import ScheduleCommands, ScheduleUtils
 from discord_bots.cogs.trueskill import TrueskillCommands
 from discord_bots.cogs.vote import VoteCommands
+from discord_bots.db_executor import db
+from discord_bots.percentiles import percentile_index
+from discord_bots.query_stats import finish_run, start_run
+from discord_bots.table_cache import table_cache
 from discord_bots.utils import utc_now_naive
 
 from .bot import bot
@@ -48,14 +55,17 @@ from .models import (
     Session,
 )
 from .tasks import (
+    activity_flush_task,
     add_player_task,
     afk_timer_task,
+    archive_task,
     leaderboard_task,
     map_rotation_task,
     prediction_task,
     queue_waitlist_task,
     schedule_task,
     sigma_decay_task,
+    table_cache_task,
     vote_passed_waitlist_task,
 )
 
@@ -93,10 +103,24 @@ async def on_ready():
     _log.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
 
 
+def finish_interaction_run(interaction: Interaction):
+    run = interaction.extras.pop("query_run", None)
+    if run:
+        finish_run(run)
+
+
+@bot.event
+async def on_app_command_completion(
+    interaction: Interaction, command: Command | ContextMenu
+):
+    finish_interaction_run(interaction)
+
+
 @bot.tree.error
 async def on_app_command_error(
     interaction: Interaction, error: AppCommandError
 ) -> None:
+    finish_interaction_run(interaction)
     # TODO: provide more context about the error to the user
     if isinstance(error, errors.CheckFailure):
         return
@@ -186,24 +210,10 @@ async def on_message(message: Message):
     if (config.CHANNEL_ID and message.channel.id == config.CHANNEL_ID) or (
         config.LEADERBOARD_CHANNEL and message.channel.id == config.LEADERBOARD_CHANNEL
     ):
-        async with async_session() as session:
-            player: Player | None = await async_query_first(
-                session, Player, Player.id == message.author.id
-            )
-            if player:
-                player.last_activity_at = utc_now_naive()
-                if player.name != message.author.display_name:
-                    player.name = message.author.display_name
-            else:
-                session.add(
-                    Player(
-                        id=message.author.id,
-                        name=message.author.display_name,
-                        last_activity_at=utc_now_naive(),
-                        currency=config.STARTING_CURRENCY,
-                    )
-                )
-            await session.commit()
+        activity_tracker.record(message.author.id, message.author.display_name)
+        if not activity_tracker.is_known(message.author.id):
+            # Commands need the player to exist
+            await activity_tracker.flush()
         try:
             await bot.process_commands(message)
         except Exception as e:
@@ -214,24 +224,7 @@ async def on_message(message: Message):
 
 @bot.event
 async def on_reaction_add(reaction: Reaction, user: User | Member):
-    async with async_session() as session:
-        player: Player | None = await async_query_first(
-            session, Player, Player.id == user.id
-        )
-        if player:
-            player.last_activity_at = utc_now_naive()
-            player.name = user.display_name
-            await session.commit()
-        else:
-            session.add(
-                Player(
-                    id=user.id,
-                    name=user.display_name,
-                    last_activity_at=utc_now_naive(),
-                    currency=config.STARTING_CURRENCY,
-                )
-            )
-            await session.commit()
+    activity_tracker.record(user.id, user.display_name)
 
 @bot.event
 async def on_member_join(member: Member):
@@ -261,6 +254,7 @@ async def on_member_remove(member: Member):
 
 @bot.before_invoke
 async def before_invoke(context: Context):
+    context.query_run = start_run(f"{context.prefix}{context.command.qualified_name}")
     session = Session()
     context.session = session
     if AsyncSessionLocal:
@@ -272,6 +266,7 @@ async def after_invoke(context: Context):
     context.session.close()
     if context.asyncSession:
         await context.asyncSession.close()
+    finish_run(context.query_run)
 
 
 async def init_config():
@@ -286,7 +281,10 @@ async def init_config():
 
 
 async def setup():
+    # Load the cached tables up front, so commands and tasks never have to
+    await db.read(table_cache.refresh)
     await bot.add_cog(AdminCommands(bot))
+    await bot.add_cog(ArchiveCommands(bot))
     await bot.add_cog(CategoryCommands(bot))
     await bot.add_cog(CommonCommands(bot))
     await bot.add_cog(EconomyCommands(bot))
@@ -305,8 +303,15 @@ async def setup():
     await bot.add_cog(VoteCommands(bot))
     await bot.add_cog(NotificationCommands(bot))
     await bot.add_cog(ConfigCommands(bot))
+    activity_flush_task.start()
     add_player_task.start()
     afk_timer_task.start()
+    if config.ARCHIVE_AFTER_DAYS >= MIN_ARCHIVE_AFTER_DAYS:
+        archive_task.start()
+    elif config.ARCHIVE_AFTER_DAYS > 0:
+        _log.error(
+            f"[setup] ARCHIVE_AFTER_DAYS must be at least {MIN_ARCHIVE_AFTER_DAYS}, the leaderboard window, was {config.ARCHIVE_AFTER_DAYS}. Not archiving."
+        )
     leaderboard_task.start()
     map_rotation_task.start()
     queue_waitlist_task.start()
@@ -316,6 +321,7 @@ async def setup():
     if config.ECONOMY_ENABLED:
         prediction_task.start()
     sigma_decay_task.start()
+    table_cache_task.start()
     await init_config()
     async with async_session() as session:
         db_config = await async_query_first(session, Config)
@@ -325,6 +331,8 @@ async def setup():
                 sigma=db_config.default_trueskill_sigma,
                 tau=db_config.default_trueskill_tau,
             )
+    with Session() as session:
+        percentile_index.load(session)
 
 
 async def main():
@@ -0,0 +1,143 @@
+# Per map win/loss/tie queries for /map stats and /map globalstats. The counts
+# are grouped by map in SQL so that neither command has to load every game.
+from dataclasses import dataclass
+
+from sqlalchemy import case, func
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+from discord_bots.models import FinishedGame, FinishedGameSummary, Map, PlayerStatsDaily
+from discord_bots.utils import win_rate
+
+
+@dataclass
+class PlayerMapStats:
+    map_full_name: str
+    wins: int
+    losses: int
+    ties: int
+
+    @property
+    def total(self) -> int:
+        return self.wins + self.losses + self.ties
+
+    @property
+    def win_rate(self) -> float:
+        return win_rate(self.wins, self.losses, self.ties)
+
+    def table_row(self) -> list:
+        return [
+            self.map_full_name,
+            f"{self.wins}",
+            f"{self.losses}",
+            f"{self.ties}",
+            self.total,
+            f"{self.win_rate}%",
+        ]
+
+
+@dataclass
+class GlobalMapStats:
+    map_full_name: str
+    team0_wins: int
+    team1_wins: int
+    ties: int
+
+    @property
+    def total(self) -> int:
+        return self.team0_wins + self.team1_wins + self.ties
+
+    def table_row(self) -> list:
+        return [
+            self.map_full_name,
+            self.team0_wins,
+            f"{win_rate(self.team0_wins, self.team1_wins, self.ties)}%",
+            self.team1_wins,
+            f"{win_rate(self.team1_wins, self.team0_wins, self.ties)}%",
+            self.ties,
+            self.total,
+        ]
+
+
+def player_map_stats(
+    session: SQLAlchemySession,
+    player_id: int,
+    category_name: str | None = None,
+    map_full_names: list[str] | None = None,
+) -> list[PlayerMapStats]:
+    """
+    A player's wins, losses and ties on each map they have played, sorted by
+    win rate in descending order. Optionally limited to a category and/or a
+    set of maps.
+    """
+    conditions = [
+        PlayerStatsDaily.player_id == player_id,
+        PlayerStatsDaily.map_full_name.is_not(None),
+    ]
+    if category_name:
+        conditions.append(PlayerStatsDaily.category_name == category_name)
+    if map_full_names is not None:
+        conditions.append(PlayerStatsDaily.map_full_name.in_(map_full_names))
+    rows = (
+        session.query(
+            PlayerStatsDaily.map_full_name,
+            func.coalesce(func.sum(PlayerStatsDaily.wins), 0),
+            func.coalesce(func.sum(PlayerStatsDaily.losses), 0),
+            func.coalesce(func.sum(PlayerStatsDaily.ties), 0),
+        )
+        .filter(*conditions)
+        .group_by(PlayerStatsDaily.map_full_name)
+        .all()
+    )
+    stats = [
+        PlayerMapStats(map_full_name, int(wins), int(losses), int(ties))
+        for map_full_name, wins, losses, ties in rows
+    ]
+    stats = [stat for stat in stats if stat.total > 0]
+    stats.sort(key=lambda stat: stat.win_rate, reverse=True)
+    return stats
+
+
+def global_map_stats(
+    session: SQLAlchemySession, category_name: str | None = None
+) -> list[GlobalMapStats]:
+    """
+    Team 0 wins, team 1 wins and ties on every map that has been played,
+    sorted by map name. Games on maps that have since been removed are left out.
+    Archived games are counted through FinishedGameSummary.
+    """
+    conditions = []
+    summary_conditions = []
+    if category_name:
+        conditions.append(FinishedGame.category_name == category_name)
+        summary_conditions.append(FinishedGameSummary.category_name == category_name)
+    rows = (
+        session.query(
+            FinishedGame.map_full_name,
+            func.sum(case((FinishedGame.winning_team == 0, 1), else_=0)),
+            func.sum(case((FinishedGame.winning_team == 1, 1), else_=0)),
+            func.sum(case((FinishedGame.winning_team == -1, 1), else_=0)),
+        )
+        .join(Map, Map.full_name == FinishedGame.map_full_name)
+        .filter(*conditions)
+        .group_by(FinishedGame.map_full_name)
+        .all()
+    )
+    summary_rows = (
+        session.query(
+            FinishedGameSummary.map_full_name,
+            func.sum(FinishedGameSummary.team0_wins),
+            func.sum(FinishedGameSummary.team1_wins),
+            func.sum(FinishedGameSummary.ties),
+        )
+        .join(Map, Map.full_name == FinishedGameSummary.map_full_name)
+        .filter(*summary_conditions)
+        .group_by(FinishedGameSummary.map_full_name)
+        .all()
+    )
+    stats: dict[str, GlobalMapStats] = {}
+    for map_full_name, team0_wins, team1_wins, ties in rows + summary_rows:
+        stat = stats.setdefault(map_full_name, GlobalMapStats(map_full_name, 0, 0, 0))
+        stat.team0_wins += int(team0_wins)
+        stat.team1_wins += int(team1_wins)
+        stat.ties += int(ties)
+    return [stat for _, stat in sorted(stats.items()) if stat.total > 0]
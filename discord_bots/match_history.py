@@ -0,0 +1,308 @@
+# Columnar export of the finished game history for the analytics scripts in
+# /scripts. Games and their players are streamed out of the database in
+# chunks and written as one Parquet file per chunk, so later exports only
+# append the games that finished since the last run. Scripts read the export
+# with pandas instead of querying the live database. Archived games (see archive.py) are
+# read from the archive tables too, so archiving doesn't change the export.
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Iterator
+
+import pandas as pd
+from sqlalchemy import ColumnElement, Select, Table, and_, or_, select, union_all
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+from discord_bots.models import (
+    FinishedGame,
+    FinishedGamePlayer,
+    archived_finished_game,
+    archived_finished_game_player,
+)
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_DIR = "match_history"
+MANIFEST_FILE = "manifest.json"
+
+GAME_COLUMNS = [
+    "id",
+    "game_id",
+    "queue_name",
+    "category_name",
+    "map_full_name",
+    "map_short_name",
+    "is_rated",
+    "started_at",
+    "finished_at",
+    "winning_team",
+    "win_probability",
+    "average_trueskill",
+    "team0_name",
+    "team1_name",
+]
+# Export name -> finished_game_player column, finished_at is added from the game
+PLAYER_COLUMNS = {
+    "finished_game_id": "finished_game_id",
+    "player_id": "player_id",
+    "player_name": "player_name",
+    "team": "team",
+    "position_name": "position_name",
+    "mu_before": "rated_trueskill_mu_before",
+    "sigma_before": "rated_trueskill_sigma_before",
+    "mu_after": "rated_trueskill_mu_after",
+    "sigma_after": "rated_trueskill_sigma_after",
+}
+PLAYER_EXPORT_COLUMNS = [
+    "finished_game_id",
+    "finished_at",
+    "player_id",
+    "player_name",
+    "team",
+    "position_name",
+    "mu_before",
+    "sigma_before",
+    "mu_after",
+    "sigma_after",
+]
+
+
+def _game_rows(finished_games: Table) -> Select:
+    return select(*[finished_games.c[name] for name in GAME_COLUMNS])
+
+
+def _player_rows(finished_games: Table, finished_game_players: Table) -> Select:
+    return select(
+        *[
+            finished_game_players.c[column].label(name)
+            for name, column in PLAYER_COLUMNS.items()
+        ],
+        finished_games.c.finished_at,
+    ).join(
+        finished_games,
+        finished_games.c.id == finished_game_players.c.finished_game_id,
+    )
+
+
+# The live and the archived history as one
+_games = union_all(
+    _game_rows(FinishedGame.__table__), _game_rows(archived_finished_game)
+).subquery("games")
+_players = union_all(
+    _player_rows(FinishedGame.__table__, FinishedGamePlayer.__table__),
+    _player_rows(archived_finished_game, archived_finished_game_player),
+).subquery("players")
+
+
+# Low cardinality strings are stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    "queue_name",
+    "category_name",
+    "map_full_name",
+    "map_short_name",
+    "team0_name",
+    "team1_name",
+    "position_name",
+    "player_name",
+]
+
+
+def _read_manifest(export_dir: str) -> dict:
+    path = os.path.join(export_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"generation": None, "chunks": 0, "finished_at": None, "id": None}
+    with open(path) as f:
+        manifest = json.load(f)
+    # Written before generations were added
+    manifest.setdefault("generation", None)
+    return manifest
+
+
+def _write_manifest(export_dir: str, manifest: dict):
+    path = os.path.join(export_dir, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def _write_chunk(df: pd.DataFrame, export_dir: str, name: str, chunk: int):
+    df.to_parquet(os.path.join(export_dir, f"{name}-{chunk:06d}.parquet"))
+
+
+def _chunk_paths(export_dir: str, name: str) -> list[str]:
+    return [
+        os.path.join(export_dir, file_name)
+        for file_name in sorted(os.listdir(export_dir))
+        if file_name.startswith(f"{name}-") and file_name.endswith(".parquet")
+    ]
+
+
+def _read_chunks(export_dir: str, name: str) -> pd.DataFrame:
+    frames = [pd.read_parquet(path) for path in _chunk_paths(export_dir, name)]
+    if not frames:
+        return pd.DataFrame()
+    # Categories differ between chunks, so concat as objects and compact again
+    return _compact(
+        pd.concat(
+            [
+                frame.astype({c: object for c in frame.select_dtypes("category")})
+                for frame in frames
+            ],
+            ignore_index=True,
+        )
+    )
+
+
+def _after(
+    finished_at: ColumnElement,
+    id: ColumnElement,
+    cursor_finished_at: datetime,
+    cursor_id: str,
+):
+    return or_(
+        finished_at > cursor_finished_at,
+        and_(finished_at == cursor_finished_at, id > cursor_id),
+    )
+
+
+def _through(
+    finished_at: ColumnElement,
+    id: ColumnElement,
+    cursor_finished_at: datetime,
+    cursor_id: str,
+):
+    return or_(
+        finished_at < cursor_finished_at,
+        and_(finished_at == cursor_finished_at, id <= cursor_id),
+    )
+
+
+def export_match_history(
+    session: SQLAlchemySession,
+    export_dir: str = DEFAULT_EXPORT_DIR,
+    chunk_size: int = 5000,
+    full: bool = False,
+) -> int:
+    """
+    Append the games that finished since the last export, oldest first, and
+    return how many were written. Edits made to games that were already
+    exported (e.g. /admin editgamewinner) are only picked up with full=True,
+    which rebuilds the export from scratch under a new generation id.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    if full:
+        for file_name in os.listdir(export_dir):
+            if file_name.startswith(("games-", "players-", MANIFEST_FILE)):
+                os.remove(os.path.join(export_dir, file_name))
+    manifest = _read_manifest(export_dir)
+    # A new export starts a new generation, so readers that keep state derived
+    # from the chunks (see synergy.py) know to start over
+    if manifest["generation"] is None:
+        manifest["generation"] = uuid.uuid4().hex
+        _write_manifest(export_dir, manifest)
+    cursor: tuple[datetime, str] | None = None
+    if manifest["finished_at"]:
+        cursor = (datetime.fromisoformat(manifest["finished_at"]), manifest["id"])
+
+    exported = 0
+    while True:
+        games_query = select(*[_games.c[name] for name in GAME_COLUMNS])
+        if cursor:
+            games_query = games_query.where(
+                _after(_games.c.finished_at, _games.c.id, *cursor)
+            )
+        games_query = games_query.order_by(
+            _games.c.finished_at.asc(), _games.c.id.asc()
+        ).limit(chunk_size)
+        games = pd.DataFrame.from_records(
+            session.execute(games_query).all(), columns=GAME_COLUMNS
+        )
+        if games.empty:
+            break
+        last_game = games.iloc[-1]
+        chunk_end = (last_game["finished_at"].to_pydatetime(), last_game["id"])
+
+        # The chunk is a contiguous range of (finished_at, id), so select its
+        # players by range instead of a list of ids
+        players_query = select(*[_players.c[name] for name in PLAYER_EXPORT_COLUMNS])
+        if cursor:
+            players_query = players_query.where(
+                _after(_players.c.finished_at, _players.c.finished_game_id, *cursor)
+            )
+        players_query = players_query.where(
+            _through(_players.c.finished_at, _players.c.finished_game_id, *chunk_end)
+        )
+        players = pd.DataFrame.from_records(
+            session.execute(players_query).all(), columns=PLAYER_EXPORT_COLUMNS
+        )
+
+        chunk = manifest["chunks"] + 1
+        _write_chunk(_compact(games), export_dir, "games", chunk)
+        _write_chunk(_compact(players), export_dir, "players", chunk)
+        manifest = {
+            "generation": manifest["generation"],
+            "chunks": chunk,
+            "finished_at": chunk_end[0].isoformat(),
+            "id": chunk_end[1],
+        }
+        _write_manifest(export_dir, manifest)
+        cursor = chunk_end
+        exported += len(games)
+        _log.info(
+            f"[export_match_history] Wrote chunk {chunk} with {len(games)} games through {chunk_end[0]}"
+        )
+        if len(games) < chunk_size:
+            break
+    return exported
+
+
+def load_games(export_dir: str = DEFAULT_EXPORT_DIR) -> pd.DataFrame:
+    """
+    One row per finished game, sorted by finished_at
+    """
+    return _read_chunks(export_dir, "games")
+
+
+def load_players(export_dir: str = DEFAULT_EXPORT_DIR) -> pd.DataFrame:
+    """
+    One row per player per finished game, joined to the game by
+    finished_game_id. finished_at is copied from the game for convenience.
+    """
+    return _read_chunks(export_dir, "players")
+
+
+def iter_chunks(
+    export_dir: str = DEFAULT_EXPORT_DIR, start: int = 0
+) -> Iterator[tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Yield (games, players) one chunk at a time, oldest first, so that the
+    whole history never has to be in memory at once. Chunks are only ever
+    appended, so start skips the chunks that a caller has already seen.
+    """
+    for games_path, players_path in zip(
+        _chunk_paths(export_dir, "games")[start:],
+        _chunk_paths(export_dir, "players")[start:],
+    ):
+        yield pd.read_parquet(games_path), pd.read_parquet(players_path)
+
+
+def chunk_count(export_dir: str = DEFAULT_EXPORT_DIR) -> int:
+    return _read_manifest(export_dir)["chunks"]
+
+
+def export_generation(export_dir: str = DEFAULT_EXPORT_DIR) -> str | None:
+    """
+    Id of the current export. Chunks are only appended within a generation,
+    rebuilding the export with full=True starts a new one.
+    """
+    return _read_manifest(export_dir)["generation"]
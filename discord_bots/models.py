@@ -1,17 +1,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from uuid import uuid4
 
 from sqlalchemy import (
     BigInteger,
     Boolean,
     Column,
+    Date,
     DateTime,
     Float,
+    Index,
     Integer,
     String,
+    Table,
     Time,
     UniqueConstraint,
     create_engine,
@@ -34,7 +37,9 @@ import discord_bots.config as config
 
 # It may be tempting, but do not set check_same_thread=False here. Sqlite
 # doesn't handle concurrency well and writing to the db on different threads
-# could cause file corruption. Use tasks to ensure that writes happen on the main thread.
+# could cause file corruption. Use tasks to ensure that writes happen on the main thread,
+# or DBExecutor.write (see db_executor.py), which queues them for one writer that
+# commits them in batches, as the activity flush and the AFK sweep do.
 if config.DATABASE_URI:
     db_url = config.DATABASE_URI
 else:
@@ -51,6 +56,7 @@ if db_url.startswith("postgresql://"):
     async_engine = create_async_engine(
         async_db_url, echo=False, pool_size=40, max_overflow=50
     )
+    read_engine = engine
 else:
     # SQLite configuration - support both sync and async
     engine = create_engine(db_url, echo=False, connect_args={"timeout": 15})
@@ -61,6 +67,48 @@ else:
     async_engine = create_async_engine(
         async_db_url, echo=False, connect_args={"timeout": 15}
     )
+
+    def _set_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers keep reading while a write is in progress. It is
+        # stored in the database file, so writers set it once for everyone.
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        # Only fsync at checkpoints. A power loss can lose the last commits,
+        # but never corrupts the database in WAL mode.
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+        # Negative values are in KiB
+        cursor.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_MB * 1024}")
+        cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _on_async_connect(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection)
+
+    # Read only connections for queries that never write (stats, status), see
+    # db_executor.py. In WAL mode they never wait on the writer.
+    if engine.url.database and engine.url.database != ":memory:":
+        read_engine = create_engine(
+            f"sqlite:///file:{engine.url.database}?mode=ro&uri=true",
+            echo=False,
+            connect_args={"timeout": 15},
+        )
+
+        @event.listens_for(read_engine, "connect")
+        def _on_read_connect(dbapi_connection, connection_record):
+            _set_sqlite_pragmas(dbapi_connection, read_only=True)
+
+    else:
+        read_engine = engine
 naming_convention = {
     "ix": "ix_%(column_0_label)s",
     "uq": "uq_%(table_name)s_%(column_0_name)s",
@@ -95,6 +143,26 @@ class AdminRole:
     )
 
 
+@mapper_registry.mapped
+@dataclass
+class CacheVersion:
+    """
+    Bumped whenever a table kept in the table cache changes, so that every
+    process knows to reload it. See table_cache.py
+
+    :name: The table name
+    """
+
+    __sa_dataclass_metadata_key__ = "sa"
+    __tablename__ = "cache_version"
+
+    name: str = field(metadata={"sa": Column(String, primary_key=True)})
+    version: int = field(
+        default=0,
+        metadata={"sa": Column(Integer, nullable=False, server_default=text("0"))},
+    )
+
+
 @mapper_registry.mapped
 @dataclass
 class Category:
@@ -525,6 +593,21 @@ class EconomyTransaction:
 class FinishedGame:
     __sa_dataclass_metadata_key__ = "sa"
     __tablename__ = "finished_game"
+    __table_args__ = (
+        # Keyset pagination for /game history, optionally filtered
+        Index("ix_finished_game_finished_at_id", "finished_at", "id"),
+        Index("ix_finished_game_queue_name_finished_at", "queue_name", "finished_at"),
+        Index(
+            "ix_finished_game_category_name_finished_at",
+            "category_name",
+            "finished_at",
+        ),
+        Index(
+            "ix_finished_game_map_full_name_finished_at",
+            "map_full_name",
+            "finished_at",
+        ),
+    )
 
     average_trueskill: float = field(metadata={"sa": Column(Float, nullable=False)})
     game_id: str = field(metadata={"sa": Column(String, index=True, nullable=False)})
@@ -563,16 +646,31 @@ class FinishedGame:
         default_factory=lambda: str(uuid4()),
         metadata={"sa": Column(String, primary_key=True)},
     )
+    # The game_id as shown to players, see utils.short_uuid. Not unique.
+    short_id: str = field(
+        init=False,
+        metadata={"sa": Column(String, index=True, nullable=False)},
+    )
 
     transactions = relationship("EconomyTransaction", back_populates="finished_game")
     prediction = relationship("EconomyPrediction", back_populates="finished_game")
 
+    def __post_init__(self):
+        self.short_id = self.game_id.split("-")[0]
+
 
 @mapper_registry.mapped
 @dataclass
 class FinishedGamePlayer:
     __sa_dataclass_metadata_key__ = "sa"
     __tablename__ = "finished_game_player"
+    __table_args__ = (
+        Index(
+            "ix_finished_game_player_player_id_finished_game_id",
+            "player_id",
+            "finished_game_id",
+        ),
+    )
 
     finished_game_id: str = field(
         metadata={
@@ -677,10 +775,18 @@ class InProgressGame:
         default_factory=lambda: str(uuid4()),
         metadata={"sa": Column(String, primary_key=True)},
     )
+    # The id as shown to players, see utils.short_uuid. Not unique.
+    short_id: str = field(
+        init=False,
+        metadata={"sa": Column(String, index=True, nullable=False)},
+    )
 
     transactions = relationship("EconomyTransaction", back_populates="in_progress_game")
     prediction = relationship("EconomyPrediction", back_populates="in_progress_game")
 
+    def __post_init__(self):
+        self.short_id = self.id.split("-")[0]
+
 
 @mapper_registry.mapped
 @dataclass
@@ -727,6 +833,9 @@ class InProgressGamePlayer:
 class InProgressGameChannel:
     """
     A channel created for a game, intended for temporary voice channels
+
+    :team: The team a voice channel belongs to, None for other channels (e.g.
+    the match text channel)
     """
 
     __sa_dataclass_metadata_key__ = "sa"
@@ -745,6 +854,52 @@ class InProgressGameChannel:
     channel_id: int = field(
         metadata={"sa": Column(BigInteger, nullable=False)},
     )
+    team: int | None = field(
+        default=None,
+        metadata={"sa": Column(Integer, nullable=True)},
+    )
+    id: str = field(
+        init=False,
+        default_factory=lambda: str(uuid4()),
+        metadata={"sa": Column(String, primary_key=True)},
+    )
+
+
+@mapper_registry.mapped
+@dataclass
+class LeaderboardMessage:
+    """
+    A page of the leaderboard that has been posted to a channel
+
+    :page: Zero based position of the message in the leaderboard
+    :message_id: Discord id of the message, edited in place on every refresh
+    :content_hash: Hash of the last posted content, used to skip unchanged pages
+    """
+
+    __sa_dataclass_metadata_key__ = "sa"
+    __tablename__ = "leaderboard_message"
+    __table_args__ = (UniqueConstraint("channel_id", "page"),)
+
+    channel_id: int = field(
+        metadata={"sa": Column(BigInteger, nullable=False, index=True)},
+    )
+    page: int = field(metadata={"sa": Column(Integer, nullable=False)})
+    message_id: int = field(
+        metadata={"sa": Column(BigInteger, nullable=False, unique=True)},
+    )
+    content_hash: str | None = field(
+        default=None,
+        metadata={"sa": Column(String, nullable=True)},
+    )
+    updated_at: datetime = field(
+        default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        init=False,
+        metadata={
+            "sa": Column(
+                DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+            )
+        },
+    )
     id: str = field(
         init=False,
         default_factory=lambda: str(uuid4()),
@@ -982,6 +1137,24 @@ class PlayerCategoryTrueskill:
 
     __sa_dataclass_metadata_key__ = "sa"
     __tablename__ = "player_category_trueskill"
+    __table_args__ = (
+        # get_category_trueskill(s)
+        Index(
+            "ix_player_category_trueskill_lookup",
+            "player_id",
+            "category_id",
+            "position_id",
+            "map_id",
+        ),
+        # The overall rating of a player in a category
+        Index(
+            "ix_player_category_trueskill_overall",
+            "player_id",
+            "category_id",
+            sqlite_where=text("position_id IS NULL AND map_id IS NULL"),
+            postgresql_where=text("position_id IS NULL AND map_id IS NULL"),
+        ),
+    )
 
     player_id: int = field(
         metadata={
@@ -1035,6 +1208,98 @@ class PlayerCategoryTrueskill:
     )
 
 
+@mapper_registry.mapped
+@dataclass
+class PlayerStatsDaily:
+    """
+    Wins, losses and ties per player per day, kept up to date as games are
+    finished, edited and deleted. Rolling windows (7 days, 30 days, ...) are
+    summed from the daily buckets instead of recounting every finished game.
+    Names are used instead of ids to match how FinishedGame stores them.
+    """
+
+    __sa_dataclass_metadata_key__ = "sa"
+    __tablename__ = "player_stats_daily"
+    __table_args__ = (
+        UniqueConstraint(
+            "player_id", "category_name", "map_full_name", "position_name", "day"
+        ),
+    )
+
+    player_id: int = field(
+        metadata={
+            "sa": Column(
+                BigInteger, ForeignKey("player.id"), nullable=False, index=True
+            )
+        },
+    )
+    category_name: str | None = field(
+        metadata={"sa": Column(String, nullable=True)},
+    )
+    map_full_name: str | None = field(
+        metadata={"sa": Column(String, nullable=True)},
+    )
+    position_name: str | None = field(
+        metadata={"sa": Column(String, nullable=True)},
+    )
+    day: date = field(metadata={"sa": Column(Date, nullable=False, index=True)})
+    wins: int = field(
+        default=0,
+        metadata={"sa": Column(Integer, nullable=False, server_default=text("0"))},
+    )
+    losses: int = field(
+        default=0,
+        metadata={"sa": Column(Integer, nullable=False, server_default=text("0"))},
+    )
+    ties: int = field(
+        default=0,
+        metadata={"sa": Column(Integer, nullable=False, server_default=text("0"))},
+    )
+    id: str = field(
+        init=False,
+        default_factory=lambda: str(uuid4()),
+        metadata={"sa": Column(String, primary_key=True)},
+    )
+
+
+@mapper_registry.mapped
+@dataclass
+class FinishedGameSummary:
+    """
+    Totals of the finished games that have been moved to the archive, per
+    category and map (see archive.py). Stats that count finished games add
+    these to what is still in finished_game, so archiving doesn't change them.
+    """
+
+    __sa_dataclass_metadata_key__ = "sa"
+    __tablename__ = "finished_game_summary"
+    __table_args__ = (UniqueConstraint("category_name", "map_full_name"),)
+
+    category_name: str | None = field(
+        metadata={"sa": Column(String, nullable=True)},
+    )
+    map_full_name: str | None = field(
+        metadata={"sa": Column(String, nullable=True)},
+    )
+    team0_wins: int = field(
+        default=0,
+        metadata={"sa": Column(Integer, nullable=False, server_default=text("0"))},
+    )
+    team1_wins: int = field(
+        default=0,
+        metadata={"sa": Column(Integer, nullable=False, server_default=text("0"))},
+    )
+    ties: int = field(
+        default=0,
+        metadata={"sa": Column(Integer, nullable=False, server_default=text("0"))},
+    )
+    id: str = field(
+        init=False,
+        default_factory=lambda: str(uuid4()),
+        metadata={"sa": Column(String, primary_key=True)},
+    )
+
+
 @mapper_registry.mapped
 @dataclass
 class Position:
@@ -1217,7 +1482,11 @@ class QueuePlayer:
 
     __sa_dataclass_metadata_key__ = "sa"
     __tablename__ = "queue_player"
-    __table_args__ = (UniqueConstraint("queue_id", "player_id"),)
+    __table_args__ = (
+        UniqueConstraint("queue_id", "player_id"),
+        # Players of a queue in the order they joined
+        Index("ix_queue_player_queue_id_added_at", "queue_id", "added_at"),
+    )
 
     queue_id: str = field(
         metadata={
@@ -1486,6 +1755,17 @@ class RotationMap:
 
     __sa_dataclass_metadata_key__ = "sa"
     __tablename__ = "rotation_map"
+    __table_args__ = (
+        Index("ix_rotation_map_rotation_id_ordinal", "rotation_id", "ordinal"),
+        # The next map of a rotation. SQLite only uses a partial index if the
+        # query has the same term, and SQLAlchemy renders is_next as "is_next = 1"
+        Index(
+            "ix_rotation_map_rotation_id_is_next",
+            "rotation_id",
+            sqlite_where=text("is_next = 1"),
+            postgresql_where=text("is_next"),
+        ),
+    )
 
     raffle_ticket_reward: int = field(
         default=0,
@@ -1566,6 +1846,13 @@ class RotationMapHistory:
 
     __sa_dataclass_metadata_key__ = "sa"
     __tablename__ = "rotation_map_history"
+    __table_args__ = (
+        Index(
+            "ix_rotation_map_history_rotation_id_selected_at",
+            "rotation_id",
+            "selected_at",
+        ),
+    )
 
     id: str = field(
         init=False,
@@ -1697,8 +1984,45 @@ class VotePassedWaitlistPlayer:
     )
 
 
+def _archive_table(table: Table, *indexed_columns: str) -> Table:
+    """
+    A table with the same columns as table, but without its constraints and
+    defaults, for rows moved out of it by archive.py
+    """
+    name = f"archived_{table.name}"
+    return Table(
+        name,
+        mapper_registry.metadata,
+        *[
+            Column(
+                column.name,
+                column.type,
+                primary_key=column.primary_key,
+                nullable=column.nullable,
+            )
+            for column in table.columns
+        ],
+        *[Index(f"ix_{name}_{column}", column) for column in indexed_columns],
+    )
+
+
+archived_finished_game = _archive_table(FinishedGame.__table__, "finished_at")
+archived_finished_game_player = _archive_table(
+    FinishedGamePlayer.__table__, "finished_game_id"
+)
+archived_economy_transaction = _archive_table(
+    EconomyTransaction.__table__, "finished_game_id", "transacted_at"
+)
+archived_rotation_map_history = _archive_table(
+    RotationMapHistory.__table__, "selected_at"
+)
+
+
 Session: sessionmaker = sessionmaker(bind=engine)
 ScopedSession = scoped_session(Session)
+# Sessions for read only work. On SQLite these use a separate pool of read
+# only connections, elsewhere it's the same as Session.
+ReadSession: sessionmaker = sessionmaker(bind=read_engine)
 
 # Async session factory
 AsyncSessionLocal = (
@@ -0,0 +1,145 @@
+# Sorted rank values used to answer "what percentile is this player in"
+# without loading every player. Kept in memory, built at startup and updated
+# whenever ratings change.
+import logging
+from typing import Iterable
+
+from sortedcontainers import SortedList
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+from trueskill import Rating
+
+from discord_bots.models import Config, Player, PlayerCategoryTrueskill
+
+_log = logging.getLogger(__name__)
+
+# Key for the global (Player.rated_trueskill_*) ratings, PlayerCategoryTrueskill
+# ratings are keyed by (category_id, map_id, position_id)
+GLOBAL = "global"
+
+
+def _rank(mu: float, sigma: float) -> float:
+    return round(mu - 3 * sigma, 2)
+
+
+class PercentileIndex:
+    def __init__(self):
+        self._ranks: dict[object, SortedList] = {}
+        # entry id (pct id or player id) -> (key, rank)
+        self._entries: dict[object, tuple[object, float]] = {}
+        self._default_ratings: list[tuple[float, float]] = []
+        self._loaded = False
+
+    def invalidate(self):
+        self._loaded = False
+
+    def load(self, session: SQLAlchemySession):
+        self._ranks = {}
+        self._entries = {}
+        default_rating = Rating()
+        self._default_ratings = [(default_rating.mu, default_rating.sigma)]
+        config: Config | None = session.query(Config).first()
+        if config:
+            self._default_ratings.append(
+                (config.default_trueskill_mu, config.default_trueskill_sigma)
+            )
+
+        for player_id, mu, sigma in session.query(
+            Player.id, Player.rated_trueskill_mu, Player.rated_trueskill_sigma
+        ):
+            self._update_player(player_id, mu, sigma)
+        for pct_id, category_id, map_id, position_id, mu, sigma in session.query(
+            PlayerCategoryTrueskill.id,
+            PlayerCategoryTrueskill.category_id,
+            PlayerCategoryTrueskill.map_id,
+            PlayerCategoryTrueskill.position_id,
+            PlayerCategoryTrueskill.mu,
+            PlayerCategoryTrueskill.sigma,
+        ):
+            self._set(pct_id, (category_id, map_id, position_id), _rank(mu, sigma))
+        self._loaded = True
+        _log.info(
+            f"[PercentileIndex.load] Loaded {len(self._entries)} ratings across {len(self._ranks)} groups"
+        )
+
+    def ensure_loaded(self, session: SQLAlchemySession):
+        if not self._loaded:
+            self.load(session)
+
+    def update_players(self, players: Iterable[Player]):
+        if not self._loaded:
+            return
+        for player in players:
+            self._update_player(
+                player.id, player.rated_trueskill_mu, player.rated_trueskill_sigma
+            )
+
+    def update_pcts(self, pcts: Iterable[PlayerCategoryTrueskill]):
+        if not self._loaded:
+            return
+        for pct in pcts:
+            self._set(
+                pct.id,
+                (pct.category_id, pct.map_id, pct.position_id),
+                _rank(pct.mu, pct.sigma),
+            )
+
+    def top_ratio(self, key: object, mu: float, sigma: float) -> float:
+        """
+        Fraction of ratings in the group that are greater than or equal to the
+        given rating, i.e. 0.05 means top 5%
+        """
+        ranks = self._ranks.get(key)
+        if not ranks:
+            return 1.0
+        index = ranks.bisect_right(_rank(mu, sigma))
+        return (len(ranks) - index) / len(ranks)
+
+    def player_ratio(self, player: Player) -> float:
+        return self.top_ratio(
+            GLOBAL, player.rated_trueskill_mu, player.rated_trueskill_sigma
+        )
+
+    def pct_ratio(self, pct: PlayerCategoryTrueskill) -> float:
+        return self.top_ratio(
+            (pct.category_id, pct.map_id, pct.position_id), pct.mu, pct.sigma
+        )
+
+    def _update_player(self, player_id: int, mu: float, sigma: float):
+        # Players that haven't played a game don't count
+        if any(
+            mu == default_mu or sigma == default_sigma
+            for default_mu, default_sigma in self._default_ratings
+        ):
+            self._remove(player_id)
+        else:
+            self._set(player_id, GLOBAL, _rank(mu, sigma))
+
+    def _set(self, entry_id: object, key: object, rank: float):
+        self._remove(entry_id)
+        if key not in self._ranks:
+            self._ranks[key] = SortedList()
+        self._ranks[key].add(rank)
+        self._entries[entry_id] = (key, rank)
+
+    def _remove(self, entry_id: object):
+        existing = self._entries.pop(entry_id, None)
+        if existing:
+            key, rank = existing
+            self._ranks[key].remove(rank)
+
+
+percentile_index = PercentileIndex()
+
+
+def top_percent_label(ratio: float) -> str:
+    if ratio <= 0.05:
+        return "Top 5%"
+    elif ratio <= 0.10:
+        return "Top 10%"
+    elif ratio <= 0.25:
+        return "Top 25%"
+    elif ratio <= 0.50:
+        return "Top 50%"
+    elif ratio <= 0.75:
+        return "Top 75%"
+    return "Top 100%"
@@ -0,0 +1,156 @@
+# Maintains the PlayerStatsDaily aggregate and answers rolling window W/L/T
+# questions from it.
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+from discord_bots.models import FinishedGame, FinishedGamePlayer, PlayerStatsDaily
+
+_log = logging.getLogger(__name__)
+
+# Windows shown by /stats, -1 means all time
+STATS_WINDOWS_DAYS = [7, 30, 90, 365, -1]
+
+
+@dataclass
+class WinsLossesTies:
+    wins: int = 0
+    losses: int = 0
+    ties: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.wins + self.losses + self.ties
+
+
+def _game_day(finished_game: FinishedGame) -> date:
+    finished_at = finished_game.finished_at
+    if finished_at.tzinfo is not None:
+        finished_at = finished_at.astimezone(timezone.utc)
+    return finished_at.date()
+
+
+def _apply_game(
+    session: SQLAlchemySession,
+    finished_game: FinishedGame,
+    finished_game_players: list[FinishedGamePlayer],
+    winning_team: int,
+    amount: int,
+):
+    day = _game_day(finished_game)
+    # Load every bucket this game touches in one query, == None renders as
+    # IS NULL so games without a category or map match too
+    buckets: list[PlayerStatsDaily] = (
+        session.query(PlayerStatsDaily)
+        .filter(
+            PlayerStatsDaily.player_id.in_(
+                [fgp.player_id for fgp in finished_game_players]
+            ),
+            PlayerStatsDaily.day == day,
+            PlayerStatsDaily.category_name == finished_game.category_name,
+            PlayerStatsDaily.map_full_name == finished_game.map_full_name,
+        )
+        .all()
+    )
+    buckets_by_key = {
+        (bucket.player_id, bucket.position_name): bucket for bucket in buckets
+    }
+    for fgp in finished_game_players:
+        bucket = buckets_by_key.get((fgp.player_id, fgp.position_name))
+        if not bucket:
+            if amount < 0:
+                _log.warning(
+                    f"[_apply_game] No stats bucket for player {fgp.player_id} on {day}, game {finished_game.id}"
+                )
+                continue
+            bucket = PlayerStatsDaily(
+                player_id=fgp.player_id,
+                category_name=finished_game.category_name,
+                map_full_name=finished_game.map_full_name,
+                position_name=fgp.position_name,
+                day=day,
+            )
+            session.add(bucket)
+            buckets_by_key[(fgp.player_id, fgp.position_name)] = bucket
+        if winning_team == -1:
+            bucket.ties = max((bucket.ties or 0) + amount, 0)
+        elif winning_team == fgp.team:
+            bucket.wins = max((bucket.wins or 0) + amount, 0)
+        else:
+            bucket.losses = max((bucket.losses or 0) + amount, 0)
+
+
+def record_finished_game(
+    session: SQLAlchemySession,
+    finished_game: FinishedGame,
+    finished_game_players: list[FinishedGamePlayer],
+):
+    _apply_game(
+        session, finished_game, finished_game_players, finished_game.winning_team, 1
+    )
+
+
+def remove_finished_game(
+    session: SQLAlchemySession,
+    finished_game: FinishedGame,
+    finished_game_players: list[FinishedGamePlayer],
+):
+    _apply_game(
+        session, finished_game, finished_game_players, finished_game.winning_team, -1
+    )
+
+
+def change_finished_game_winner(
+    session: SQLAlchemySession,
+    finished_game: FinishedGame,
+    finished_game_players: list[FinishedGamePlayer],
+    previous_winning_team: int,
+):
+    _apply_game(
+        session, finished_game, finished_game_players, previous_winning_team, -1
+    )
+    _apply_game(
+        session, finished_game, finished_game_players, finished_game.winning_team, 1
+    )
+
+
+def get_player_stats(
+    session: SQLAlchemySession, player_id: int
+) -> list[PlayerStatsDaily]:
+    return (
+        session.query(PlayerStatsDaily)
+        .filter(PlayerStatsDaily.player_id == player_id)
+        .all()
+    )
+
+
+def sum_windows(
+    buckets: list[PlayerStatsDaily],
+    category_name: str | None = None,
+    map_full_name: str | None = None,
+    position_name: str | None = None,
+    windows: list[int] = STATS_WINDOWS_DAYS,
+) -> dict[int, WinsLossesTies]:
+    """
+    Sum the buckets matching the given filters into each window. A window of
+    n days covers today plus the n - 1 days before it, -1 is all time. Filters
+    left as None match everything.
+    """
+    today = datetime.now(timezone.utc).date()
+    totals = {n: WinsLossesTies() for n in windows}
+    for bucket in buckets:
+        if category_name is not None and bucket.category_name != category_name:
+            continue
+        if map_full_name is not None and bucket.map_full_name != map_full_name:
+            continue
+        if position_name is not None and bucket.position_name != position_name:
+            continue
+        for n, total in totals.items():
+            if n != -1 and bucket.day <= today - timedelta(days=n):
+                continue
+            total.wins += bucket.wins
+            total.losses += bucket.losses
+            total.ties += bucket.ties
+    return totals
@@ -0,0 +1,169 @@
+# Counts the SQL statements run by each command, slash command and task loop.
+# Every statement executed by any engine (sync, async or the read only one)
+# is attributed to the operation in the current_run context variable, which
+# is set by start_run for commands (see main.py and bot.py) and by the
+# track_queries decorator for tasks. Statements run outside of any operation
+# are attributed to "other".
+import contextvars
+import functools
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, ParamSpec, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import discord_bots.config as config
+
+_log = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+OTHER = "other"
+# Number of slowest statements kept per operation
+SLOWEST_STATEMENTS = 5
+STATEMENT_LENGTH = 300
+
+
+@dataclass
+class QueryRun:
+    """
+    The statements of one invocation of a command or task
+    """
+
+    name: str
+    queries: int = 0
+    db_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class QueryStats:
+    """
+    Totals over every run of a command or task since startup
+    """
+
+    runs: int = 0
+    queries: int = 0
+    db_seconds: float = 0.0
+    max_queries: int = 0
+    max_db_seconds: float = 0.0
+    # (seconds, statement), as a min heap
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+
+    @property
+    def queries_per_run(self) -> float:
+        return self.queries / self.runs if self.runs else 0
+
+
+current_run: contextvars.ContextVar[QueryRun | None] = contextvars.ContextVar(
+    "current_run", default=None
+)
+_stats: dict[str, QueryStats] = {}
+# Statements can run on the db executor's threads
+_lock = threading.Lock()
+
+
+def _record_statement(run: QueryRun | None, seconds: float, statement: str):
+    with _lock:
+        if run:
+            run.queries += 1
+            run.db_seconds += seconds
+        stats = _stats.setdefault(run.name if run else OTHER, QueryStats())
+        entry = (seconds, statement[:STATEMENT_LENGTH])
+        if len(stats.slowest) < SLOWEST_STATEMENTS:
+            heapq.heappush(stats.slowest, entry)
+        elif entry > stats.slowest[0]:
+            heapq.heapreplace(stats.slowest, entry)
+        # Statements outside of an operation have no run to fold them into
+        if not run:
+            stats.queries += 1
+            stats.db_seconds += seconds
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Statements on one connection run one after the other
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started_at"]
+    _record_statement(current_run.get(), seconds, statement)
+
+
+def start_run(name: str) -> QueryRun:
+    """
+    Attribute the statements run from now on in this context (the current
+    task, and tasks and db executor calls started from it) to name. Call
+    finish_run with the returned run when the operation is done.
+    """
+    run = QueryRun(name)
+    current_run.set(run)
+    return run
+
+
+def finish_run(run: QueryRun):
+    with _lock:
+        stats = _stats.setdefault(run.name, QueryStats())
+        stats.runs += 1
+        stats.queries += run.queries
+        stats.db_seconds += run.db_seconds
+        stats.max_queries = max(stats.max_queries, run.queries)
+        stats.max_db_seconds = max(stats.max_db_seconds, run.db_seconds)
+    if (
+        run.queries >= config.QUERY_COUNT_WARNING
+        or 1000 * run.db_seconds >= config.QUERY_TIME_WARNING_MS
+    ):
+        _log.warning(
+            f"[finish_run] {run.name} ran {run.queries} queries in {1000 * run.db_seconds:.1f}ms ({1000 * (time.perf_counter() - run.started_at):.1f}ms total)"
+        )
+
+
+def track_queries(
+    fn: Callable[P, Awaitable[T]],
+) -> Callable[P, Awaitable[T]]:
+    """
+    Attribute the statements of every call of the coroutine function fn to
+    its name. Meant for task loops, put it below @tasks.loop.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        run = QueryRun(fn.__name__)
+        token = current_run.set(run)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            current_run.reset(token)
+            finish_run(run)
+
+    return wrapper
+
+
+def query_stats() -> dict[str, QueryStats]:
+    """
+    A snapshot of the stats, keyed by command or task name
+    """
+    with _lock:
+        return {
+            name: QueryStats(
+                runs=stats.runs,
+                queries=stats.queries,
+                db_seconds=stats.db_seconds,
+                max_queries=stats.max_queries,
+                max_db_seconds=stats.max_db_seconds,
+                slowest=sorted(stats.slowest, reverse=True),
+            )
+            for name, stats in _stats.items()
+        }
+
+
+def reset_query_stats():
+    with _lock:
+        _stats.clear()
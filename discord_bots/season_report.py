@@ -0,0 +1,182 @@
+# Season report over the match history export (see match_history.py). The
+# export is read one chunk at a time and folded into per player totals, so
+# memory use depends on the number of players, not the number of games.
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+from discord_bots.match_history import DEFAULT_EXPORT_DIR, iter_chunks
+
+# How each per player total combines across chunks. Chunks are read oldest
+# first, so "first" and "last" are the start and end of the season.
+_TOTALS = {
+    "name": "last",
+    "games": "sum",
+    "wins": "sum",
+    "losses": "sum",
+    "ties": "sum",
+    "first_mu": "first",
+    "first_sigma": "first",
+    "last_mu": "last",
+    "last_sigma": "last",
+    "mu_sum": "sum",
+    "mu_sq_sum": "sum",
+    "first_game_at": "first",
+    "last_game_at": "last",
+}
+
+
+@dataclass
+class SeasonFilters:
+    start: datetime | None = None
+    end: datetime | None = None
+    category_names: list[str] = field(default_factory=list)
+    player_ids: list[int] = field(default_factory=list)
+
+
+def _filter_games(games: pd.DataFrame, filters: SeasonFilters) -> pd.DataFrame:
+    mask = pd.Series(True, index=games.index)
+    if filters.start:
+        mask &= games["finished_at"] >= pd.Timestamp(filters.start)
+    if filters.end:
+        mask &= games["finished_at"] < pd.Timestamp(filters.end)
+    if filters.category_names:
+        mask &= games["category_name"].isin(filters.category_names)
+    return games[mask]
+
+
+def _chunk_totals(
+    games: pd.DataFrame, players: pd.DataFrame, filters: SeasonFilters
+) -> pd.DataFrame:
+    games = _filter_games(games, filters)
+    players = players.merge(
+        games[["id", "winning_team"]],
+        left_on="finished_game_id",
+        right_on="id",
+        how="inner",
+    )
+    if filters.player_ids:
+        players = players[players["player_id"].isin(filters.player_ids)]
+    players = players.sort_values(["finished_at", "finished_game_id"], kind="stable")
+    is_tie = players["winning_team"] == -1
+    is_win = players["team"] == players["winning_team"]
+    players = players.assign(
+        name=players["player_name"].astype(str),
+        win=is_win,
+        loss=~is_win & ~is_tie,
+        tie=is_tie,
+        mu_sq=players["mu_after"] ** 2,
+    )
+    return players.groupby("player_id", sort=False).agg(
+        name=("name", "last"),
+        games=("finished_game_id", "size"),
+        wins=("win", "sum"),
+        losses=("loss", "sum"),
+        ties=("tie", "sum"),
+        first_mu=("mu_before", "first"),
+        first_sigma=("sigma_before", "first"),
+        last_mu=("mu_after", "last"),
+        last_sigma=("sigma_after", "last"),
+        mu_sum=("mu_after", "sum"),
+        mu_sq_sum=("mu_sq", "sum"),
+        first_game_at=("finished_at", "first"),
+        last_game_at=("finished_at", "last"),
+    )
+
+
+def season_totals(
+    filters: SeasonFilters, export_dir: str = DEFAULT_EXPORT_DIR
+) -> pd.DataFrame:
+    """
+    One row per player, indexed by player id
+    """
+    totals: pd.DataFrame | None = None
+    for games, players in iter_chunks(export_dir):
+        chunk = _chunk_totals(games, players, filters)
+        if chunk.empty:
+            continue
+        if totals is None:
+            totals = chunk
+        else:
+            totals = (
+                pd.concat([totals, chunk]).groupby(level=0, sort=False).agg(_TOTALS)
+            )
+    if totals is None:
+        return pd.DataFrame(columns=list(_TOTALS)).rename_axis("player_id")
+    return totals
+
+
+def season_report(
+    filters: SeasonFilters,
+    min_games: int = 1,
+    export_dir: str = DEFAULT_EXPORT_DIR,
+) -> pd.DataFrame:
+    """
+    Per player season stats for players with at least min_games games:
+    progress is the change in mu over the season and mu_variance is how much
+    their mu moved around during it
+    """
+    totals = season_totals(filters, export_dir)
+    totals = totals[totals["games"] >= max(min_games, 1)]
+    mean_mu = totals["mu_sum"] / totals["games"]
+    report = totals.assign(
+        progress=totals["last_mu"] - totals["first_mu"],
+        mean_mu=mean_mu,
+        mu_variance=(totals["mu_sq_sum"] / totals["games"] - mean_mu**2).clip(lower=0),
+        win_rate=100
+        * (totals["wins"] + 0.5 * totals["ties"])
+        / totals["games"].clip(lower=1),
+    )
+    return report.drop(columns=["mu_sum", "mu_sq_sum"]).sort_values(
+        "last_mu", ascending=False
+    )
+
+
+# (title, column, ascending)
+SECTIONS = [
+    ("Most improved", "progress", False),
+    ("Least improved", "progress", True),
+    ("Most games", "games", False),
+    ("Least games", "games", True),
+    ("Least variance", "mu_variance", True),
+    ("Highest variance", "mu_variance", False),
+]
+
+
+def _markdown_table(df: pd.DataFrame) -> str:
+    columns = list(df.columns)
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "| " + " | ".join("---" for _ in columns) + " |",
+    ]
+    for row in df.itertuples(index=False):
+        lines.append(
+            "| "
+            + " | ".join(
+                f"{value:.2f}" if isinstance(value, float) else str(value)
+                for value in row
+            )
+            + " |"
+        )
+    return "\n".join(lines)
+
+
+def season_report_markdown(
+    report: pd.DataFrame, filters: SeasonFilters, top: int = 10
+) -> str:
+    title = "# Season report"
+    if filters.category_names:
+        title += f" for {', '.join(filters.category_names)}"
+    output = [title, ""]
+    if filters.start or filters.end:
+        output += [f"{filters.start or 'start'} to {filters.end or 'now'}", ""]
+    output += [f"{len(report)} players, {int(report['games'].sum())} player games", ""]
+    for section_title, column, ascending in SECTIONS:
+        columns = ["name", "games", "win_rate", "first_mu", "last_mu"]
+        if column not in columns:
+            columns.append(column)
+        rows = report.sort_values(column, ascending=ascending, kind="stable").head(top)
+        output += [f"## {section_title}", "", _markdown_table(rows[columns]), ""]
+    output += ["## All players", "", _markdown_table(report.reset_index()), ""]
+    return "\n".join(output)
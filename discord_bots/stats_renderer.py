@@ -0,0 +1,157 @@
+# Renders post-game stat sheets (HTML written to STATS_DIR by the game server)
+# into images off of the event loop. wkhtmltoimage and the PIL crop run in a
+# process pool, and finished images are posted by a background worker so that
+# finishing a game never waits on rendering.
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import discord
+import imgkit
+from discord import DMChannel, GroupChannel, TextChannel
+from PIL import Image
+
+import discord_bots.config as config
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class StatsRenderJob:
+    channel: TextChannel | DMChannel | GroupChannel
+    html_path: str
+    cleanup: bool
+
+
+def find_newest_html(stats_dir: str) -> str | None:
+    """
+    Assume the most recently modified HTML file is the correct stat sheet
+    """
+    newest: os.DirEntry | None = None
+    newest_mtime = 0.0
+    with os.scandir(stats_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".html") or not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime
+            if newest is None or mtime > newest_mtime:
+                newest = entry
+                newest_mtime = mtime
+    return newest.path if newest else None
+
+
+def render_stats_image(
+    html_path: str, width: int | None = None, height: int | None = None
+) -> str:
+    """
+    Runs in a worker process. Returns the path of the rendered image
+    """
+    image_path = html_path + ".png"
+    imgkit.from_file(
+        html_path,
+        image_path,
+        options={"enable-local-file-access": None},
+    )
+    if width and height:
+        with Image.open(image_path) as image:
+            cropped = image.crop((0, 0, width, height))
+        cropped.save(image_path)
+    return image_path
+
+
+def cleanup_stats_dir(stats_dir: str, html_path: str):
+    """
+    Remove the rendered stat sheet along with anything older than it. Newer
+    files are kept since they may belong to jobs that are still queued.
+    """
+    cutoff = os.path.getmtime(html_path)
+    with os.scandir(stats_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith((".png", ".html")):
+                continue
+            if entry.path.startswith(html_path) or entry.stat().st_mtime <= cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+class StatsRenderer:
+    def __init__(self, workers: int, queue_size: int):
+        self._workers = max(workers, 1)
+        self._queue: asyncio.Queue[StatsRenderJob] = asyncio.Queue(
+            maxsize=max(queue_size, 1)
+        )
+        self._pool: ProcessPoolExecutor | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        if self._tasks:
+            return
+        self._pool = ProcessPoolExecutor(max_workers=self._workers)
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self._workers)
+        ]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def submit(
+        self, channel: TextChannel | DMChannel | GroupChannel, cleanup: bool = True
+    ) -> bool:
+        """
+        Queue the newest stat sheet for rendering. Returns False if there is
+        nothing to render or the queue is full.
+        """
+        if not config.STATS_DIR:
+            return False
+        html_path = await asyncio.to_thread(find_newest_html, config.STATS_DIR)
+        if not html_path:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(StatsRenderJob(channel, html_path, cleanup))
+        except asyncio.QueueFull:
+            _log.warning(
+                f"[StatsRenderer.submit] Render queue is full, dropping {html_path}"
+            )
+            return False
+        return True
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                image_path = await loop.run_in_executor(
+                    self._pool,
+                    render_stats_image,
+                    job.html_path,
+                    config.STATS_WIDTH,
+                    config.STATS_HEIGHT,
+                )
+                await job.channel.send(file=discord.File(image_path))
+                if job.cleanup:
+                    await asyncio.to_thread(
+                        cleanup_stats_dir, config.STATS_DIR, job.html_path
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                _log.exception(
+                    f"[StatsRenderer._worker] Failed to render {job.html_path}"
+                )
+            finally:
+                self._queue.task_done()
+
+
+stats_renderer = StatsRenderer(
+    workers=config.STATS_RENDER_WORKERS, queue_size=config.STATS_RENDER_QUEUE_SIZE
+)
@@ -0,0 +1,287 @@
+# Teammate and opponent statistics for every pair of players, kept as sparse
+# player x player matrices:
+# - together[a, b]: games a and b played on the same team
+# - together_wins[a, b]: of those, games they won
+# - against[a, b]: games a and b played on opposite teams
+# - against_wins[a, b]: of those, games a won
+# The matrices are built from the match history export (see match_history.py)
+# and saved next to it, so each run only adds the chunks exported since the
+# last one. They remember the export generation and the last game they
+# counted, and are rebuilt when the export was rebuilt since (--full).
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from discord_bots.match_history import (
+    DEFAULT_EXPORT_DIR,
+    chunk_count,
+    export_generation,
+    iter_chunks,
+)
+
+_log = logging.getLogger(__name__)
+
+SYNERGY_FILE = "synergy.npz"
+MATRICES = ["together", "together_wins", "against", "against_wins"]
+
+
+@dataclass
+class PairStats:
+    player_id: int
+    player_name: str
+    other_player_id: int
+    other_player_name: str
+    games: int
+    # For teammates the games won together, for opponents the games won by
+    # player_id
+    wins: int
+
+    @property
+    def win_rate(self) -> float:
+        return 100 * self.wins / self.games if self.games else 0
+
+
+def _empty(size: int) -> sp.csr_matrix:
+    return sp.csr_matrix((size, size), dtype=np.int32)
+
+
+def _resized(matrix: sp.csr_matrix, size: int) -> sp.csr_matrix:
+    coo = matrix.tocoo()
+    return sp.coo_matrix(
+        (coo.data, (coo.row, coo.col)), shape=(size, size), dtype=np.int32
+    ).tocsr()
+
+
+class SynergyMatrices:
+    def __init__(self):
+        self.generation: str | None = None
+        self.chunks = 0
+        # (finished_at, id) of the last game counted
+        self.cursor: tuple[datetime, str] | None = None
+        self.player_ids = np.empty(0, dtype=np.int64)
+        self.player_names: list[str] = []
+        self._index: dict[int, int] = {}
+        self.together = _empty(0)
+        self.together_wins = _empty(0)
+        self.against = _empty(0)
+        self.against_wins = _empty(0)
+
+    def _add_players(self, player_ids: np.ndarray, player_names: np.ndarray):
+        new = [
+            (player_id, name)
+            for player_id, name in zip(player_ids.tolist(), player_names.tolist())
+            if player_id not in self._index
+        ]
+        for player_id, name in new:
+            self._index[player_id] = len(self.player_names)
+            self.player_names.append(name)
+        if new:
+            self.player_ids = np.concatenate(
+                (self.player_ids, np.array([p for p, _ in new], dtype=np.int64))
+            )
+            size = len(self.player_ids)
+            for name in MATRICES:
+                setattr(self, name, _resized(getattr(self, name), size))
+        # Keep the most recent name of every player
+        for player_id, name in zip(player_ids.tolist(), player_names.tolist()):
+            self.player_names[self._index[player_id]] = name
+
+    def indexes(self, player_ids) -> np.ndarray:
+        """
+        Matrix indexes of the given player ids, -1 for players without games
+        """
+        return np.array(
+            [self._index.get(player_id, -1) for player_id in player_ids],
+            dtype=np.int64,
+        )
+
+    def add_games(self, games: pd.DataFrame, players: pd.DataFrame):
+        """
+        Add a chunk of finished games and their players, skipping games at or
+        before the cursor
+        """
+        if self.cursor is not None:
+            finished_at, id = self.cursor
+            games = games[
+                (games["finished_at"] > finished_at)
+                | ((games["finished_at"] == finished_at) & (games["id"] > id))
+            ]
+        if games.empty:
+            return
+        last_game = games.sort_values(["finished_at", "id"]).iloc[-1]
+        self.cursor = (last_game["finished_at"].to_pydatetime(), last_game["id"])
+        players = players.merge(
+            games[["id", "winning_team"]],
+            left_on="finished_game_id",
+            right_on="id",
+            how="inner",
+        )
+        if players.empty:
+            return
+        latest = players.sort_values("finished_at", kind="stable").drop_duplicates(
+            "player_id", keep="last"
+        )
+        self._add_players(
+            latest["player_id"].to_numpy(dtype=np.int64),
+            latest["player_name"].astype(str).to_numpy(),
+        )
+        players = players.assign(
+            index=players["player_id"].map(self._index).to_numpy(dtype=np.int64)
+        )
+        pairs = players[["finished_game_id", "index", "team", "winning_team"]].merge(
+            players[["finished_game_id", "index", "team"]],
+            on="finished_game_id",
+            suffixes=("", "_other"),
+        )
+        pairs = pairs[pairs["index"] != pairs["index_other"]]
+        same_team = (pairs["team"] == pairs["team_other"]).to_numpy()
+        won = (pairs["team"] == pairs["winning_team"]).to_numpy()
+        rows = pairs["index"].to_numpy()
+        cols = pairs["index_other"].to_numpy()
+        size = len(self.player_ids)
+
+        def count(mask: np.ndarray) -> sp.csr_matrix:
+            return sp.coo_matrix(
+                (np.ones(mask.sum(), dtype=np.int32), (rows[mask], cols[mask])),
+                shape=(size, size),
+            ).tocsr()
+
+        self.together = self.together + count(same_team)
+        self.together_wins = self.together_wins + count(same_team & won)
+        self.against = self.against + count(~same_team)
+        self.against_wins = self.against_wins + count(~same_team & won)
+
+    def _pairs(
+        self, games: sp.csr_matrix, wins: sp.csr_matrix, min_games: int
+    ) -> list[PairStats]:
+        # Both matrices are symmetric in games, so only look at a < b
+        upper = sp.triu(games, k=1).tocoo()
+        mask = upper.data >= min_games
+        rows, cols = upper.row[mask], upper.col[mask]
+        pair_wins = np.asarray(wins[rows, cols]).ravel()
+        return [
+            PairStats(
+                player_id=int(self.player_ids[row]),
+                player_name=self.player_names[row],
+                other_player_id=int(self.player_ids[col]),
+                other_player_name=self.player_names[col],
+                games=int(pair_games),
+                wins=int(won),
+            )
+            for row, col, pair_games, won in zip(
+                rows.tolist(), cols.tolist(), upper.data[mask].tolist(), pair_wins
+            )
+        ]
+
+    def top_synergies(
+        self, min_games: int = 10, limit: int = 10, best: bool = True
+    ) -> list[PairStats]:
+        """
+        Teammates with the best (or worst) win rate together
+        """
+        pairs = self._pairs(self.together, self.together_wins, min_games)
+        pairs.sort(key=lambda pair: (pair.win_rate, pair.games), reverse=best)
+        return pairs[:limit]
+
+    def top_rivalries(self, min_games: int = 10, limit: int = 10) -> list[PairStats]:
+        """
+        Opponents that played each other the most, with the head to head
+        record of the first player
+        """
+        pairs = self._pairs(self.against, self.against_wins, min_games)
+        pairs.sort(key=lambda pair: pair.games, reverse=True)
+        return pairs[:limit]
+
+    def save(self, path: str):
+        arrays: dict[str, np.ndarray] = {
+            "generation": np.array(self.generation or ""),
+            "chunks": np.array(self.chunks),
+            "cursor_finished_at": np.array(
+                self.cursor[0].isoformat() if self.cursor else ""
+            ),
+            "cursor_id": np.array(self.cursor[1] if self.cursor else ""),
+            "player_ids": self.player_ids,
+            "player_names": np.array(self.player_names, dtype=str),
+        }
+        for name in MATRICES:
+            coo = getattr(self, name).tocoo()
+            arrays[f"{name}_data"] = coo.data
+            arrays[f"{name}_row"] = coo.row
+            arrays[f"{name}_col"] = coo.col
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SynergyMatrices":
+        matrices = cls()
+        with np.load(path) as arrays:
+            matrices.chunks = int(arrays["chunks"])
+            # Saved before generations were added, rebuilt on the next update
+            if "generation" in arrays:
+                matrices.generation = str(arrays["generation"]) or None
+                if str(arrays["cursor_finished_at"]):
+                    matrices.cursor = (
+                        datetime.fromisoformat(str(arrays["cursor_finished_at"])),
+                        str(arrays["cursor_id"]),
+                    )
+            matrices.player_ids = arrays["player_ids"].astype(np.int64)
+            matrices.player_names = arrays["player_names"].tolist()
+            matrices._index = {
+                player_id: i for i, player_id in enumerate(matrices.player_ids.tolist())
+            }
+            size = len(matrices.player_ids)
+            for name in MATRICES:
+                setattr(
+                    matrices,
+                    name,
+                    sp.coo_matrix(
+                        (
+                            arrays[f"{name}_data"],
+                            (arrays[f"{name}_row"], arrays[f"{name}_col"]),
+                        ),
+                        shape=(size, size),
+                        dtype=np.int32,
+                    ).tocsr(),
+                )
+        return matrices
+
+
+def update_synergy(
+    export_dir: str = DEFAULT_EXPORT_DIR, rebuild: bool = False
+) -> SynergyMatrices:
+    """
+    Load the saved matrices and add the chunks exported since they were saved.
+    Only refreshes when called, i.e. when scripts/export_match_history.py or
+    scripts/synergy.py run, not as games finish.
+    """
+    path = os.path.join(export_dir, SYNERGY_FILE)
+    generation = export_generation(export_dir)
+    matrices = SynergyMatrices()
+    if not rebuild and os.path.exists(path):
+        matrices = SynergyMatrices.load(path)
+        # The export was rebuilt since, its chunks no longer line up with the
+        # ones that were counted and games may have been edited or deleted
+        if (
+            generation is None
+            or matrices.generation != generation
+            or matrices.chunks > chunk_count(export_dir)
+        ):
+            _log.info("[update_synergy] The export was rebuilt, rebuilding")
+            matrices = SynergyMatrices()
+    rebuilt = matrices.generation != generation
+    matrices.generation = generation
+    added = 0
+    for games, players in iter_chunks(export_dir, start=matrices.chunks):
+        matrices.add_games(games, players)
+        matrices.chunks += 1
+        added += 1
+    if added or rebuilt:
+        matrices.save(path)
+        _log.info(f"[update_synergy] Added {added} chunks, {matrices.chunks} total")
+    return matrices
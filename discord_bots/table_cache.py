@@ -0,0 +1,237 @@
+# An in-process, read-through cache of the small tables that are read on
+# nearly every interaction but only change through admin commands.
+#
+# Each table is loaded whole on first use and kept as frozen snapshots: frozen
+# dataclasses with one attribute per column of the model, so code that only
+# reads attributes can use them in place of model instances. They are not
+# attached to any session, so never add them to one or use them for
+# relationships; query the model instead when it has to be changed.
+#
+# Any commit that changes one of these tables (through the ORM, including
+# bulk update/delete statements) reloads it in the cache of this process and
+# bumps its row in cache_version in the same transaction. Other processes
+# (scripts, a second bot) notice the new version when table_cache_task runs
+# refresh(), every TABLE_CACHE_CHECK_SECONDS, and reload the table too. Reads
+# only go to the database for a table that isn't loaded yet, which in the bot
+# doesn't happen after the refresh at startup.
+import logging
+import threading
+from dataclasses import make_dataclass
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import ORMExecuteState
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+
+from discord_bots.models import (
+    CacheVersion,
+    Category,
+    Config,
+    Map,
+    Position,
+    Queue,
+    QueuePosition,
+    QueueRole,
+    ReadSession,
+    Rotation,
+)
+
+_log = logging.getLogger(__name__)
+
+CACHED_MODELS: list[type] = [
+    Category,
+    Config,
+    Map,
+    Position,
+    Queue,
+    QueuePosition,
+    QueueRole,
+    Rotation,
+]
+_CACHED_TABLES: dict[type, str] = {
+    model: model.__tablename__ for model in CACHED_MODELS
+}
+
+
+def _snapshot_type(model: type) -> type:
+    return make_dataclass(
+        f"{model.__name__}Snapshot",
+        [(attr.key, Any) for attr in inspect(model).column_attrs],
+        frozen=True,
+    )
+
+
+class TableCache:
+    def __init__(self, models: list[type]):
+        self._snapshot_types: dict[type, type] = {
+            model: _snapshot_type(model) for model in models
+        }
+        # model -> primary key -> snapshot, in primary key order
+        self._rows: dict[type, dict[Any, Any]] = {}
+        # Bumped on every invalidation, so that a load that started before it
+        # doesn't store rows that are already out of date
+        self._generations: dict[type, int] = {model: 0 for model in models}
+        self._versions: dict[str, int] = {}
+        # Tables are loaded and invalidated from the db executor's threads too
+        self._lock = threading.RLock()
+
+    def _snapshot(self, model: type, instance) -> Any:
+        snapshot_type = self._snapshot_types[model]
+        return snapshot_type(
+            **{
+                attr.key: getattr(instance, attr.key)
+                for attr in inspect(model).column_attrs
+            }
+        )
+
+    def _load(self, session: SQLAlchemySession, model: type) -> dict[Any, Any]:
+        with self._lock:
+            generation = self._generations[model]
+        instances = session.scalars(
+            select(model).order_by(*inspect(model).primary_key)
+        ).all()
+        rows = {
+            inspect(instance).identity[0]: self._snapshot(model, instance)
+            for instance in instances
+        }
+        with self._lock:
+            if self._generations[model] == generation:
+                self._rows[model] = rows
+        _log.debug(f"[TableCache._load] Loaded {len(rows)} {model.__tablename__}")
+        return rows
+
+    def refresh(self, session: SQLAlchemySession):
+        """
+        Invalidate the tables that another process changed and load every
+        table that isn't loaded. Blocks on the database, so the bot runs it
+        through db.read (see tasks.table_cache_task).
+        """
+        versions: dict[str, int] = dict(
+            session.execute(select(CacheVersion.name, CacheVersion.version)).all()
+        )
+        with self._lock:
+            changed = [
+                name
+                for name, version in versions.items()
+                if self._versions.get(name, version) != version
+            ]
+            self._versions = versions
+        if changed:
+            self.invalidate(*changed)
+        for model in self._snapshot_types:
+            if model not in self._rows:
+                self._load(session, model)
+
+    def reload(self, *table_names: str):
+        """
+        Invalidate the tables and load them again right away
+        """
+        self.invalidate(*table_names)
+        session: SQLAlchemySession
+        with ReadSession() as session:
+            for model in self._snapshot_types:
+                if model.__tablename__ in table_names:
+                    self._load(session, model)
+
+    def rows(self, model: type) -> dict[Any, Any]:
+        """
+        Every row of the table by primary key
+        """
+        rows = self._rows.get(model)
+        if rows is None:
+            # Only before the first refresh(), e.g. in scripts
+            session: SQLAlchemySession
+            with ReadSession() as session:
+                rows = self._load(session, model)
+        return rows
+
+    def get(self, model: type, id) -> Any | None:
+        return self.rows(model).get(id)
+
+    def all(self, model: type) -> list[Any]:
+        return list(self.rows(model).values())
+
+    def filter(self, model: type, **values) -> list[Any]:
+        """
+        The rows whose attributes equal all of the given values
+        """
+        return [
+            row
+            for row in self.rows(model).values()
+            if all(getattr(row, key) == value for key, value in values.items())
+        ]
+
+    def first(self, model: type) -> Any | None:
+        return next(iter(self.rows(model).values()), None)
+
+    def config(self) -> Any | None:
+        """
+        The Config row, see models.Config
+        """
+        return self.first(Config)
+
+    def invalidate(self, *table_names: str):
+        with self._lock:
+            for model in self._snapshot_types:
+                if model.__tablename__ in table_names:
+                    self._rows.pop(model, None)
+                    self._generations[model] += 1
+
+
+table_cache = TableCache(CACHED_MODELS)
+
+
+def _mark_changed(session: SQLAlchemySession, tables: set[str]):
+    changed: set[str] = session.info.setdefault("changed_cached_tables", set())
+    new_tables = tables - changed
+    if not new_tables:
+        return
+    changed |= new_tables
+    # Core statement, so it doesn't trigger the ORM events below
+    session.connection().execute(
+        update(CacheVersion.__table__)
+        .where(CacheVersion.__table__.c.name.in_(new_tables))
+        .values(version=CacheVersion.__table__.c.version + 1)
+    )
+
+
+@event.listens_for(SQLAlchemySession, "after_flush")
+def _after_flush(session: SQLAlchemySession, flush_context):
+    tables = {
+        _CACHED_TABLES[type(instance)]
+        for instance in chain(session.new, session.dirty, session.deleted)
+        if type(instance) in _CACHED_TABLES
+    }
+    if tables:
+        _mark_changed(session, tables)
+
+
+@event.listens_for(SQLAlchemySession, "do_orm_execute")
+def _do_orm_execute(orm_execute_state: ORMExecuteState):
+    # Bulk statements like session.query(Queue).update(...) skip the flush
+    if not (
+        orm_execute_state.is_update
+        or orm_execute_state.is_delete
+        or orm_execute_state.is_insert
+    ):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _CACHED_TABLES:
+        _mark_changed(orm_execute_state.session, {_CACHED_TABLES[mapper.class_]})
+
+
+@event.listens_for(SQLAlchemySession, "after_commit")
+def _after_commit(session: SQLAlchemySession):
+    tables: set[str] | None = session.info.pop("changed_cached_tables", None)
+    if tables:
+        try:
+            table_cache.reload(*tables)
+        except Exception:
+            # Already invalidated, so the next read loads it instead
+            _log.exception(f"[_after_commit] Failed to reload {tables}")
+
+
+@event.listens_for(SQLAlchemySession, "after_rollback")
+def _after_rollback(session: SQLAlchemySession):
+    session.info.pop("changed_cached_tables", None)
@@ -9,18 +9,36 @@ from datetime import datetime, timedelta, timezone
 from random import shuffle
 
 import discord
-import sqlalchemy
 from discord.channel import TextChannel
 from discord.colour import Colour
 from discord.ext import tasks
 from discord.guild import Guild
-from discord.member import Member
 from discord.utils import escape_markdown
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.session import Session as SQLAlchemySession
 
 import discord_bots.config as config
+from discord_bots.activity import activity_tracker
+from discord_bots.archive import archive
+from discord_bots.async_db_utils import (
+    async_count,
+    async_delete_where,
+    async_get_by_ids,
+    async_query_all,
+    async_query_first,
+    async_session,
+)
 from discord_bots.cogs.schedule import ScheduleUtils
+from discord_bots.db_executor import db
+from discord_bots.leaderboard import leaderboard
+from discord_bots.percentiles import percentile_index
+from discord_bots.query_stats import track_queries
+from discord_bots.table_cache import table_cache
 from discord_bots.utils import (
     add_empty_field,
+    async_player_ids_in_game,
     execute_map_rotation,
     move_game_players_lobby,
     print_leaderboard,
@@ -29,7 +47,7 @@ from discord_bots.utils import (
 
 from .bot import bot
 from .cogs.economy import EconomyCommands
-from .commands import add_player_to_queue, create_game, is_in_game
+from .commands import add_player_to_queue, create_game
 from .models import (
     Category,
     InProgressGame,
@@ -46,7 +64,6 @@ from .models import (
     RotationMap,
     SchedulePlayer,
     ScopedSession,
-    Session,
     SkipMapVote,
     VotePassedWaitlist,
     VotePassedWaitlistPlayer,
@@ -56,7 +73,7 @@ from .queues import AddPlayerQueueMessage, add_player_queue, waitlist_messages
 _log = logging.getLogger(__name__)
 
 
-async def add_players(session: sqlalchemy.orm.Session):
+async def add_players(session: AsyncSession):
     """
     Handle adding players in a task that pulls messages off of a queue.
 
@@ -66,7 +83,12 @@ async def add_players(session: sqlalchemy.orm.Session):
     if add_player_queue.empty():
         # check if the queue is empty up front to avoid emitting any SQL
         return
-    queues: list[Queue] = session.query(Queue).order_by(Queue.ordinal.asc()).all()
+    queues: list[Queue] = await async_query_all(
+        session,
+        Queue,
+        options=[selectinload(Queue.rotation).selectinload(Rotation.queues)],
+        order_by=[Queue.ordinal.asc()],
+    )
     queue_by_id: dict[str, Queue] = {queue.id: queue for queue in queues}
     queues_added_to_by_player_id: dict[int, list[Queue]] = {}
     queues_added_to_by_id: dict[str, Queue] = {}
@@ -120,26 +142,21 @@ async def add_players(session: sqlalchemy.orm.Session):
                     value=f"```asciidoc\n* {rotation.name}```",
                     inline=False,
                 )
-            next_rotation_map: RotationMap | None = (
-                session.query(RotationMap)
-                .filter(RotationMap.rotation_id == rotation.id)
-                .filter(RotationMap.is_next == True)
-                .first()
+            next_rotation_map: RotationMap | None = await async_query_first(
+                session,
+                RotationMap,
+                RotationMap.rotation_id == rotation.id,
+                RotationMap.is_next == True,
             )
             if not next_rotation_map:
                 continue
-            next_map: Map | None = (
-                session.query(Map)
-                .join(RotationMap, RotationMap.map_id == Map.id)
-                .filter(next_rotation_map.map_id == Map.id)
-                .first()
+            next_map: Map | None = await async_query_first(
+                session, Map, Map.id == next_rotation_map.map_id
             )
             if next_map:
                 next_map_str = f"{next_map.full_name} ({next_map.short_name})"
-                skip_map_votes_count = (
-                    session.query(SkipMapVote)
-                    .filter(SkipMapVote.rotation_id == rotation.id)
-                    .count()
+                skip_map_votes_count = await async_count(
+                    session, SkipMapVote, SkipMapVote.rotation_id == rotation.id
                 )
                 if skip_map_votes_count:
                     embed.add_field(
@@ -161,32 +178,27 @@ async def add_players(session: sqlalchemy.orm.Session):
             for queue_id in set(queues_added_to_by_id.keys()) & set(
                 [queue.id for queue in rotation.queues]
             ):
-                queue: Queue = session.query(Queue).filter(Queue.id == queue_id).one()
+                queue: Queue = queue_by_id[queue_id]
                 if queue.is_locked:
                     continue
 
-                queue_players = (
-                    session.query(QueuePlayer, Player.name)
-                    .join(Player, QueuePlayer.player_id == Player.id)
-                    .filter(QueuePlayer.queue_id == queue.id)
-                    .order_by(QueuePlayer.added_at.asc())
-                    .all()
-                )
-                player_names: list[str] = (
-                    [name[1] for name in queue_players] if queue_players else []
+                player_names: list[str] = list(
+                    await session.scalars(
+                        select(Player.name)
+                        .join(QueuePlayer, QueuePlayer.player_id == Player.id)
+                        .where(QueuePlayer.queue_id == queue.id)
+                        .order_by(QueuePlayer.added_at.asc())
+                    )
                 )
-                next_rotation_map: RotationMap | None = (
-                    session.query(RotationMap)
-                    .filter(RotationMap.rotation_id == queue.rotation_id)
-                    .filter(RotationMap.is_next == True)
-                    .first()
+                next_rotation_map: RotationMap | None = await async_query_first(
+                    session,
+                    RotationMap,
+                    RotationMap.rotation_id == queue.rotation_id,
+                    RotationMap.is_next == True,
                 )
                 if next_rotation_map:
-                    next_map: Map | None = (
-                        session.query(Map)
-                        .join(RotationMap, RotationMap.map_id == Map.id)
-                        .filter(next_rotation_map.map_id == Map.id)
-                        .first()
+                    next_map: Map | None = await async_query_first(
+                        session, Map, Map.id == next_rotation_map.map_id
                     )
                     if next_map:
                         next_map_str = f"{next_map.full_name} ({next_map.short_name})"
@@ -202,8 +214,11 @@ async def add_players(session: sqlalchemy.orm.Session):
                     inline=True,
                 )
 
+        in_game_player_ids = await async_player_ids_in_game(
+            session, list(queues_added_to_by_player_id.keys())
+        )
         for player_id in queues_added_to_by_player_id.keys():
-            if is_in_game(player_id):
+            if player_id in in_game_player_ids:
                 continue
             player_name = player_name_by_id[player_id]
             queues_added_to = queues_added_to_by_player_id[player_id]
@@ -232,13 +247,15 @@ async def add_players(session: sqlalchemy.orm.Session):
     for queue in queues:
         if not queue.is_sweaty:
             continue
-        queue_players: list[QueuePlayer] = (
-            session.query(QueuePlayer).filter(QueuePlayer.queue_id == queue.id).all()
+        queue_players: list[QueuePlayer] = await async_query_all(
+            session, QueuePlayer, QueuePlayer.queue_id == queue.id
         )
         if len(queue_players) >= queue.size:
             player_ids: list[int] = list(map(lambda x: x.player_id, queue_players))
             if queue.category_id:
-                pcts = session.query(PlayerCategoryTrueskill).filter(
+                pcts: list[PlayerCategoryTrueskill] = await async_query_all(
+                    session,
+                    PlayerCategoryTrueskill,
                     PlayerCategoryTrueskill.player_id.in_(player_ids),
                     PlayerCategoryTrueskill.category_id == queue.category_id,
                 )
@@ -251,8 +268,8 @@ async def add_players(session: sqlalchemy.orm.Session):
                     )[: queue.size]
                 ]
             else:
-                players: list[Player] = (
-                    session.query(Player).filter(Player.id.in_(player_ids)).all()
+                players: list[Player] = await async_query_all(
+                    session, Player, Player.id.in_(player_ids)
                 )
                 top_player_ids = [
                     player.id
@@ -270,115 +287,143 @@ async def add_players(session: sqlalchemy.orm.Session):
             )
 
 
+@tasks.loop(seconds=config.ACTIVITY_FLUSH_SECONDS)
+@track_queries
+async def activity_flush_task():
+    await activity_tracker.flush()
+
+
 @tasks.loop(seconds=1)
+@track_queries
 async def add_player_task():
-    session: sqlalchemy.orm.Session
-    with Session() as session:
+    async with async_session() as session:
         await add_players(session)
 
 
 @tasks.loop(minutes=1)
+@track_queries
 async def afk_timer_task():
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        timeout: datetime = datetime.now(timezone.utc) - timedelta(
-            minutes=config.AFK_TIME_MINUTES
-        )
+    """
+    Remove players that have been inactive for AFK_TIME_MINUTES from every
+    queue and remove their map votes, then send one notice per channel
+    """
+    timeout: datetime = datetime.now(timezone.utc) - timedelta(
+        minutes=config.AFK_TIME_MINUTES
+    )
+    queue_channel_ids, vote_channel_ids, player_names = await db.write(
+        _remove_afk_players, timeout
+    )
 
-        player: Player
-        for player in (
-            session.query(Player)
-            .join(QueuePlayer)
-            .filter(
-                Player.last_activity_at < timeout, QueuePlayer.player_id == Player.id
-            )
-        ):
-            queue_player = (
-                session.query(QueuePlayer)
-                .filter(QueuePlayer.player_id == player.id)
-                .first()
+    for channel_id, player_ids in _group_by_channel(queue_channel_ids).items():
+        channel = bot.get_channel(channel_id)
+        if not channel or not isinstance(channel, TextChannel):
+            continue
+        members = [channel.guild.get_member(player_id) for player_id in player_ids]
+        mentions = [member.mention for member in members if member]
+        if mentions:
+            await send_message(
+                channel,
+                content=f"{', '.join(mentions)} {'was' if len(mentions) == 1 else 'were'} removed from all queues for being inactive for {config.AFK_TIME_MINUTES} minutes",
+                embed_content=False,
             )
-            if queue_player:
-                channel = bot.get_channel(queue_player.channel_id)
-                if channel and isinstance(channel, TextChannel):
-                    member: Member | None = channel.guild.get_member(player.id)
-                    if member:
-                        await send_message(
-                            channel,
-                            content=f"{member.mention} was removed from all queues for being inactive for {config.AFK_TIME_MINUTES} minutes",
-                            embed_content=False,
-                        )
-                session.query(QueuePlayer).filter(
-                    QueuePlayer.player_id == player.id
-                ).delete()
-                session.commit()
-
-        votes_removed_sent = False
-        for player in (
-            session.query(Player)
-            .join(MapVote)
-            .filter(Player.last_activity_at < timeout, MapVote.player_id == Player.id)
-        ):
-            map_votes: list[MapVote] = (
-                session.query(MapVote).filter(MapVote.player_id == player.id).all()
+    for channel_id, player_ids in _group_by_channel(vote_channel_ids).items():
+        channel = bot.get_channel(channel_id)
+        if not channel or not isinstance(channel, TextChannel):
+            continue
+        members = [
+            member for member in map(channel.guild.get_member, player_ids) if member
+        ]
+        if members:
+            names = ", ".join(
+                escape_markdown(player_names.get(member.id, member.display_name))
+                for member in members
             )
-            if len(map_votes) > 0:
-                channel = bot.get_channel(map_votes[0].channel_id)
-                if channel and isinstance(channel, TextChannel):
-                    member: Member | None = channel.guild.get_member(player.id)
-                    if member:
-                        await send_message(
-                            channel,
-                            content=member.mention,
-                            embed_content=False,
-                            embed_description=f"{escape_markdown(player.name)}'s votes removed for being inactive for {config.AFK_TIME_MINUTES} minutes",
-                            colour=Colour.red(),
-                        )
-                        votes_removed_sent = True
-                session.query(MapVote).filter(MapVote.player_id == player.id).delete()
-                session.commit()
-
-        for player in (
-            session.query(Player)
-            .join(SkipMapVote)
-            .filter(
-                Player.last_activity_at < timeout, SkipMapVote.player_id == Player.id
+            await send_message(
+                channel,
+                content=" ".join(member.mention for member in members),
+                embed_content=False,
+                embed_description=f"{names}'s votes removed for being inactive for {config.AFK_TIME_MINUTES} minutes",
+                colour=Colour.red(),
             )
-        ):
-            skip_map_votes: list[SkipMapVote] = (
-                session.query(SkipMapVote)
-                .filter(SkipMapVote.player_id == player.id)
-                .all()
+
+
+def _remove_afk_players(
+    session: SQLAlchemySession, timeout: datetime
+) -> tuple[dict[int, int], dict[int, int], dict[int, str]]:
+    """
+    Delete the queue entries and votes of the players inactive since timeout.
+    Runs on the db writer, see DBExecutor.write. Returns the channel to notify
+    for each player removed from the queues, and for each player whose votes
+    were removed, and the names of the latter.
+    """
+    afk_player_ids = select(Player.id).where(Player.last_activity_at < timeout)
+    # player id -> channel the notice goes to
+    queue_channel_ids: dict[int, int] = {}
+    vote_channel_ids: dict[int, int] = {}
+    # Map votes before skip votes, so that they take precedence for the channel
+    for model, channel_ids in [
+        (QueuePlayer, queue_channel_ids),
+        (MapVote, vote_channel_ids),
+        (SkipMapVote, vote_channel_ids),
+    ]:
+        rows = session.execute(
+            select(model.player_id, model.channel_id).where(
+                model.player_id.in_(afk_player_ids)
             )
-            if len(skip_map_votes) > 0:
-                # So we don't send this message twice
-                if not votes_removed_sent:
-                    channel = bot.get_channel(skip_map_votes[0].channel_id)
-                    if channel and isinstance(channel, TextChannel):
-                        member: Member | None = channel.guild.get_member(player.id)
-                        if member:
-                            await send_message(
-                                channel,
-                                content=member.mention,
-                                embed_content=False,
-                                embed_description=f"{escape_markdown(player.name)}'s votes removed for being inactive for {config.AFK_TIME_MINUTES} minutes",
-                                colour=Colour.red(),
-                            )
-                session.query(SkipMapVote).filter(
-                    SkipMapVote.player_id == player.id
-                ).delete()
-                session.commit()
+        )
+        for player_id, channel_id in rows:
+            # Active since, but not written yet
+            if not activity_tracker.active_since(player_id, timeout):
+                channel_ids.setdefault(player_id, channel_id)
+
+    if queue_channel_ids:
+        session.execute(
+            delete(QueuePlayer).where(QueuePlayer.player_id.in_(queue_channel_ids))
+        )
+    if vote_channel_ids:
+        session.execute(delete(MapVote).where(MapVote.player_id.in_(vote_channel_ids)))
+        session.execute(
+            delete(SkipMapVote).where(SkipMapVote.player_id.in_(vote_channel_ids))
+        )
+    player_names: dict[int, str] = dict(
+        session.execute(
+            select(Player.id, Player.name).where(Player.id.in_(vote_channel_ids))
+        ).all()
+    )
+    return queue_channel_ids, vote_channel_ids, player_names
+
+
+def _group_by_channel(channel_ids: dict[int, int]) -> dict[int, list[int]]:
+    player_ids_by_channel_id: dict[int, list[int]] = defaultdict(list)
+    for player_id, channel_id in channel_ids.items():
+        player_ids_by_channel_id[channel_id].append(player_id)
+    return player_ids_by_channel_id
+
+
+@tasks.loop(hours=24)
+@track_queries
+async def archive_task():
+    """
+    Move the history older than ARCHIVE_AFTER_DAYS to the archive tables, see
+    archive.py
+    """
+    await db.run(archive, config.ARCHIVE_AFTER_DAYS, config.ARCHIVE_BATCH_SIZE)
 
 
 @tasks.loop(seconds=1800)
+@track_queries
 async def leaderboard_task():
     """
-    Periodically print the leaderboard
+    Periodically print the leaderboard. Ratings are kept up to date in memory
+    as games finish, the periodic rebuild picks up changes made outside of the
+    bot (e.g. scripts) and games aging out of the 30 day window.
     """
+    leaderboard.invalidate()
     await print_leaderboard()
 
 
 @tasks.loop(minutes=1)
+@track_queries
 async def map_rotation_task():
     """Rotate the map automatically, stopping on the 1st map
     TODO: tests
@@ -386,39 +431,38 @@ async def map_rotation_task():
     if config.DISABLE_MAP_ROTATION:
         return
 
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        rotations: list[Rotation] | None = session.query(Rotation).all()
-        if not rotations:
-            return
+    async with async_session() as session:
+        next_rotation_maps: list[RotationMap] = await async_query_all(
+            session, RotationMap, RotationMap.is_next == True
+        )
 
-        for rotation in rotations:
-            next_rotation_map: RotationMap | None = (
-                session.query(RotationMap)
-                .filter(RotationMap.rotation_id == rotation.id)
-                .filter(RotationMap.is_next == True)
-                .first()
-            )
-            if next_rotation_map and not next_rotation_map.stop_rotation:
-                time_since_update: timedelta = datetime.now(
-                    timezone.utc
-                ) - next_rotation_map.updated_at.replace(tzinfo=timezone.utc)
-                if (time_since_update.seconds // 60) > config.MAP_ROTATION_MINUTES:
-                    await execute_map_rotation(rotation.id, True)
+    # Only the first next map of each rotation counts
+    next_rotation_map_by_rotation_id: dict[str, RotationMap] = {}
+    for next_rotation_map in next_rotation_maps:
+        next_rotation_map_by_rotation_id.setdefault(
+            next_rotation_map.rotation_id, next_rotation_map
+        )
+    for rotation_id, next_rotation_map in next_rotation_map_by_rotation_id.items():
+        if next_rotation_map.stop_rotation:
+            continue
+        time_since_update: timedelta = datetime.now(
+            timezone.utc
+        ) - next_rotation_map.updated_at.replace(tzinfo=timezone.utc)
+        if (time_since_update.seconds // 60) > config.MAP_ROTATION_MINUTES:
+            await execute_map_rotation(rotation_id, True)
 
 
 @tasks.loop(seconds=5)
+@track_queries
 async def prediction_task():
     """
     Updates prediction embeds.
     Closes prediction after submission period
     """
-    session = Session()
-    in_progress_games: list[InProgressGame] | None = (
-        session.query(InProgressGame)
-        .filter(InProgressGame.prediction_open == True)
-        .all()
-    )
+    async with async_session() as session:
+        in_progress_games: list[InProgressGame] = await async_query_all(
+            session, InProgressGame, InProgressGame.prediction_open == True
+        )
     try:
         await EconomyCommands.update_embeds(None, in_progress_games)
     except Exception as e:
@@ -427,15 +471,14 @@ async def prediction_task():
         # Cleanly cancel & restart task to resolve
         _log.warning(e)
         _log.info("prediction_task restarting...")
-        session.close()
         prediction_task.cancel()
         prediction_task.restart()
 
     await EconomyCommands.close_predictions(None, in_progress_games=in_progress_games)
-    session.close()
 
 
 @tasks.loop(seconds=1)
+@track_queries
 async def queue_waitlist_task():
     """
     Move players in the waitlist into the queues. Pop queues if needed.
@@ -445,9 +488,17 @@ async def queue_waitlist_task():
 
     TODO: Tests for this method
     """
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        queues: list[Queue] = session.query(Queue).order_by(Queue.ordinal.asc())  # type: ignore
+    async with async_session() as session:
+        queue_waitlists: list[QueueWaitlist] = await async_query_all(
+            session,
+            QueueWaitlist,
+            QueueWaitlist.end_waitlist_at < datetime.now(timezone.utc),
+        )
+        if not queue_waitlists:
+            return
+        queues: list[Queue] = await async_query_all(
+            session, Queue, order_by=[Queue.ordinal.asc()]
+        )
         queue_waitlist: QueueWaitlist
         channel: (
             discord.abc.GuildChannel
@@ -456,19 +507,25 @@ async def queue_waitlist_task():
             | None
         ) = None
         guild: Guild | None = None
-        for queue_waitlist in session.query(QueueWaitlist).filter(
-            QueueWaitlist.end_waitlist_at < datetime.now(timezone.utc)
-        ):
+        for queue_waitlist in queue_waitlists:
             if not channel:
                 channel = bot.get_channel(queue_waitlist.channel_id)
             if not guild:
                 guild = bot.get_guild(queue_waitlist.guild_id)
 
-            queue_waitlist_players: list[QueueWaitlistPlayer]
-            queue_waitlist_players = (
-                session.query(QueueWaitlistPlayer)
-                .filter(QueueWaitlistPlayer.queue_waitlist_id == queue_waitlist.id)
-                .all()
+            queue_waitlist_players: list[QueueWaitlistPlayer] = await async_query_all(
+                session,
+                QueueWaitlistPlayer,
+                QueueWaitlistPlayer.queue_waitlist_id == queue_waitlist.id,
+            )
+            waitlist_player_ids = list(
+                set(qwp.player_id for qwp in queue_waitlist_players)
+            )
+            players_by_id: dict[int, Player] = await async_get_by_ids(
+                session, Player, waitlist_player_ids
+            )
+            in_game_player_ids = await async_player_ids_in_game(
+                session, waitlist_player_ids
             )
             qwp_by_queue_id: dict[str, list[QueueWaitlistPlayer]] = defaultdict(list)
             for qwp in queue_waitlist_players:
@@ -481,17 +538,12 @@ async def queue_waitlist_task():
                 qwps_for_queue = qwp_by_queue_id[queue.id]
                 shuffle(qwps_for_queue)
                 for queue_waitlist_player in qwps_for_queue:
-                    if is_in_game(queue_waitlist_player.player_id):
-                        session.delete(queue_waitlist_player)
+                    if queue_waitlist_player.player_id in in_game_player_ids:
+                        await session.delete(queue_waitlist_player)
                         continue
 
-                    if isinstance(channel, TextChannel) and guild:
-                        player = (
-                            session.query(Player)
-                            .filter(Player.id == queue_waitlist_player.player_id)
-                            .first()
-                        )
-
+                    player = players_by_id.get(queue_waitlist_player.player_id)
+                    if isinstance(channel, TextChannel) and guild and player:
                         add_player_queue.put(
                             AddPlayerQueueMessage(
                                 queue_waitlist_player.player_id,
@@ -514,13 +566,11 @@ async def queue_waitlist_task():
                     )
                 finally:
                     waitlist_messages.clear()
-            ipg_channels: list[InProgressGameChannel] = (
-                session.query(InProgressGameChannel)
-                .filter(
-                    InProgressGameChannel.in_progress_game_id
-                    == queue_waitlist.in_progress_game_id
-                )
-                .all()
+            ipg_channels: list[InProgressGameChannel] = await async_query_all(
+                session,
+                InProgressGameChannel,
+                InProgressGameChannel.in_progress_game_id
+                == queue_waitlist.in_progress_game_id,
             )
             if guild:
                 ipg_discord_channels: list[discord.abc.GuildChannel] = [
@@ -541,21 +591,28 @@ async def queue_waitlist_task():
                         f"[queue_waitlist_task] Failed to delete in_progress_game channels {ipg_discord_channels} from guild {guild.id}"
                     )
             # TODO: deleting channels from the guild and from the DB isn't atomic
-            session.query(InProgressGameChannel).filter(
+            await async_delete_where(
+                session,
+                InProgressGameChannel,
                 InProgressGameChannel.in_progress_game_id
-                == queue_waitlist.in_progress_game_id
-            ).delete()
-            session.query(QueueWaitlistPlayer).filter(
-                QueueWaitlistPlayer.queue_waitlist_id == queue_waitlist.id
-            ).delete()
-            session.delete(queue_waitlist)
-            session.query(InProgressGame).filter(
-                InProgressGame.id == queue_waitlist.in_progress_game_id
-            ).delete()
-        session.commit()
+                == queue_waitlist.in_progress_game_id,
+            )
+            await async_delete_where(
+                session,
+                QueueWaitlistPlayer,
+                QueueWaitlistPlayer.queue_waitlist_id == queue_waitlist.id,
+            )
+            await session.delete(queue_waitlist)
+            await async_delete_where(
+                session,
+                InProgressGame,
+                InProgressGame.id == queue_waitlist.in_progress_game_id,
+            )
+        await session.commit()
 
 
 @tasks.loop(hours=24)
+@track_queries
 async def schedule_task():
     """
     An hour after schedules end, roll over to the next day.
@@ -563,32 +620,33 @@ async def schedule_task():
 
     """
     with ScopedSession() as session:
+        schedules_by_day = ScheduleUtils.get_schedules_by_day(session)
         # cycle message ids for n = 1 through 6
-        previous_message_id = ScheduleUtils.get_schedules_for_nth_embed(0)[
+        previous_message_id = schedules_by_day[0][
             0
         ].message_id  # store first message_id here initially
         current_message_id: int
-        for n in range(1, 7):
-            schedules = ScheduleUtils.get_schedules_for_nth_embed(n)
+        for schedules in schedules_by_day[1:]:
             current_message_id = schedules[0].message_id
             for schedule in schedules:
                 schedule.message_id = previous_message_id
             previous_message_id = current_message_id
 
         # handle n = 0 (today)
-        today_schedules = ScheduleUtils.get_schedules_for_nth_embed(0)
+        today_schedules = schedules_by_day[0]
+        session.query(SchedulePlayer).filter(
+            SchedulePlayer.schedule_id.in_(
+                [schedule.id for schedule in today_schedules]
+            )
+        ).delete()
         for schedule in today_schedules:
             schedule.datetime = schedule.datetime + timedelta(days=7)
-            session.query(SchedulePlayer).filter(
-                SchedulePlayer.schedule_id == schedule.id
-            ).delete()
             schedule.message_id = previous_message_id
 
         session.commit()
 
     # assumes we are only running this bot/database on one guild
-    for n in range(7):
-        await ScheduleUtils.rebuild_embed(bot.guilds[0], n)
+    await ScheduleUtils.rebuild_embeds(bot.guilds[0])
 
 
 @schedule_task.before_loop
@@ -598,8 +656,8 @@ async def delay_schedule_task():
     """
     await bot.wait_until_ready()
 
-    last_schedule_today = ScheduleUtils.get_schedules_for_nth_embed(0)[-1]
-    ScopedSession.remove()
+    with ScopedSession() as session:
+        last_schedule_today = ScheduleUtils.get_schedules_by_day(session)[0][-1]
 
     # can't get timedelta if only one operand has tzinfo, so we convert datetime.now to utc and remove tzinfo
     time_until_target = (
@@ -616,7 +674,18 @@ async def delay_schedule_task():
     await asyncio.sleep(seconds_until_target)
 
 
+@tasks.loop(seconds=config.TABLE_CACHE_CHECK_SECONDS)
+@track_queries
+async def table_cache_task():
+    """
+    Pick up changes that other processes made to the cached tables, see
+    table_cache.py
+    """
+    await db.read(table_cache.refresh)
+
+
 @tasks.loop(seconds=1)
+@track_queries
 async def vote_passed_waitlist_task():
     """
     Move players in the waitlist into the queues. Pop queues if needed.
@@ -626,25 +695,37 @@ async def vote_passed_waitlist_task():
 
     TODO: Tests for this method
     """
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        vpw: VotePassedWaitlist | None = (
-            session.query(VotePassedWaitlist)
-            .filter(VotePassedWaitlist.end_waitlist_at < datetime.now(timezone.utc))
-            .first()
+    async with async_session() as session:
+        vpw: VotePassedWaitlist | None = await async_query_first(
+            session,
+            VotePassedWaitlist,
+            VotePassedWaitlist.end_waitlist_at < datetime.now(timezone.utc),
         )
         if not vpw:
             return
 
         channel = bot.get_channel(vpw.channel_id)
         guild: Guild | None = bot.get_guild(vpw.guild_id)
-        queues: list[Queue] = session.query(Queue).order_by(Queue.created_at.asc())  # type: ignore
+        queues: list[Queue] = await async_query_all(
+            session, Queue, order_by=[Queue.created_at.asc()]
+        )
 
         # TODO: Do we actually need to filter by id?
         vote_passed_waitlist_players: list[VotePassedWaitlistPlayer] = (
-            session.query(VotePassedWaitlistPlayer)
-            .filter(VotePassedWaitlistPlayer.vote_passed_waitlist_id == vpw.id)
-            .all()
+            await async_query_all(
+                session,
+                VotePassedWaitlistPlayer,
+                VotePassedWaitlistPlayer.vote_passed_waitlist_id == vpw.id,
+            )
+        )
+        waitlist_player_ids = list(
+            set(vpwp.player_id for vpwp in vote_passed_waitlist_players)
+        )
+        players_by_id: dict[int, Player] = await async_get_by_ids(
+            session, Player, waitlist_player_ids
+        )
+        in_game_player_ids = await async_player_ids_in_game(
+            session, waitlist_player_ids
         )
         vpwp_by_queue_id: dict[str, list[VotePassedWaitlistPlayer]] = defaultdict(list)
         for vote_passed_waitlist_player in vote_passed_waitlist_players:
@@ -657,17 +738,12 @@ async def vote_passed_waitlist_task():
             vpwps_for_queue = vpwp_by_queue_id[queue.id]
             shuffle(vpwps_for_queue)
             for vote_passed_waitlist_player in vpwps_for_queue:
-                if is_in_game(vote_passed_waitlist_player.player_id):
-                    session.delete(vote_passed_waitlist_player)
+                if vote_passed_waitlist_player.player_id in in_game_player_ids:
+                    await session.delete(vote_passed_waitlist_player)
                     continue
 
-                if isinstance(channel, TextChannel) and guild:
-                    player = (
-                        session.query(Player)
-                        .filter(Player.id == vote_passed_waitlist_player.player_id)
-                        .first()
-                    )
-
+                player = players_by_id.get(vote_passed_waitlist_player.player_id)
+                if isinstance(channel, TextChannel) and guild and player:
                     add_player_queue.put(
                         AddPlayerQueueMessage(
                             vote_passed_waitlist_player.player_id,
@@ -680,21 +756,25 @@ async def vote_passed_waitlist_task():
                         )
                     )
 
-        session.query(VotePassedWaitlistPlayer).filter(
-            VotePassedWaitlistPlayer.vote_passed_waitlist_id == vpw.id
-        ).delete()
-        session.delete(vpw)
-        session.commit()
+        await async_delete_where(
+            session,
+            VotePassedWaitlistPlayer,
+            VotePassedWaitlistPlayer.vote_passed_waitlist_id == vpw.id,
+        )
+        await session.delete(vpw)
+        await session.commit()
 
 
 @tasks.loop(time=config.TRUESKILL_SIGMA_DECAY_JOB_SCHEDULED_TIME)
+@track_queries
 async def sigma_decay_task():
-    session: sqlalchemy.orm.Session
-    with Session() as session:
+    async with async_session() as session:
         # Lookup all categories to calculate sigma cutoffs
         # TODO: If we kill off SQLite we can use INTERVAL to check a time range and have a single join between Category and PlayerCategoryTrueskill
         time_now = datetime.now(timezone.utc)
-        categories = session.query(Category).filter(Category.sigma_decay_amount != 0.0).all()
+        categories: list[Category] = await async_query_all(
+            session, Category, Category.sigma_decay_amount != 0.0
+        )
         category_details = {
             category.id: {
                 'category': category,
@@ -706,13 +786,12 @@ async def sigma_decay_task():
         }
 
         # Find all player trueskill values with a last played game older than the decay grace period
-        player_category_trueskills = (
-            session
-            .query(PlayerCategoryTrueskill)
-            .filter(
-                PlayerCategoryTrueskill.category_id.in_(category_details.keys())
+        player_category_trueskills: list[PlayerCategoryTrueskill] = (
+            await async_query_all(
+                session,
+                PlayerCategoryTrueskill,
+                PlayerCategoryTrueskill.category_id.in_(category_details.keys()),
             )
-            .all()
         )
         for pct in player_category_trueskills:
             # If the last game for this PCT was before the cutoff, apply the decay
@@ -723,4 +802,6 @@ async def sigma_decay_task():
                     config.DEFAULT_TRUESKILL_SIGMA * category.sigma_decay_max_decay_proportion,
                 )
                 pct.rank = pct.mu - (3 * pct.sigma)
-        session.commit()
+        await session.commit()
+        leaderboard.invalidate()
+        percentile_index.update_pcts(player_category_trueskills)
@@ -1,5 +1,7 @@
 # Misc helper functions
 import asyncio
+import copy
+import hashlib
 import itertools
 import logging
 import math
@@ -13,7 +15,6 @@ from random import choices
 from typing import List, Optional
 
 import discord
-import imgkit
 import sqlalchemy.orm.session
 from discord import (
     Colour,
@@ -26,7 +27,6 @@ from discord import (
     PartialMessage,
     TextChannel,
     VoiceChannel,
-    VoiceState,
 )
 from discord.ext.commands.context import Context
 from discord.member import Member
@@ -35,12 +35,30 @@ from PIL import Image
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session as SQLAlchemySession
 from table2ascii import Alignment, Merge, PresetStyle, table2ascii
 from trueskill import Rating, global_env
 
 import discord_bots.config as config
+from discord_bots.async_db_utils import (
+    async_count,
+    async_delete_where,
+    async_query_all,
+    async_query_first,
+    async_session,
+    async_update_by_id,
+    async_update_where,
+)
 from discord_bots.bot import bot
+from discord_bots.finished_game_cache import (
+    DEBUG_TEXT,
+    EMBED,
+    TEXT,
+    finished_game_cache,
+)
+from discord_bots.game_view_model import GameViewModel, load_game_view_model
+from discord_bots.leaderboard import leaderboard
 from discord_bots.models import (
     Category,
     Config,
@@ -50,6 +68,7 @@ from discord_bots.models import (
     InProgressGame,
     InProgressGameChannel,
     InProgressGamePlayer,
+    LeaderboardMessage,
     Map,
     MapVote,
     Player,
@@ -64,8 +83,11 @@ from discord_bots.models import (
     Session,
     SkipMapVote,
 )
+from discord_bots.stats_renderer import stats_renderer
+from discord_bots.voice import VoiceMove, VoiceMoveReport, voice_mover
 
 _log = logging.getLogger(__name__)
+_leaderboard_lock = asyncio.Lock()
 
 
 MU_LOWER_UNICODE = "\u03bc"
@@ -255,87 +277,46 @@ def in_progress_game_str(in_progress_game: InProgressGame, debug: bool = False)
     output = ""
     session: sqlalchemy.orm.Session
     with Session() as session:
-        short_game_id = short_uuid(in_progress_game.id)
-        queue: Queue = (
-            session.query(Queue).filter(Queue.id == in_progress_game.queue_id).first()
-        )
-        if debug:
-            output += f"**{queue.name}** ({short_game_id}) (TS: {round(in_progress_game.average_trueskill, 2)})"
-        else:
-            output += f"**{queue.name}** ({short_game_id})"
-        team0_igp_players: list[InProgressGamePlayer] = session.query(
-            InProgressGamePlayer
-        ).filter(
-            InProgressGamePlayer.in_progress_game_id == in_progress_game.id,
-            InProgressGamePlayer.team == 0,
-        )
-        team1_igp_players: list[InProgressGamePlayer] = session.query(
-            InProgressGamePlayer
-        ).filter(
-            InProgressGamePlayer.in_progress_game_id == in_progress_game.id,
-            InProgressGamePlayer.team == 1,
-        )
-        team0_player_ids = set(map(lambda x: x.player_id, team0_igp_players))
-        team1_player_ids = set(map(lambda x: x.player_id, team1_igp_players))
-        team0_fgp_by_id = {fgp.player_id: fgp for fgp in team0_igp_players}
-        team1_fgp_by_id = {fgp.player_id: fgp for fgp in team1_igp_players}
-        team0_players: list[Player] = session.query(Player).filter(Player.id.in_(team0_player_ids))  # type: ignore
-        team1_players: list[Player] = session.query(Player).filter(Player.id.in_(team1_player_ids))  # type: ignore
-        if debug and False:
-            team0_names = ", ".join(
-                sorted(
-                    [
-                        f"{escape_markdown(player.name)} ({round(team0_fgp_by_id[player.id].rated_trueskill_mu_before, 1)})"
-                        for player in team0_players
-                    ]
-                )
-            )
-            team1_names = ", ".join(
-                sorted(
-                    [
-                        f"{escape_markdown(player.name)} ({round(team1_fgp_by_id[player.id].rated_trueskill_mu_before, 1)})"
-                        for player in team1_players
-                    ]
-                )
-            )
-        else:
-            team0_names = ", ".join(
-                sorted([escape_markdown(player.name) for player in team0_players])
-            )
-            team1_names = ", ".join(
-                sorted([escape_markdown(player.name) for player in team1_players])
-            )
-        # TODO: Include win prob
-        # team0_win_prob = round(100 * finished_game.win_probability, 1)
-        # team1_win_prob = round(100 - team0_win_prob, 1)
-        team0_tsr = round(
-            mean([player.rated_trueskill_mu for player in team0_players]), 1
-        )
-        team1_tsr = round(
-            mean([player.rated_trueskill_mu for player in team1_players]), 1
-        )
-        # TODO: Include win prob
-        if debug:
-            team0_str = f"{in_progress_game.team0_name} ({team0_tsr}): {team0_names}"
-            team1_str = f"{in_progress_game.team1_name} ({team1_tsr}): {team1_names}"
-        else:
-            team0_str = f"{in_progress_game.team0_name} ({team0_names}"
-            team1_str = f"{in_progress_game.team1_name} ({team1_names}"
-
-        output += f"\n{team0_str}"
-        output += f"\n{team1_str}"
-        delta: timedelta = datetime.now(
-            timezone.utc
-        ) - in_progress_game.created_at.replace(tzinfo=timezone.utc)
-        if delta.days > 0:
-            output += f"\n@ {delta.days} days ago\n"
-        elif delta.seconds > 3600:
-            hours_ago = delta.seconds // 3600
-            output += f"\n@ {hours_ago} hours ago\n"
-        else:
-            minutes_ago = delta.seconds // 60
-            output += f"\n@ {minutes_ago} minutes ago\n"
+        game = load_game_view_model(session, in_progress_game.id)
+    if not game:
         return output
+    short_game_id = short_uuid(game.id)
+    if debug:
+        output += f"**{game.queue_name}** ({short_game_id}) (TS: {round(game.average_trueskill, 2)})"
+    else:
+        output += f"**{game.queue_name}** ({short_game_id})"
+    team0_players = game.team(0)
+    team1_players = game.team(1)
+    team0_names = ", ".join(
+        sorted([escape_markdown(player.name) for player in team0_players])
+    )
+    team1_names = ", ".join(
+        sorted([escape_markdown(player.name) for player in team1_players])
+    )
+    # TODO: Include win prob
+    team0_tsr = round(mean([player.rated_trueskill_mu for player in team0_players]), 1)
+    team1_tsr = round(mean([player.rated_trueskill_mu for player in team1_players]), 1)
+    if debug:
+        team0_str = f"{game.team0_name} ({team0_tsr}): {team0_names}"
+        team1_str = f"{game.team1_name} ({team1_tsr}): {team1_names}"
+    else:
+        team0_str = f"{game.team0_name} ({team0_names}"
+        team1_str = f"{game.team1_name} ({team1_names}"
+
+    output += f"\n{team0_str}"
+    output += f"\n{team1_str}"
+    delta: timedelta = datetime.now(timezone.utc) - game.created_at.replace(
+        tzinfo=timezone.utc
+    )
+    if delta.days > 0:
+        output += f"\n@ {delta.days} days ago\n"
+    elif delta.seconds > 3600:
+        hours_ago = delta.seconds // 3600
+        output += f"\n@ {hours_ago} hours ago\n"
+    else:
+        minutes_ago = delta.seconds // 60
+        output += f"\n@ {minutes_ago} minutes ago\n"
+    return output
 
 
 def mock_finished_game_teams_str(
@@ -347,61 +328,50 @@ def mock_finished_game_teams_str(
     Helper method to debug print teams if these were the players
     """
     output = ""
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        team0_rating = [
-            Rating(fgp.rated_trueskill_mu_before, fgp.rated_trueskill_sigma_before)
-            for fgp in team0_fg_players
-        ]
-        team1_rating = [
-            Rating(fgp.rated_trueskill_mu_before, fgp.rated_trueskill_sigma_before)
-            for fgp in team1_fg_players
-        ]
-        team0_player_ids_map = {x.player_id: x for x in team0_fg_players}
-        team1_player_ids_map = {x.player_id: x for x in team1_fg_players}
-        team0_player_ids = set(map(lambda x: x.player_id, team0_fg_players))
-        team1_player_ids = set(map(lambda x: x.player_id, team1_fg_players))
-        team0_players: list[Player] = session.query(Player).filter(
-            Player.id.in_(team0_player_ids)
-        )
-        team1_players: list[Player] = session.query(Player).filter(
-            Player.id.in_(team1_player_ids)
-        )
-        team0_names = ", ".join(
-            sorted(
-                [
-                    f"{escape_markdown(player.name)} ({round(team0_player_ids_map.get(player.id).rated_trueskill_mu_before, 1)})"
-                    for player in team0_players
-                ]
-            )
-        )
-        team1_names = ", ".join(
-            sorted(
-                [
-                    f"{escape_markdown(player.name)} ({round(team1_player_ids_map.get(player.id).rated_trueskill_mu_before, 1)})"
-                    for player in team1_players
-                ]
-            )
-        )
-        team0_win_prob = round(100 * win_probability(team0_rating, team1_rating), 1)
-        team1_win_prob = round(100 - team0_win_prob, 1)
-        team0_mu = round(
-            mean([player.rated_trueskill_mu_before for player in team0_fg_players]), 2
-        )
-        team1_mu = round(
-            mean([player.rated_trueskill_mu_before for player in team1_fg_players]), 2
-        )
-        team0_sigma = round(
-            mean([player.rated_trueskill_sigma_before for player in team0_fg_players]),
-            2,
+    team0_rating = [
+        Rating(fgp.rated_trueskill_mu_before, fgp.rated_trueskill_sigma_before)
+        for fgp in team0_fg_players
+    ]
+    team1_rating = [
+        Rating(fgp.rated_trueskill_mu_before, fgp.rated_trueskill_sigma_before)
+        for fgp in team1_fg_players
+    ]
+    # The rows already carry the player names, no need to look them up
+    team0_names = ", ".join(
+        sorted(
+            [
+                f"{escape_markdown(fgp.player_name)} ({round(fgp.rated_trueskill_mu_before, 1)})"
+                for fgp in team0_fg_players
+            ]
         )
-        team1_sigma = round(
-            mean([player.rated_trueskill_sigma_before for player in team1_fg_players]),
-            2,
+    )
+    team1_names = ", ".join(
+        sorted(
+            [
+                f"{escape_markdown(fgp.player_name)} ({round(fgp.rated_trueskill_mu_before, 1)})"
+                for fgp in team1_fg_players
+            ]
         )
-        output += f"\n**BE** (**{team0_win_prob}%**, mu: {team0_mu}, sigma: {team0_sigma}): {team0_names}"
-        output += f"\n**DS** (**{team1_win_prob}%**, mu: {team1_mu}, sigma: {team1_sigma}): {team1_names}"
-        return output
+    )
+    team0_win_prob = round(100 * win_probability(team0_rating, team1_rating), 1)
+    team1_win_prob = round(100 - team0_win_prob, 1)
+    team0_mu = round(
+        mean([player.rated_trueskill_mu_before for player in team0_fg_players]), 2
+    )
+    team1_mu = round(
+        mean([player.rated_trueskill_mu_before for player in team1_fg_players]), 2
+    )
+    team0_sigma = round(
+        mean([player.rated_trueskill_sigma_before for player in team0_fg_players]),
+        2,
+    )
+    team1_sigma = round(
+        mean([player.rated_trueskill_sigma_before for player in team1_fg_players]),
+        2,
+    )
+    output += f"\n**BE** (**{team0_win_prob}%**, mu: {team0_mu}, sigma: {team0_sigma}): {team0_names}"
+    output += f"\n**DS** (**{team1_win_prob}%**, mu: {team1_mu}, sigma: {team1_sigma}): {team1_names}"
+    return output
 
 
 def is_in_game(player_id: int) -> bool:
@@ -443,10 +413,56 @@ def get_player_game(player_id: int, session=None) -> InProgressGame | None:
         return None
 
 
+async def async_player_ids_in_game(
+    session: AsyncSession, player_ids: list[int] | None = None
+) -> set[int]:
+    """
+    The ids of the players that are in an in progress game, optionally
+    limited to player_ids
+    """
+    query = select(InProgressGamePlayer.player_id).join(
+        InProgressGame, InProgressGame.id == InProgressGamePlayer.in_progress_game_id
+    )
+    if player_ids is not None:
+        if not player_ids:
+            return set()
+        query = query.where(InProgressGamePlayer.player_id.in_(player_ids))
+    return set((await session.scalars(query)).all())
+
+
+async def async_is_in_game(session: AsyncSession, player_id: int) -> bool:
+    return player_id in await async_player_ids_in_game(session, [player_id])
+
+
 def finished_game_str(finished_game: FinishedGame, debug: bool = False) -> str:
     """
     Helper method to pretty print a finished game
     """
+    kind = DEBUG_TEXT if debug else TEXT
+    output: str | None = finished_game_cache.get(
+        kind, finished_game.id, finished_game.winning_team
+    )
+    if output is None:
+        output = _render_finished_game_str(finished_game, debug)
+        finished_game_cache.put(
+            kind, finished_game.id, finished_game.winning_team, output
+        )
+    # How long ago the game finished changes, so it is never cached
+    delta: timedelta = datetime.now(timezone.utc) - finished_game.finished_at.replace(
+        tzinfo=timezone.utc
+    )
+    if delta.days > 0:
+        output += f"\n@ {delta.days} days ago\n"
+    elif delta.seconds > 3600:
+        hours_ago = delta.seconds // 3600
+        output += f"\n@ {hours_ago} hours ago\n"
+    else:
+        minutes_ago = delta.seconds // 60
+        output += f"\n@ {minutes_ago} minutes ago\n"
+    return output
+
+
+def _render_finished_game_str(finished_game: FinishedGame, debug: bool) -> str:
     output = ""
     session: sqlalchemy.orm.Session
     with Session() as session:
@@ -517,17 +533,6 @@ def finished_game_str(finished_game: FinishedGame, debug: bool = False) -> str:
         else:
             output += f"\n{team0_str}"
             output += f"\n{team1_str}"
-        delta: timedelta = datetime.now(
-            timezone.utc
-        ) - finished_game.finished_at.replace(tzinfo=timezone.utc)
-        if delta.days > 0:
-            output += f"\n@ {delta.days} days ago\n"
-        elif delta.seconds > 3600:
-            hours_ago = delta.seconds // 3600
-            output += f"\n@ {hours_ago} hours ago\n"
-        else:
-            minutes_ago = delta.seconds // 60
-            output += f"\n@ {minutes_ago} minutes ago\n"
         return output
 
 
@@ -571,6 +576,17 @@ def short_uuid(uuid: str) -> str:
     return uuid.split("-")[0]
 
 
+def game_id_filter(model: type[InProgressGame] | type[FinishedGame], game_id: str):
+    """
+    Filter clause matching the game with the id a player gave: the short id
+    (an indexed exact match), or the full id if one is given
+    """
+    if "-" in game_id:
+        id_column = model.game_id if model is FinishedGame else model.id
+        return id_column == game_id
+    return model.short_id == game_id
+
+
 def utc_now_naive() -> datetime:
     """
     Get current UTC time as timezone-naive datetime.
@@ -617,17 +633,36 @@ async def upload_stats_screenshot_selenium(ctx: Context, cleanup=True):
                 os.remove(os.path.join(config.STATS_DIR, file_))
 
 
+def _game_view_player_names(game_view: GameViewModel) -> tuple[list[str], list[str]]:
+    team0_player_names = [player.display_name for player in game_view.team(0)]
+    team1_player_names = [player.display_name for player in game_view.team(1)]
+    if config.SHOW_CAPTAINS:
+        if team0_player_names:
+            team0_player_names[0] = "(C) " + team0_player_names[0]
+        if team1_player_names:
+            team1_player_names[0] = "(C) " + team1_player_names[0]
+    # sort the names alphabetically and caselessly to make them easier to read
+    team0_player_names.sort(key=str.casefold)
+    team1_player_names.sort(key=str.casefold)
+    return team0_player_names, team1_player_names
+
+
 async def create_in_progress_game_embed(
-    session: sqlalchemy.orm.Session,
+    session: sqlalchemy.orm.Session | None,
     game: InProgressGame,
     guild: discord.Guild,
     show_map_image: bool = True,
+    game_view: GameViewModel | None = None,
 ) -> Embed:
-    queue: Queue | None = session.query(Queue).filter(Queue.id == game.queue_id).first()
+    """
+    The session is only used to load the game_view if it isn't passed in
+    """
+    if game_view is None and session is not None:
+        game_view = load_game_view_model(session, game.id)
     embed: discord.Embed
-    if queue:
+    if game_view and game_view.queue_name:
         embed = Embed(
-            title=f"🚩 In Progress Game '{queue.name}' ({short_uuid(game.id)})",
+            title=f"🚩 In Progress Game '{game_view.queue_name}' ({short_uuid(game.id)})",
             color=discord.Color.blue(),
         )
     else:
@@ -640,76 +675,10 @@ async def create_in_progress_game_embed(
         tzinfo=timezone.utc
     )  # timezones aren't stored in the DB, so add it ourselves
     timestamp = discord.utils.format_dt(aware_db_datetime, style="R")
-    non_position_result: list[str] | None = (
-        session.query(Player.name)
-        .join(InProgressGamePlayer, Player.id == InProgressGamePlayer.player_id)
-        .filter(
-            InProgressGamePlayer.in_progress_game_id == game.id,
-            InProgressGamePlayer.team == 0,
-        )
-        .all()
-    )
-    position_result: list[str] | None = (
-        session.query(Player.name, Position.short_name)
-        .join(InProgressGamePlayer, Player.id == InProgressGamePlayer.player_id)
-        .join(Position, InProgressGamePlayer.position_id == Position.id)
-        .filter(
-            InProgressGamePlayer.in_progress_game_id == game.id,
-            InProgressGamePlayer.team == 0,
-        )
-        .all()
-    )
-    if position_result:
-        team0_player_names: list[str] = (
-            [f"{name[0]} ({name[1]})" for name in position_result if name]
-            if position_result
-            else []
-        )
-    else:
-        team0_player_names: list[str] = (
-            [f"{name[0]}" for name in non_position_result if name]
-            if non_position_result
-            else []
-        )
-    non_position_result: list[str] | None = (
-        session.query(Player.name)
-        .join(InProgressGamePlayer, Player.id == InProgressGamePlayer.player_id)
-        .filter(
-            InProgressGamePlayer.in_progress_game_id == game.id,
-            InProgressGamePlayer.team == 1,
-        )
-        .all()
-    )
-    position_result: list[str] | None = (
-        session.query(Player.name, Position.short_name)
-        .join(InProgressGamePlayer, Player.id == InProgressGamePlayer.player_id)
-        .join(Position, InProgressGamePlayer.position_id == Position.id)
-        .filter(
-            InProgressGamePlayer.in_progress_game_id == game.id,
-            InProgressGamePlayer.team == 1,
-        )
-        .all()
-    )
-    if position_result:
-        team1_player_names: list[str] = (
-            [f"{name[0]} ({name[1]})" for name in position_result if name]
-            if position_result
-            else []
-        )
-    else:
-        team1_player_names: list[str] = (
-            [f"{name[0]}" for name in non_position_result if name]
-            if non_position_result
-            else []
-        )
-    if config.SHOW_CAPTAINS:
-        if team0_player_names:
-            team0_player_names[0] = "(C) " + team0_player_names[0]
-        if team1_player_names:
-            team1_player_names[0] = "(C) " + team1_player_names[0]
-    # sort the names alphabetically and caselessly to make them easier to read
-    team0_player_names.sort(key=str.casefold)
-    team1_player_names.sort(key=str.casefold)
+    team0_player_names: list[str] = []
+    team1_player_names: list[str] = []
+    if game_view:
+        team0_player_names, team1_player_names = _game_view_player_names(game_view)
     newline = "\n"
     embed.add_field(
         name=f"🔴 {game.team0_name} ({round(100 * game.win_probability, 1)}%)",
@@ -751,31 +720,25 @@ async def create_in_progress_game_embed(
             inline=True,
         )
     add_empty_field(embed, offset=3)
-    if show_map_image:
-        map: Map | None = (
-            session.query(Map)
-            .filter(
-                or_(
-                    Map.full_name == game.map_full_name,
-                    Map.short_name == game.map_short_name,
-                )
-            )
-            .first()
-        )
-        if map and map.image_url:
-            embed.set_image(url=map.image_url)
+    if show_map_image and game_view and game_view.map_image_url:
+        embed.set_image(url=game_view.map_image_url)
     return embed
 
 
 async def create_condensed_in_progress_game_embed(
     session: sqlalchemy.orm.Session,
     game: InProgressGame,
+    game_view: GameViewModel | None = None,
 ) -> Embed:
-    queue: Queue | None = session.query(Queue).filter(Queue.id == game.queue_id).first()
+    """
+    Pass in game_view when rendering several games, see load_game_view_models
+    """
+    if game_view is None:
+        game_view = load_game_view_model(session, game.id)
     embed: discord.Embed
-    if queue:
+    if game_view and game_view.queue_name:
         embed = Embed(
-            title=f"🚩 In Progress Game '{queue.name}' ({short_uuid(game.id)})",
+            title=f"🚩 In Progress Game '{game_view.queue_name}' ({short_uuid(game.id)})",
             color=discord.Color.blue(),
         )
     else:
@@ -788,58 +751,10 @@ async def create_condensed_in_progress_game_embed(
         tzinfo=timezone.utc
     )  # timezones aren't stored in the DB, so add it ourselves
     timestamp = discord.utils.format_dt(aware_db_datetime, style="R")
-    result: list[str] | None = (
-        session.query(Player.name, InProgressGamePlayer.position_id)
-        .join(InProgressGamePlayer, Player.id == InProgressGamePlayer.player_id)
-        .filter(
-            InProgressGamePlayer.in_progress_game_id == game.id,
-            InProgressGamePlayer.team == 0,
-        )
-        .all()
-    )
     team0_player_names: list[str] = []
-    for igp in result:
-        if igp.position_id:
-            position = (
-                session.query(Position).filter(Position.id == igp.position_id).first()
-            )
-            if position:
-                team0_player_names.append(f"{igp.name} ({position.short_name})")
-            else:
-                team0_player_names.append(f"{igp.name}")
-        else:
-            team0_player_names.append(f"{igp.name}")
-    result: list[str] | None = (
-        session.query(Player.name, InProgressGamePlayer.position_id)
-        .join(InProgressGamePlayer, Player.id == InProgressGamePlayer.player_id)
-        .filter(
-            InProgressGamePlayer.in_progress_game_id == game.id,
-            InProgressGamePlayer.team == 1,
-        )
-        .all()
-    )
     team1_player_names: list[str] = []
-    for igp in result:
-        if igp.position_id:
-            position = (
-                session.query(Position).filter(Position.id == igp.position_id).first()
-            )
-            if position:
-                team1_player_names.append(f"{igp.name} ({position.short_name})")
-            else:
-                team1_player_names.append(f"{igp.name}")
-        else:
-            team1_player_names.append(f"{igp.name}")
-
-    if config.SHOW_CAPTAINS:
-        if team0_player_names:
-            team0_player_names[0] = "(C) " + team0_player_names[0]
-        if team1_player_names:
-            team1_player_names[0] = "(C) " + team1_player_names[0]
-
-    # sort the names alphabetically and caselessly to make them easier to read
-    team0_player_names.sort(key=str.casefold)
-    team1_player_names.sort(key=str.casefold)
+    if game_view:
+        team0_player_names, team1_player_names = _game_view_player_names(game_view)
     content = ""
     content += f"🗺️ Map: **{game.map_full_name} ({game.map_short_name})**"
     content += f"\n🔴 {game.team0_name} ({round(100 * game.win_probability, 1)}%):"
@@ -854,18 +769,8 @@ async def create_condensed_in_progress_game_embed(
     )
     content += f"\n*{timestamp}*"
     embed.description = content
-    map: Map | None = (
-        session.query(Map)
-        .filter(
-            or_(
-                Map.full_name == game.map_full_name,
-                Map.short_name == game.map_short_name,
-            )
-        )
-        .first()
-    )
-    if map and map.image_url:
-        embed.set_thumbnail(url=map.image_url)
+    if game_view and game_view.map_image_url:
+        embed.set_thumbnail(url=game_view.map_image_url)
     return embed
 
 
@@ -896,6 +801,60 @@ def create_finished_game_embed(
             description=f"Oops! Could not find the Finished Game...️☹️",
             color=discord.Color.red(),
         )
+    embed = get_cached_finished_game_embed(finished_game)
+    if embed is None:
+        finished_game_players: list[FinishedGamePlayer] = (
+            session.query(FinishedGamePlayer)
+            .filter(FinishedGamePlayer.finished_game_id == finished_game.id)
+            .all()
+        )
+        map: Map | None = (
+            session.query(Map)
+            .filter(
+                or_(
+                    Map.full_name == finished_game.map_full_name,
+                    Map.short_name == finished_game.map_short_name,
+                )
+            )
+            .first()
+        )
+        embed = build_finished_game_embed(finished_game, finished_game_players, map)
+        cache_finished_game_embed(finished_game, embed)
+    if name_tuple is not None:
+        user_name, display_name = name_tuple[0], name_tuple[1]
+        embed.set_footer(text=f"Finished by {display_name} ({user_name})")
+    return embed
+
+
+def get_cached_finished_game_embed(finished_game: FinishedGame) -> Embed | None:
+    cached: dict | None = finished_game_cache.get(
+        EMBED, finished_game.id, finished_game.winning_team
+    )
+    if cached is None:
+        return None
+    # Callers modify the embed, so never hand out the cached dict itself
+    return Embed.from_dict(copy.deepcopy(cached))
+
+
+def cache_finished_game_embed(finished_game: FinishedGame, embed: Embed):
+    finished_game_cache.put(
+        EMBED,
+        finished_game.id,
+        finished_game.winning_team,
+        copy.deepcopy(embed.to_dict()),
+    )
+
+
+def build_finished_game_embed(
+    finished_game: FinishedGame,
+    finished_game_players: list[FinishedGamePlayer],
+    map: Map | None,
+    name_tuple: Optional[tuple[str, str]] = None,  # (user_name, display_name)
+) -> Embed:
+    """
+    Renders a finished game from rows that have already been loaded, so that
+    callers showing many games can load them in bulk
+    """
     embed = Embed(
         title=f"✅ Game '{finished_game.queue_name}' ({short_uuid(finished_game.game_id)}) Results",
         color=Colour.green(),
@@ -903,34 +862,17 @@ def create_finished_game_embed(
     if name_tuple is not None:
         user_name, display_name = name_tuple[0], name_tuple[1]
         embed.set_footer(text=f"Finished by {display_name} ({user_name})")
-    result = (
-        session.query(FinishedGamePlayer)
-        .filter(
-            FinishedGamePlayer.finished_game_id == finished_game.id,
-            FinishedGamePlayer.team == 0,
-        )
-        .all()
-    )
     team0_player_names: list[str] = []
-    for p in result:
-        if p.position_name:
-            team0_player_names.append(f"{p.player_name} ({p.position_name})")
-        else:
-            team0_player_names.append(f"{p.player_name}")
-    result = (
-        session.query(FinishedGamePlayer)
-        .filter(
-            FinishedGamePlayer.finished_game_id == finished_game.id,
-            FinishedGamePlayer.team == 1,
-        )
-        .all()
-    )
     team1_player_names: list[str] = []
-    for p in result:
+    for p in finished_game_players:
         if p.position_name:
-            team1_player_names.append(f"{p.player_name} ({p.position_name})")
+            player_name = f"{p.player_name} ({p.position_name})"
         else:
-            team1_player_names.append(f"{p.player_name}")
+            player_name = f"{p.player_name}"
+        if p.team == 0:
+            team0_player_names.append(player_name)
+        elif p.team == 1:
+            team1_player_names.append(player_name)
     # sort the names alphabetically and caselessly to make them easier to read
     team0_player_names.sort(key=str.casefold)
     team1_player_names.sort(key=str.casefold)
@@ -988,16 +930,6 @@ def create_finished_game_embed(
             value=round(finished_game.average_trueskill, 2),
             inline=True,
         )
-    map: Map | None = (
-        session.query(Map)
-        .filter(
-            or_(
-                Map.full_name == finished_game.map_full_name,
-                Map.short_name == finished_game.map_short_name,
-            )
-        )
-        .first()
-    )
     if map and map.image_url:
         embed.set_image(url=map.image_url)
     return embed
@@ -1093,40 +1025,8 @@ uploaded to a centralized channel
 async def upload_stats_screenshot_imgkit_interaction(
     interaction: discord.Interaction, cleanup=True
 ):
-    # Assume the most recently modified HTML file is the correct stat sheet
-    if not config.STATS_DIR:
-        return
-
-    html_files = list(
-        filter(lambda x: x.endswith(".html"), os.listdir(config.STATS_DIR))
-    )
-    html_files.sort(
-        key=lambda x: os.path.getmtime(os.path.join(config.STATS_DIR, x)), reverse=True
-    )
-
-    if len(html_files) == 0:
-        return
-
-    image_path = os.path.join(config.STATS_DIR, html_files[0] + ".png")
-    imgkit.from_file(
-        os.path.join(config.STATS_DIR, html_files[0]),
-        image_path,
-        options={"enable-local-file-access": None},
-    )
-    if config.STATS_WIDTH and config.STATS_HEIGHT:
-        image = Image.open(image_path)
-        cropped = image.crop((0, 0, config.STATS_WIDTH, config.STATS_HEIGHT))
-        cropped.save(image_path)
-
-    await interaction.channel.send(
-        file=discord.File(image_path)
-    )  # ideally edit the original resonse, but sending to the channel is fine
-
-    # Clean up everything
-    if cleanup:
-        for file_ in os.listdir(config.STATS_DIR):
-            if file_.endswith(".png") or file_.endswith(".html"):
-                os.remove(os.path.join(config.STATS_DIR, file_))
+    # ideally edit the original resonse, but sending to the channel is fine
+    await stats_renderer.submit(interaction.channel, cleanup)
 
 
 """
@@ -1137,38 +1037,8 @@ Temporary function until we have a shared match history channel
 async def upload_stats_screenshot_imgkit_channel(
     channel: TextChannel | DMChannel | GroupChannel, cleanup=True
 ):
-    # Assume the most recently modified HTML file is the correct stat sheet
-    if not config.STATS_DIR:
-        return
-
-    html_files = list(
-        filter(lambda x: x.endswith(".html"), os.listdir(config.STATS_DIR))
-    )
-    html_files.sort(
-        key=lambda x: os.path.getmtime(os.path.join(config.STATS_DIR, x)), reverse=True
-    )
-
-    if len(html_files) == 0:
-        return
-
-    image_path = os.path.join(config.STATS_DIR, html_files[0] + ".png")
-    imgkit.from_file(
-        os.path.join(config.STATS_DIR, html_files[0]),
-        image_path,
-        options={"enable-local-file-access": None},
-    )
-    if config.STATS_WIDTH and config.STATS_HEIGHT:
-        image = Image.open(image_path)
-        cropped = image.crop((0, 0, config.STATS_WIDTH, config.STATS_HEIGHT))
-        cropped.save(image_path)
-
-    await channel.send(file=discord.File(image_path))
-
-    # Clean up everything
-    if cleanup:
-        for file_ in os.listdir(config.STATS_DIR):
-            if file_.endswith(".png") or file_.endswith(".html"):
-                os.remove(os.path.join(config.STATS_DIR, file_))
+    # Rendering happens in the background, the image is posted once it's ready
+    await stats_renderer.submit(channel, cleanup)
 
 
 def win_probability_matchmaking(team0: list[Rating], team1: list[Rating]) -> float:
@@ -1212,10 +1082,9 @@ async def execute_map_rotation(rotation_id: str, is_verbose: bool):
     :is_verbose: specifies if we want to see queues affected in the bot response.
         currently passing in False for when game pops, True for everything else.
     """
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        rotation: Rotation | None = (
-            session.query(Rotation).filter(Rotation.id == rotation_id).first()
+    async with async_session() as session:
+        rotation: Rotation | None = await async_query_first(
+            session, Rotation, Rotation.id == rotation_id
         )
         if not rotation:
             _log.warning(
@@ -1224,34 +1093,32 @@ async def execute_map_rotation(rotation_id: str, is_verbose: bool):
             return
 
         if rotation.is_random:
-            all_rotation_maps: list[RotationMap] = (
-                session.query(RotationMap)
-                .filter(RotationMap.rotation_id == rotation_id)
-                .all()
+            all_rotation_maps: list[RotationMap] = await async_query_all(
+                session, RotationMap, RotationMap.rotation_id == rotation_id
             )
 
-            history_length = (
-                session.query(RotationMapHistory)
-                .filter(RotationMapHistory.rotation_id == rotation_id)
-                .count()
+            history_length = await async_count(
+                session,
+                RotationMapHistory,
+                RotationMapHistory.rotation_id == rotation_id,
             )
             rank_subquery = (
-                session.query(
+                select(
                     RotationMapHistory.rotation_map_id,
                     func.rank()
                     .over(order_by=RotationMapHistory.selected_at.desc())
                     .label("rank"),
                 )
-                .filter(RotationMapHistory.rotation_id == rotation_id)
+                .where(RotationMapHistory.rotation_id == rotation_id)
                 .subquery()
             )
             history = (
-                session.query(
-                    rank_subquery.c.rotation_map_id, func.min(rank_subquery.c.rank)
+                await session.execute(
+                    select(
+                        rank_subquery.c.rotation_map_id, func.min(rank_subquery.c.rank)
+                    ).group_by(rank_subquery.c.rotation_map_id)
                 )
-                .group_by(rank_subquery.c.rotation_map_id)
-                .all()
-            )
+            ).all()
 
             maps_for_random = []
             for m in all_rotation_maps:
@@ -1291,16 +1158,14 @@ async def execute_map_rotation(rotation_id: str, is_verbose: bool):
                 weights=[x.random_weight for x in eligible_maps],
             )[0]
         else:
-            current_rotation_map: RotationMap | None = (
-                session.query(RotationMap)
-                .filter(RotationMap.rotation_id == rotation_id)
-                .filter(RotationMap.is_next == True)
-                .first()
+            current_rotation_map: RotationMap | None = await async_query_first(
+                session,
+                RotationMap,
+                RotationMap.rotation_id == rotation_id,
+                RotationMap.is_next == True,
             )
-            rotation_map_length = (
-                session.query(RotationMap)
-                .filter(RotationMap.rotation_id == rotation_id)
-                .count()
+            rotation_map_length = await async_count(
+                session, RotationMap, RotationMap.rotation_id == rotation_id
             )
             following_ordinal = (
                 current_rotation_map.ordinal + 1 if current_rotation_map else 1
@@ -1308,11 +1173,11 @@ async def execute_map_rotation(rotation_id: str, is_verbose: bool):
             if following_ordinal > rotation_map_length:
                 following_ordinal = 1
 
-            following_map: RotationMap | None = (
-                session.query(RotationMap)
-                .filter(RotationMap.rotation_id == rotation_id)
-                .filter(RotationMap.ordinal == following_ordinal)
-                .first()
+            following_map: RotationMap | None = await async_query_first(
+                session,
+                RotationMap,
+                RotationMap.rotation_id == rotation_id,
+                RotationMap.ordinal == following_ordinal,
             )
             if not following_map:
                 _log.error(
@@ -1336,59 +1201,63 @@ async def update_next_map(
     :is_verbose: specifies if we want to see queues affected in the bot response.
         currently passing in False for when game pops, True for everything else.
     """
-    session: sqlalchemy.orm.Session
-    with Session() as session:
-        next_rotation_map: RotationMap = (
-            session.query(RotationMap)
-            .filter(RotationMap.id == new_rotation_map_id)
-            .one()
+    async with async_session() as session:
+        await async_update_where(
+            session,
+            RotationMap,
+            RotationMap.rotation_id == rotation_id,
+            RotationMap.is_next == True,
+            is_next=False,
+        )
+        await async_update_by_id(
+            session, RotationMap, new_rotation_map_id, is_next=True
         )
-        session.query(RotationMap).filter(
-            RotationMap.rotation_id == rotation_id
-        ).filter(RotationMap.is_next == True).update({"is_next": False})
-        next_rotation_map.is_next = True
+        next_rotation_map: RotationMap = (
+            await session.scalars(
+                select(RotationMap).where(RotationMap.id == new_rotation_map_id)
+            )
+        ).one()
 
         history = RotationMapHistory(
             rotation_id=rotation_id, rotation_map_id=new_rotation_map_id
         )
         session.add(history)
 
-        map_votes: list[MapVote] = (
-            session.query(MapVote)
-            .join(RotationMap, RotationMap.id == MapVote.rotation_map_id)
-            .filter(RotationMap.rotation_id == rotation_id)
-            .all()
+        await async_delete_where(
+            session,
+            MapVote,
+            MapVote.rotation_map_id.in_(
+                select(RotationMap.id).where(RotationMap.rotation_id == rotation_id)
+            ),
         )
-        for map_vote in map_votes:
-            session.delete(map_vote)
-        session.query(SkipMapVote).filter(
-            SkipMapVote.rotation_id == rotation_id
-        ).delete()
-        session.commit()
+        await async_delete_where(
+            session, SkipMapVote, SkipMapVote.rotation_id == rotation_id
+        )
+        await session.commit()
 
         channel = bot.get_channel(config.CHANNEL_ID)
         if isinstance(channel, discord.TextChannel):
             if is_verbose:
-                next_map: Map = (
-                    session.query(Map).filter(Map.id == next_rotation_map.map_id).one()
+                next_map: Map | None = await async_query_first(
+                    session, Map, Map.id == next_rotation_map.map_id
                 )
-                affected_queues: list[Queue] = (
-                    session.query(Queue).filter(Queue.rotation_id == rotation_id).all()
+                affected_queues: list[Queue] = await async_query_all(
+                    session, Queue, Queue.rotation_id == rotation_id
                 )
                 affected_queue_names = [queue.name for queue in affected_queues]
 
-                queue_is_empty: bool = True
-                for queue in affected_queues:
-                    queue_players: list[QueuePlayer] = (
-                        session.query(QueuePlayer)
-                        .filter(QueuePlayer.queue_id == queue.id)
-                        .all()
+                queue_is_empty: bool = (
+                    await async_count(
+                        session,
+                        QueuePlayer,
+                        QueuePlayer.queue_id.in_(
+                            [queue.id for queue in affected_queues]
+                        ),
                     )
-                    if len(queue_players) != 0:
-                        queue_is_empty = False
-                        break
+                    == 0
+                )
 
-                if not queue_is_empty:
+                if next_map and not queue_is_empty:
                     await send_message(
                         channel,
                         embed_title=f"Next Map rotated to {next_map.full_name}",
@@ -1481,7 +1350,7 @@ async def send_message(
 
 
 async def print_leaderboard():
-    message_content = ""
+    sections: list[str] = []
     session: SQLAlchemySession
     with Session() as session:
         categories: list[Category] = (
@@ -1490,60 +1359,33 @@ async def print_leaderboard():
             .order_by("name")
             .all()
         )
+        leaderboard.ensure_loaded(session)
         if len(categories) > 0:
             for i, category in enumerate(categories):
-                subquery = (
-                    session.query(FinishedGamePlayer.player_id)
-                    .join(
-                        FinishedGame,
-                        FinishedGame.id == FinishedGamePlayer.finished_game_id,
-                    )
-                    .filter(
-                        FinishedGame.started_at
-                        > (datetime.now(timezone.utc) - timedelta(days=30))
-                    )
-                    .filter(FinishedGame.category_name == category.name)
-                    .group_by(FinishedGamePlayer.player_id)
-                    .having(func.count() >= category.min_games_for_leaderboard)
-                    .subquery()
+                top_10 = leaderboard.top(
+                    category.id,
+                    category.name,
+                    category.min_games_for_leaderboard,
                 )
-                top_10_pcts: list[PlayerCategoryTrueskill] | None = (
-                    session.query(PlayerCategoryTrueskill)
-                    .join(Player, Player.id == PlayerCategoryTrueskill.player_id)
-                    .filter(PlayerCategoryTrueskill.player_id.in_(select(subquery)))
-                    .filter(PlayerCategoryTrueskill.category_id == category.id)
-                    .filter(Player.leaderboard_enabled == True)
-                    .order_by(PlayerCategoryTrueskill.rank.desc())
-                    .limit(10)
-                    .all()
-                )
-                if top_10_pcts:
-                    message_content += f"**{category.name} Leaderboard**"
+                if top_10:
                     cols = []
-                    for i, pct in enumerate(top_10_pcts, 1):
-                        # TODO: merge this with the pct query
-                        player: Player | None = (
-                            session.query(Player)
-                            .filter(Player.id == pct.player_id)
-                            .first()
-                        )
-                        if player:
-                            if i == 1:
-                                player_name = f"{player.name}🥇"
-                            elif i == 2:
-                                player_name = f"{player.name}🥈"
-                            elif i == 3:
-                                player_name = f"{player.name}🥉"
-                            else:
-                                player_name = player.name
-                            col = [
-                                i,
-                                round(pct.rank, 1),
-                                round(pct.mu, 1),
-                                round(pct.sigma, 1),
-                                player_name,
-                            ]
-                            cols.append(col)
+                    for i, (entry, player) in enumerate(top_10, 1):
+                        if i == 1:
+                            player_name = f"{player.name}🥇"
+                        elif i == 2:
+                            player_name = f"{player.name}🥈"
+                        elif i == 3:
+                            player_name = f"{player.name}🥉"
+                        else:
+                            player_name = player.name
+                        col = [
+                            i,
+                            round(entry.rank, 1),
+                            round(entry.mu, 1),
+                            round(entry.sigma, 1),
+                            player_name,
+                        ]
+                        cols.append(col)
                     if category.min_games_for_leaderboard > 0:
                         footer = [
                             f"Min. {category.min_games_for_leaderboard} {'games' if category.min_games_for_leaderboard > 1 else 'game'} played in the last 30 days",
@@ -1573,45 +1415,139 @@ async def print_leaderboard():
                         ],
                         footer=footer,
                     )
-                    message_content += f"{code_block(table)}"
+                    sections.append(
+                        f"**{category.name} Leaderboard**{code_block(table)}"
+                    )
         if config.ECONOMY_ENABLED:
             # TODO: merge with new leaderboard style
-            message_content += f"\n**{config.CURRENCY_NAME}**"
+            economy_content = f"**{config.CURRENCY_NAME}**"
             top_10_player_currency: list[Player] = (
                 session.query(Player).order_by(Player.currency.desc()).limit(10)
             )
             for i, player_currency in enumerate(top_10_player_currency, 1):
-                message_content += (
+                economy_content += (
                     f"\n{i}. {player_currency.currency} - <@{player_currency.id}>"
                 )
+            sections.append(economy_content)
 
-    message_content += (
+    sections.append(
         f"Last updated: {discord.utils.format_dt(discord.utils.utcnow(), 'R')}"
-    )
-    message_content += (
-        "\n*`/player toggleleaderboard` to show/hide yourself from the leaderboard*"
+        + "\n*`/player toggleleaderboard` to show/hide yourself from the leaderboard*"
     )
 
     if config.LEADERBOARD_CHANNEL:
         leaderboard_channel = bot.get_channel(config.LEADERBOARD_CHANNEL)
         if leaderboard_channel and isinstance(leaderboard_channel, TextChannel):
-            try:
-                if leaderboard_channel.last_message_id:
-                    last_message: Message = await leaderboard_channel.fetch_message(
-                        leaderboard_channel.last_message_id
+            async with _leaderboard_lock:
+                await publish_leaderboard_pages(
+                    leaderboard_channel, paginate_sections(sections)
+                )
+
+
+def paginate_sections(sections: list[str], max_length: int = 2000) -> list[str]:
+    """
+    Pack sections into as few messages as possible without splitting a section
+    across messages. Sections that don't fit in a single message on their own
+    are split by line.
+    """
+    pages: list[str] = []
+    current = ""
+    for section in sections:
+        if len(section) > max_length:
+            lines = section.split("\n")
+            section = ""
+            for line in lines:
+                line = line[:max_length]
+                if section and len(section) + len(line) + 1 > max_length:
+                    if current:
+                        pages.append(current)
+                        current = ""
+                    pages.append(section)
+                    section = line
+                else:
+                    section = f"{section}\n{line}" if section else line
+        if current and len(current) + len(section) + 1 > max_length:
+            pages.append(current)
+            current = ""
+        current = f"{current}\n{section}" if current else section
+    if current:
+        pages.append(current)
+    return pages
+
+
+async def publish_leaderboard_pages(channel: TextChannel, pages: list[str]):
+    """
+    Post the leaderboard as a fixed set of messages whose ids are stored in the
+    database. Pages whose content hasn't changed are left alone and the rest are
+    edited in place, so no fetch is needed and other messages in the channel
+    don't get in the way. Pages are only sent when the leaderboard grows or a
+    stored message has been deleted.
+    """
+    session: SQLAlchemySession
+    with Session() as session:
+        leaderboard_messages: list[LeaderboardMessage] = (
+            session.query(LeaderboardMessage)
+            .filter(LeaderboardMessage.channel_id == channel.id)
+            .order_by(LeaderboardMessage.page)
+            .all()
+        )
+        messages_by_page = {lm.page: lm for lm in leaderboard_messages}
+        for page, content in enumerate(pages):
+            content_hash = hashlib.sha256(content.encode()).hexdigest()
+            leaderboard_message = messages_by_page.get(page)
+            if leaderboard_message:
+                if leaderboard_message.content_hash == content_hash:
+                    continue
+                try:
+                    await channel.get_partial_message(
+                        leaderboard_message.message_id
+                    ).edit(content=content)
+                except discord.NotFound:
+                    # Someone deleted the page, remove it so it gets reposted
+                    _log.info(
+                        f"[publish_leaderboard_pages] Message {leaderboard_message.message_id} for page {page} not found, reposting"
+                    )
+                    session.delete(leaderboard_message)
+                    session.flush()
+                    leaderboard_message = None
+                else:
+                    leaderboard_message.content_hash = content_hash
+            if not leaderboard_message:
+                message = await channel.send(content=content)
+                session.add(
+                    LeaderboardMessage(
+                        channel_id=channel.id,
+                        page=page,
+                        message_id=message.id,
+                        content_hash=content_hash,
                     )
-                if last_message:
-                    await last_message.edit(content=message_content)
-                    return
-            except Exception as e:
-                pass
-            if len(message_content) > 2000:
-                _log.warning(
-                    "[print_leaderboard] The leaderboard is > 2000 characters. Try reducing its length by removing categories"
                 )
-            await leaderboard_channel.send(
-                content=message_content[:2000]
-            )  # TODO: paginate this instead
+            # Commit per page so that a failure part way through doesn't lose
+            # track of messages that were already sent
+            session.commit()
+
+        # The leaderboard shrunk, clean up the pages that are no longer used
+        for leaderboard_message in leaderboard_messages:
+            if leaderboard_message.page < len(pages):
+                continue
+            try:
+                await channel.get_partial_message(
+                    leaderboard_message.message_id
+                ).delete()
+            except discord.NotFound:
+                pass
+            session.delete(leaderboard_message)
+        session.commit()
+
+
+def clear_leaderboard_pages(session: SQLAlchemySession, channel_id: int):
+    """
+    Forget the stored leaderboard messages for a channel, e.g. after purging it,
+    so the next print_leaderboard posts a fresh set of pages
+    """
+    session.query(LeaderboardMessage).filter(
+        LeaderboardMessage.channel_id == channel_id
+    ).delete()
 
 
 def code_block(content: str, language: str = "autohotkey") -> str:
@@ -1673,7 +1609,7 @@ def get_team_name_diff(
 
 async def move_game_players(
     game_id: str, interaction: Interaction | None = None, guild: Guild | None = None
-):
+) -> VoiceMoveReport | None:
     session: sqlalchemy.orm.Session
     with Session() as session:
         message: Message | None = None
@@ -1687,7 +1623,7 @@ async def move_game_players(
 
         in_progress_game = (
             session.query(InProgressGame)
-            .filter(InProgressGame.id.startswith(game_id))
+            .filter(game_id_filter(InProgressGame, game_id))
             .first()
         )
         if not in_progress_game:
@@ -1700,76 +1636,32 @@ async def move_game_players(
                 return
             return
 
-        team0_ipg_players: list[InProgressGamePlayer] = session.query(
-            InProgressGamePlayer
-        ).filter(
-            InProgressGamePlayer.in_progress_game_id == in_progress_game.id,
-            InProgressGamePlayer.team == 0,
-        )
-        team1_ipg_players: list[InProgressGamePlayer] = session.query(
-            InProgressGamePlayer
-        ).filter(
-            InProgressGamePlayer.in_progress_game_id == in_progress_game.id,
-            InProgressGamePlayer.team == 1,
+        # resolve both teams in one query
+        game_players: list[tuple[int, int, bool]] = (
+            session.query(Player.id, InProgressGamePlayer.team, Player.move_enabled)
+            .join(InProgressGamePlayer, InProgressGamePlayer.player_id == Player.id)
+            .filter(InProgressGamePlayer.in_progress_game_id == in_progress_game.id)
+            .all()
         )
-        team0_player_ids = set(map(lambda x: x.player_id, team0_ipg_players))
-        team1_player_ids = set(map(lambda x: x.player_id, team1_ipg_players))
-        team0_players: list[Player] = session.query(Player).filter(Player.id.in_(team0_player_ids))  # type: ignore
-        team1_players: list[Player] = session.query(Player).filter(Player.id.in_(team1_player_ids))  # type: ignore
+        team_voice_channels = get_team_voice_channels(session, in_progress_game, guild)
+
+        moves: list[VoiceMove] = []
+        for player_id, team, move_enabled in game_players:
+            voice_channel = team_voice_channels[team]
+            if not move_enabled or not voice_channel:
+                continue
+            member: Member | None = guild.get_member(player_id)
+            # note: a member has to be in a voice channel already for them to be moved
+            if member and member.voice and member.voice.channel:
+                if member.voice.channel.id != voice_channel.id:
+                    moves.append(VoiceMove(member=member, channel=voice_channel))
+
+    return await voice_mover.move(
+        in_progress_game.id, moves, reason=f"Game {game_id} started"
+    )
+
 
-        be_voice_channel: VoiceChannel | None = None
-        ds_voice_channel: VoiceChannel | None = None
-        be_voice_channel, ds_voice_channel = get_team_voice_channels(
-            session, in_progress_game, guild
-        )
-
-        # TODO: combine for loops into one for all players
-        coroutines = []
-        for player in team0_players:
-            if player.move_enabled and be_voice_channel:
-                member: Member | None = guild.get_member(player.id)
-                if member:
-                    member_voice: VoiceState | None = member.voice
-                    if member_voice and member_voice.channel:
-                        try:
-                            coroutines.append(
-                                member.move_to(
-                                    be_voice_channel,
-                                    reason=f"Game {game_id} started",
-                                )
-                            )
-                        except Exception:
-                            _log.exception(
-                                f"Caught exception moving player to voice channel"
-                            )
-
-        for player in team1_players:
-            if player.move_enabled and ds_voice_channel:
-                member: Member | None = guild.get_member(player.id)
-                if member:
-                    member_voice: VoiceState | None = member.voice
-                    if member_voice and member_voice.channel:
-                        try:
-                            coroutines.append(
-                                member.move_to(
-                                    ds_voice_channel,
-                                    reason=f"Game {game_id} started",
-                                )
-                            )
-                        except Exception:
-                            _log.exception(
-                                f"Caught exception moving player to voice channel"
-                            )
-    # use gather to run the moves concurrently in the event loop
-    # note: a member has to be in a voice channel already for them to be moved, else it throws an exception
-    results = await asyncio.gather(*coroutines, return_exceptions=True)
-    for result in results:
-        # results should be empty unless an exception occured when moving a player
-        if isinstance(result, BaseException):
-            _log.exception("Ignored exception when moving a gameplayer:")
-
-
-async def move_game_players_lobby(game_id: str, guild: Guild):
+async def move_game_players_lobby(game_id: str, guild: Guild) -> VoiceMoveReport | None:
     session: sqlalchemy.orm.Session
     with Session() as session:
         in_progress_game: InProgressGame | None = (
@@ -1797,32 +1689,18 @@ async def move_game_players_lobby(game_id: str, guild: Guild):
             .all()
         )
 
-        coroutines = []
+        moves: list[VoiceMove] = []
         for ipg_channel in ipg_channels or []:
             discord_channel: discord.abc.GuildChannel | None = guild.get_channel(
                 ipg_channel.channel_id
             )
             if isinstance(discord_channel, VoiceChannel):
-                members: list[Member] = discord_channel.members
-                if members:
-                    for member in members:
-                        try:
-                            coroutines.append(
-                                member.move_to(
-                                    voice_lobby,
-                                    reason=f"Game {short_uuid(game_id)} finished",
-                                )
-                            )
-                        except Exception:
-                            _log.exception(
-                                f"Caught exception moving player to voice lobby"
-                            )
-
-    results = await asyncio.gather(*coroutines, return_exceptions=True)
-    for result in results:
-        # results should be empty unless an exception occured when moving a player
-        if isinstance(result, BaseException):
-            _log.exception("Ignored exception when moving a gameplayer to lobby:")
+                for member in discord_channel.members:
+                    moves.append(VoiceMove(member=member, channel=voice_lobby))
+
+    return await voice_mover.move(
+        game_id, moves, reason=f"Game {short_uuid(game_id)} finished"
+    )
 
 
 def win_rate(wins, losses, ties):
@@ -1935,22 +1813,33 @@ async def unlocked_queue_autocomplete(interaction: Interaction, current: str):
 
 
 async def in_progress_game_autocomplete(interaction: Interaction, current: str):
-    result = []
     session: SQLAlchemySession
     with Session() as session:
-        in_progress_games: list[InProgressGame] | None = (
-            session.query(InProgressGame).limit(25).all()
-        )  # discord only supports up to 25 choices
-        if in_progress_games:
-            for ipg in in_progress_games:
-                short_game_id = short_uuid(ipg.id)
-                if current in short_game_id:
-                    result.append(
-                        discord.app_commands.Choice(
-                            name=short_game_id, value=short_game_id
-                        )
-                    )
-    return result
+        short_game_ids: list[str] = session.scalars(
+            select(InProgressGame.short_id)
+            .where(InProgressGame.short_id.startswith(current))
+            .order_by(InProgressGame.short_id)
+            .limit(25)  # discord only supports up to 25 choices
+        ).all()
+    return [
+        discord.app_commands.Choice(name=short_game_id, value=short_game_id)
+        for short_game_id in short_game_ids
+    ]
+
+
+async def finished_game_autocomplete(interaction: Interaction, current: str):
+    session: SQLAlchemySession
+    with Session() as session:
+        short_game_ids: list[str] = session.scalars(
+            select(FinishedGame.short_id)
+            .where(FinishedGame.short_id.startswith(current))
+            .order_by(FinishedGame.short_id)
+            .limit(25)  # discord only supports up to 25 choices
+        ).all()
+    return [
+        discord.app_commands.Choice(name=short_game_id, value=short_game_id)
+        for short_game_id in short_game_ids
+    ]
 
 
 async def rotation_autocomplete(interaction: Interaction, current: str):
@@ -2188,9 +2077,8 @@ def del_player_from_queues_and_waitlists(
 
 def get_team_voice_channels(
     session: SQLAlchemySession, in_progress_game: InProgressGame, guild: Guild
-):
-    team0_vc: VoiceChannel | None = None
-    team1_vc: VoiceChannel | None = None
+) -> tuple[VoiceChannel | None, VoiceChannel | None]:
+    team_vcs: list[VoiceChannel | None] = [None, None]
     ipg_channels: list[InProgressGameChannel] | None = (
         session.query(InProgressGameChannel)
         .filter(InProgressGameChannel.in_progress_game_id == in_progress_game.id)
@@ -2200,13 +2088,16 @@ def get_team_voice_channels(
         discord_channel: discord.abc.GuildChannel | None = guild.get_channel(
             ipg_channel.channel_id
         )
-        if isinstance(discord_channel, VoiceChannel):
-            # This is suboptimal and fragile solution but it's good enough for now. We should keep track of each team's VC in the database
-            if in_progress_game.team0_name in discord_channel.name:
-                team0_vc = discord_channel
-            elif in_progress_game.team1_name in discord_channel.name:
-                team1_vc = discord_channel
-    return team0_vc, team1_vc
+        if not isinstance(discord_channel, VoiceChannel):
+            continue
+        if ipg_channel.team in (0, 1):
+            team_vcs[ipg_channel.team] = discord_channel
+        # Channels created before the team was stored, match them by name
+        elif in_progress_game.team0_name in discord_channel.name:
+            team_vcs[0] = discord_channel
+        elif in_progress_game.team1_name in discord_channel.name:
+            team_vcs[1] = discord_channel
+    return team_vcs[0], team_vcs[1]
 
 
 def flatten_list(l: list[list[any]]) -> list[any]:
@@ -2227,99 +2118,223 @@ def get_category_trueskill(
 
     This will create the appropriate PlayerCategoryTrueskill if not found.
     """
+    return get_category_trueskills(
+        session,
+        config,
+        {player_id: position_id},
+        queue_enabled_map_trueskill,
+        category_id,
+        map_id,
+    )[player_id]
+
+
+def _category_trueskill_keys(
+    config: Config,
+    position_id_by_player_id: dict[int, str | None],
+    queue_enabled_map_trueskill: bool,
+    map_id: str | None,
+) -> tuple[dict[int, str | None], str | None]:
     if not config.enable_position_trueskill:
-        position_id = None
+        position_id_by_player_id = {
+            player_id: None for player_id in position_id_by_player_id
+        }
     if not config.enable_map_trueskill or not queue_enabled_map_trueskill:
         map_id = None
+    return position_id_by_player_id, map_id
+
+
+def _find_category_trueskills(
+    pcts: list[PlayerCategoryTrueskill],
+    position_id_by_player_id: dict[int, str | None],
+    map_id: str | None,
+) -> tuple[dict[int, PlayerCategoryTrueskill], dict[int, tuple[float, float] | None]]:
+    """
+    Match every player to their pct among all of their pcts in the category.
+
+    :returns: The pcts found by player id, and for the players without one the
+    (mu, sigma) of the nearest parent pct, or None if they don't have any
+    """
+    # (player id, position id, map id) -> pct
+    pct_by_key: dict[tuple, PlayerCategoryTrueskill] = {
+        (pct.player_id, pct.position_id, pct.map_id): pct for pct in pcts
+    }
+    found: dict[int, PlayerCategoryTrueskill] = {}
+    missing: dict[int, tuple[float, float] | None] = {}
+    for player_id, position_id in position_id_by_player_id.items():
+        pct = pct_by_key.get((player_id, position_id, map_id))
+        if pct:
+            found[player_id] = pct
+            continue
+        # Same fallback order as get_category_trueskill: the same map without
+        # a position, or the same position without a map, then the category
+        # alone
+        parent: PlayerCategoryTrueskill | None = None
+        if position_id:
+            parent = pct_by_key.get((player_id, None, map_id))
+        elif map_id:
+            parent = pct_by_key.get((player_id, position_id, None))
+        if not parent:
+            parent = pct_by_key.get((player_id, None, None))
+        missing[player_id] = (parent.mu, parent.sigma) if parent else None
+    return found, missing
+
+
+def _new_category_trueskills(
+    config: Config,
+    missing: dict[int, tuple[float, float] | None],
+    players: list[Player],
+    position_id_by_player_id: dict[int, str | None],
+    category_id: str,
+    map_id: str | None,
+) -> dict[int, PlayerCategoryTrueskill]:
+    """
+    Create the pcts of the players without one. players must contain the
+    players without a parent pct, whose global rating is used instead.
+    """
+    # We couldn't find any player_category_trueskill, so use the global player one
+    for player in players:
+        if missing.get(player.id, ()) is None:
+            missing[player.id] = (
+                player.rated_trueskill_mu,
+                player.rated_trueskill_sigma,
+            )
+    now = datetime.now(timezone.utc)
+    new_pcts: dict[int, PlayerCategoryTrueskill] = {}
+    for player_id, parent in missing.items():
+        if parent is None:
+            _log.warning(
+                f"[_new_category_trueskills] Could not find player {player_id}"
+            )
+            continue
+        mu_to_use, sigma_to_use = parent
+        # Since this is a new PCT, juice up the sigma so it can adjust quicker
+        sigma_to_use = min(2 * sigma_to_use, config.default_trueskill_sigma)
+        new_pcts[player_id] = PlayerCategoryTrueskill(
+            player_id=player_id,
+            category_id=category_id,
+            position_id=position_id_by_player_id[player_id],
+            map_id=map_id,
+            mu=mu_to_use,
+            sigma=sigma_to_use,
+            rank=mu_to_use - 3 * sigma_to_use,
+            last_game_finished_at=now,
+        )
+    return new_pcts
+
+
+def get_category_trueskills(
+    session: SQLAlchemySession,
+    config: Config,
+    position_id_by_player_id: dict[int, str | None],
+    queue_enabled_map_trueskill: bool,
+    category_id: str,
+    map_id: str | None,
+) -> dict[int, PlayerCategoryTrueskill]:
+    """
+    Bulk version of get_category_trueskill: fetch the category trueskill of
+    every player (at their position, if any) with one query and create the
+    missing ones with one commit.
 
-    pct = (
+    :returns: The PlayerCategoryTrueskill of every player, keyed by player id
+    """
+    if not position_id_by_player_id:
+        return {}
+    position_id_by_player_id, map_id = _category_trueskill_keys(
+        config, position_id_by_player_id, queue_enabled_map_trueskill, map_id
+    )
+    pcts: list[PlayerCategoryTrueskill] = (
         session.query(PlayerCategoryTrueskill)
         .filter(
-            PlayerCategoryTrueskill.player_id == player_id,
+            PlayerCategoryTrueskill.player_id.in_(list(position_id_by_player_id)),
             PlayerCategoryTrueskill.category_id == category_id,
-            PlayerCategoryTrueskill.position_id == position_id,
-            PlayerCategoryTrueskill.map_id == map_id,
         )
-        .first()
+        .all()
     )
-    if pct:
-        return pct
+    result, missing = _find_category_trueskills(pcts, position_id_by_player_id, map_id)
+    if not missing:
+        return result
+    players_without_parent = [
+        player_id for player_id, parent in missing.items() if parent is None
+    ]
+    players: list[Player] = []
+    if players_without_parent:
+        players = (
+            session.query(Player).filter(Player.id.in_(players_without_parent)).all()
+        )
+    new_pcts = _new_category_trueskills(
+        config, missing, players, position_id_by_player_id, category_id, map_id
+    )
+    session.add_all(new_pcts.values())
+    session.commit()
+    return result | new_pcts
 
-    # We couldn't find a matching PCT, so find the nearest parent and create
-    # a new one based on that
-    mu_to_use = None
-    sigma_to_use = None
 
-    if position_id:
-        # Try to find a one with a map but no position
-        positionless_pct = (
-            session.query(PlayerCategoryTrueskill)
-            .filter(
-                PlayerCategoryTrueskill.player_id == player_id,
+async def async_get_category_trueskills(
+    session: AsyncSession,
+    config: Config,
+    position_id_by_player_id: dict[int, str | None],
+    queue_enabled_map_trueskill: bool,
+    category_id: str,
+    map_id: str | None,
+) -> dict[int, PlayerCategoryTrueskill]:
+    """
+    Async version of get_category_trueskills
+    """
+    if not position_id_by_player_id:
+        return {}
+    position_id_by_player_id, map_id = _category_trueskill_keys(
+        config, position_id_by_player_id, queue_enabled_map_trueskill, map_id
+    )
+    pcts: list[PlayerCategoryTrueskill] = list(
+        await session.scalars(
+            select(PlayerCategoryTrueskill).where(
+                PlayerCategoryTrueskill.player_id.in_(list(position_id_by_player_id)),
                 PlayerCategoryTrueskill.category_id == category_id,
-                PlayerCategoryTrueskill.position_id == None,
-                PlayerCategoryTrueskill.map_id == map_id,
             )
-            .first()
         )
-        if positionless_pct:
-            mu_to_use = positionless_pct.mu
-            sigma_to_use = positionless_pct.sigma
-
-    elif map_id:
-        # Try to find a one with a position but no map
-        mapless_pct = (
-            session.query(PlayerCategoryTrueskill)
-            .filter(
-                PlayerCategoryTrueskill.player_id == player_id,
-                PlayerCategoryTrueskill.category_id == category_id,
-                PlayerCategoryTrueskill.position_id == position_id,
-                PlayerCategoryTrueskill.map_id == None,
+    )
+    result, missing = _find_category_trueskills(pcts, position_id_by_player_id, map_id)
+    if not missing:
+        return result
+    players_without_parent = [
+        player_id for player_id, parent in missing.items() if parent is None
+    ]
+    players: list[Player] = []
+    if players_without_parent:
+        players = list(
+            await session.scalars(
+                select(Player).where(Player.id.in_(players_without_parent))
             )
-            .first()
         )
-        if mapless_pct:
-            mu_to_use = mapless_pct.mu
-            sigma_to_use = mapless_pct.sigma
+    new_pcts = _new_category_trueskills(
+        config, missing, players, position_id_by_player_id, category_id, map_id
+    )
+    session.add_all(new_pcts.values())
+    await session.commit()
+    return result | new_pcts
 
-    if mu_to_use is None and sigma_to_use is None:
-        # Try category alone, no position or map
-        category_only_pct = (
-            session.query(PlayerCategoryTrueskill)
-            .filter(
-                PlayerCategoryTrueskill.player_id == player_id,
-                PlayerCategoryTrueskill.category_id == category_id,
-                PlayerCategoryTrueskill.position_id == None,
-                PlayerCategoryTrueskill.map_id == None,
-            )
-            .first()
-        )
-        if category_only_pct:
-            mu_to_use = category_only_pct.mu
-            sigma_to_use = category_only_pct.sigma
 
-    # We couldn't find any player_category_trueskill, so use the global player one
-    if mu_to_use is None and sigma_to_use is None:
-        player: Player = session.query(Player).filter(Player.id == player_id).first()
-        mu_to_use = player.rated_trueskill_mu
-        sigma_to_use = player.rated_trueskill_sigma
-
-    # Since this is a new PCT, juice up the sigma so it can adjust quicker
-    sigma_to_use = min(2 * sigma_to_use, config.default_trueskill_sigma)
-
-    new_pct = PlayerCategoryTrueskill(
-        player_id=player_id,
-        category_id=category_id,
-        position_id=position_id,
-        map_id=map_id,
-        mu=mu_to_use,
-        sigma=sigma_to_use,
-        rank=mu_to_use - 3 * sigma_to_use,
-        last_game_finished_at=datetime.now(timezone.utc),
-    )
-    session.add(new_pct)
-    session.commit()
-    return new_pct
+async def async_get_category_trueskill(
+    session: AsyncSession,
+    config: Config,
+    player_id: int,
+    queue_enabled_map_trueskill: bool,
+    category_id: str,
+    map_id: str | None,
+    position_id: str | None = None,
+) -> PlayerCategoryTrueskill:
+    """
+    Async version of get_category_trueskill
+    """
+    pcts = await async_get_category_trueskills(
+        session,
+        config,
+        {player_id: position_id},
+        queue_enabled_map_trueskill,
+        category_id,
+        map_id,
+    )
+    return pcts[player_id]
 
 
 @dataclass
@@ -0,0 +1,100 @@
+import logging
+
+import sqlalchemy
+from discord import ButtonStyle, Embed, Interaction
+from discord.ui import Button, button
+
+from discord_bots.game_history import (
+    GameHistoryCursor,
+    GameHistoryFilters,
+    load_game_history_page,
+)
+from discord_bots.models import Session
+from discord_bots.utils import (
+    build_finished_game_embed,
+    cache_finished_game_embed,
+    get_cached_finished_game_embed,
+)
+from discord_bots.views.base import BaseView
+
+_log = logging.getLogger(__name__)
+
+
+class GameHistoryView(BaseView):
+    """
+    Pages through finished games with Newer/Older buttons. Rendered pages are
+    kept on the view, so going back and forth only queries each page once.
+    """
+
+    def __init__(
+        self,
+        author_id: int,
+        title: str,
+        filters: GameHistoryFilters,
+        page_size: int,
+        timeout: float = 300,
+    ):
+        super().__init__(timeout=timeout)
+        self.author_id: int = author_id
+        self.title: str = title
+        self.filters: GameHistoryFilters = filters
+        self.page_size: int = page_size
+        self.page: int = 0
+        # cursors[n] is where page n starts, None for the newest page
+        self.cursors: list[GameHistoryCursor | None] = [None]
+        # page number -> (embeds, has_more)
+        self.rendered_pages: dict[int, tuple[list[Embed], bool]] = {}
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        if interaction.user and interaction.user.id == self.author_id:
+            return True
+        await interaction.response.send_message(
+            "This game history is not for you.", ephemeral=True
+        )
+        return False
+
+    def render_page(self, page: int) -> tuple[list[Embed], bool]:
+        if page in self.rendered_pages:
+            return self.rendered_pages[page]
+        session: sqlalchemy.orm.Session
+        with Session() as session:
+            history_page = load_game_history_page(
+                session, self.filters, self.page_size, self.cursors[page]
+            )
+        embeds: list[Embed] = []
+        for entry in reversed(history_page.entries):  # show most recent games last
+            embed = get_cached_finished_game_embed(entry.finished_game)
+            if embed is None:
+                embed = build_finished_game_embed(
+                    entry.finished_game, entry.finished_game_players, entry.map
+                )
+                cache_finished_game_embed(entry.finished_game, embed)
+            embed.timestamp = entry.finished_game.finished_at
+            embeds.append(embed)
+        if history_page.has_more and len(self.cursors) == page + 1:
+            self.cursors.append(history_page.next_cursor)
+        self.rendered_pages[page] = (embeds, history_page.has_more)
+        return self.rendered_pages[page]
+
+    def content(self) -> str:
+        return f"{self.title} (page {self.page + 1})"
+
+    def update_buttons(self, has_more: bool):
+        self.newer.disabled = self.page == 0
+        self.older.disabled = not has_more
+
+    async def show_page(self, interaction: Interaction, page: int):
+        embeds, has_more = self.render_page(page)
+        self.page = page
+        self.update_buttons(has_more)
+        await interaction.response.edit_message(
+            content=self.content(), embeds=embeds, view=self
+        )
+
+    @button(label="Newer", style=ButtonStyle.secondary, emoji="◀️")
+    async def newer(self, interaction: Interaction, button: Button):
+        await self.show_page(interaction, max(self.page - 1, 0))
+
+    @button(label="Older", style=ButtonStyle.secondary, emoji="▶️")
+    async def older(self, interaction: Interaction, button: Button):
+        await self.show_page(interaction, self.page + 1)
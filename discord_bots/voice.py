@@ -0,0 +1,111 @@
+# Orchestrates moving members between voice channels. Every move in the bot
+# goes through the same limiter so that several games starting or finishing at
+# once don't all hit the API together and trigger rate limits.
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+import discord
+from discord import Member, VoiceChannel
+
+import discord_bots.config as config
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class VoiceMove:
+    member: Member
+    channel: VoiceChannel
+
+
+@dataclass
+class VoiceMoveReport:
+    game_id: str
+    reason: str
+    attempted: int = 0
+    moved: int = 0
+    failed: int = 0
+    retries: int = 0
+    latencies: list[float] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def max_latency(self) -> float:
+        return max(self.latencies, default=0.0)
+
+    def __str__(self) -> str:
+        return (
+            f"game={self.game_id} reason='{self.reason}' moved={self.moved}/{self.attempted} "
+            f"failed={self.failed} retries={self.retries} "
+            f"max_latency={self.max_latency:.2f}s elapsed={self.elapsed:.2f}s"
+        )
+
+
+class VoiceMoveOrchestrator:
+    """
+    Runs member moves with a shared concurrency cap and a minimum spacing
+    between requests. Moves that fail with a rate limit or server error are
+    retried with exponential backoff.
+    """
+
+    def __init__(self, concurrency: int, interval: float, max_retries: int):
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._interval = interval
+        self._max_retries = max_retries
+        self._spacing_lock = asyncio.Lock()
+        self._last_request_at = 0.0
+
+    async def move(
+        self, game_id: str, moves: list[VoiceMove], reason: str
+    ) -> VoiceMoveReport:
+        report = VoiceMoveReport(game_id=game_id, reason=reason)
+        start = time.monotonic()
+        await asyncio.gather(*[self._move_one(move, reason, report) for move in moves])
+        report.elapsed = time.monotonic() - start
+        _log.info(f"[VoiceMoveOrchestrator.move] {report}")
+        return report
+
+    async def _wait_for_slot(self):
+        async with self._spacing_lock:
+            wait = self._last_request_at + self._interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_request_at = time.monotonic()
+
+    async def _move_one(self, move: VoiceMove, reason: str, report: VoiceMoveReport):
+        report.attempted += 1
+        queued_at = time.monotonic()
+        async with self._semaphore:
+            for attempt in range(self._max_retries + 1):
+                await self._wait_for_slot()
+                try:
+                    await move.member.move_to(move.channel, reason=reason)
+                except discord.HTTPException as e:
+                    retryable = e.status == 429 or e.status >= 500
+                    if retryable and attempt < self._max_retries:
+                        report.retries += 1
+                        await asyncio.sleep(2**attempt * max(self._interval, 0.5))
+                        continue
+                    _log.warning(
+                        f"[VoiceMoveOrchestrator._move_one] Failed to move {move.member.id} to {move.channel.id}: {e}"
+                    )
+                    report.failed += 1
+                    return
+                except Exception:
+                    _log.exception(
+                        f"[VoiceMoveOrchestrator._move_one] Failed to move {move.member.id} to {move.channel.id}"
+                    )
+                    report.failed += 1
+                    return
+                report.moved += 1
+                report.latencies.append(time.monotonic() - queued_at)
+                return
+
+
+voice_mover = VoiceMoveOrchestrator(
+    concurrency=config.VOICE_MOVE_CONCURRENCY,
+    interval=config.VOICE_MOVE_INTERVAL,
+    max_retries=config.VOICE_MOVE_MAX_RETRIES,
+)
@@ -1,36 +1,28 @@
-from sqlalchemy.orm.session import Session as SQLAlchemySession
+import numpy as np
 
-from discord_bots.models import FinishedGame, Session
+from discord_bots.match_history import load_games
 
 """
 Measures the prediction accuracy of the last 1000 (default) matches.
 Each finished game contains a win probability for team0 winning, so
 we check this win probability against the match result to determine the overall accuracy.
+Reads the export written by scripts/export_match_history.py.
 """
-session: SQLAlchemySession = Session()
-finished_games: list[FinishedGame] = (
-    session.query(FinishedGame)
-    .order_by(FinishedGame.finished_at.desc())
-    .limit(1000)  # Increase or decrease based on preference
-    .all()
-)
+games = (
+    load_games().sort_values("finished_at").tail(1000)
+)  # Increase or decrease based on preference
 
-total_matches = len(finished_games)
-correct_predictions = 0
-incorrect_predictions = 0
-for game in finished_games:
-    result = game.winning_team
-    team0_win = True if result == 0 else False
-    team0_win_probability = game.win_probability
-    team1_win_probability = abs(1 - team0_win_probability)
-    if (team0_win_probability > team1_win_probability) == team0_win:
-        # team0 was predicted to win and they did actually win
-        correct_predictions += 1
-    else:
-        incorrect_predictions += 1
+team0_win = games["winning_team"].to_numpy() == 0
+team0_win_probability = games["win_probability"].to_numpy()
+team1_win_probability = np.abs(1 - team0_win_probability)
+# team0 was predicted to win and they did actually win, or the other way around
+correct = (team0_win_probability > team1_win_probability) == team0_win
 
+total_matches = len(games)
+correct_predictions = int(correct.sum())
+incorrect_predictions = total_matches - correct_predictions
 accuracy = round(
-    correct_predictions / (correct_predictions + incorrect_predictions) * 100, 2
+    correct_predictions / max(correct_predictions + incorrect_predictions, 1) * 100, 2
 )
 print("Total Matches:", total_matches)
 print(f"Accuracy: {correct_predictions}/{incorrect_predictions} [{accuracy:.2f}%]")
@@ -0,0 +1,172 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+"""
+Compare SQLite throughput with the defaults the bot used to run with (rollback
+journal, one commit per write) against the production profile in models.py
+(WAL, synchronous=NORMAL, cache and mmap, batched commits from one writer and
+read only connections for readers).
+
+One writer thread inserts rows while reader threads run a stats style
+aggregate against the same table. Uses the sqlite3 module directly with a
+throwaway database, so it can be run without the bot's configuration.
+"""
+
+
+def parse_args() -> dict[str, any]:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the default and tuned SQLite profiles.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--writes",
+        type=int,
+        default=2000,
+        help="Number of rows the writer inserts",
+    )
+    parser.add_argument(
+        "--readers",
+        type=int,
+        default=4,
+        help="Number of reader threads",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50,
+        help="Writes per commit for the tuned profile",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=50000,
+        help="Rows in the table before the benchmark starts",
+    )
+    arguments = parser.parse_args()
+    return vars(arguments)
+
+
+TUNED_PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=15000",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+]
+
+
+def connect(path: str, tuned: bool, read_only: bool = False) -> sqlite3.Connection:
+    if read_only and tuned:
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=15)
+    else:
+        connection = sqlite3.connect(path, timeout=15)
+    if tuned:
+        if not read_only:
+            connection.execute("PRAGMA journal_mode=WAL")
+        for pragma in TUNED_PRAGMAS:
+            connection.execute(pragma)
+        if read_only:
+            connection.execute("PRAGMA query_only=ON")
+    else:
+        connection.execute("PRAGMA journal_mode=DELETE")
+    return connection
+
+
+def seed(path: str, rows: int):
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE finished_game_player ("
+        "id INTEGER PRIMARY KEY, player_id INTEGER, team INTEGER, mu REAL)"
+    )
+    connection.execute("CREATE INDEX ix_player_id ON finished_game_player (player_id)")
+    connection.executemany(
+        "INSERT INTO finished_game_player (player_id, team, mu) VALUES (?, ?, ?)",
+        ((i % 500, i % 2, 25.0 + i % 7) for i in range(rows)),
+    )
+    connection.commit()
+    connection.close()
+
+
+def run(path: str, tuned: bool, input_args: dict) -> dict[str, float]:
+    done = threading.Event()
+    read_latencies: list[float] = []
+    lock = threading.Lock()
+
+    def reader(player_offset: int):
+        connection = connect(path, tuned, read_only=True)
+        latencies = []
+        i = player_offset
+        while not done.is_set():
+            started_at = time.perf_counter()
+            connection.execute(
+                "SELECT team, COUNT(*), AVG(mu) FROM finished_game_player "
+                "WHERE player_id = ? GROUP BY team",
+                (i % 500,),
+            ).fetchall()
+            latencies.append(time.perf_counter() - started_at)
+            i += 1
+        connection.close()
+        with lock:
+            read_latencies.extend(latencies)
+
+    readers = [
+        threading.Thread(target=reader, args=(i,)) for i in range(input_args["readers"])
+    ]
+    for thread in readers:
+        thread.start()
+
+    writer = connect(path, tuned)
+    batch_size = input_args["batch_size"] if tuned else 1
+    started_at = time.perf_counter()
+    for i in range(input_args["writes"]):
+        writer.execute(
+            "INSERT INTO finished_game_player (player_id, team, mu) VALUES (?, ?, ?)",
+            (i % 500, i % 2, 25.0),
+        )
+        if (i + 1) % batch_size == 0:
+            writer.commit()
+    writer.commit()
+    write_seconds = time.perf_counter() - started_at
+    done.set()
+    for thread in readers:
+        thread.join()
+    writer.close()
+
+    read_latencies.sort()
+    return {
+        "writes/s": input_args["writes"] / write_seconds,
+        "reads/s": len(read_latencies) / write_seconds,
+        "read p50 ms": 1000 * statistics.median(read_latencies or [0]),
+        "read p99 ms": 1000
+        * (
+            read_latencies[int(0.99 * (len(read_latencies) - 1))]
+            if read_latencies
+            else 0
+        ),
+        "read max ms": 1000 * (read_latencies[-1] if read_latencies else 0),
+    }
+
+
+def main():
+    input_args = parse_args()
+    results = {}
+    for name, tuned in (("default", False), ("tuned", True)):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.db")
+            seed(path, input_args["rows"])
+            results[name] = run(path, tuned, input_args)
+
+    print(f"{'':<14}{'default':>12}{'tuned':>12}{'change':>10}")
+    for metric in results["default"]:
+        default, tuned = results["default"][metric], results["tuned"][metric]
+        change = f"{tuned / default:.1f}x" if default else "-"
+        print(f"{metric:<14}{default:>12.2f}{tuned:>12.2f}{change:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import json
+import sys
+
+from sqlalchemy import select
+from sqlalchemy.orm.session import Session as SQLAlchemySession
+from sqlalchemy.sql import Select
+
+from discord_bots.models import (
+    FinishedGame,
+    FinishedGamePlayer,
+    InProgressGame,
+    MapVote,
+    PlayerCategoryTrueskill,
+    QueuePlayer,
+    RotationMap,
+    RotationMapHistory,
+    Session,
+)
+
+"""
+Run EXPLAIN on the bot's hot lookups against the configured database (SQLite
+or Postgres) and exit with an error if any of them scans a whole table, or on
+SQLite has to sort rows that an index should return in order. Run it after
+adding a migration or changing one of these queries.
+
+The values in the queries don't matter, only the plan does, so it can be run
+against an empty database that is migrated to head.
+"""
+
+
+def parse_args() -> dict[str, any]:
+    parser = argparse.ArgumentParser(
+        description="Check that the hot queries use indexes.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print the plan of every query, not only the failing ones",
+    )
+    arguments = parser.parse_args()
+    return vars(arguments)
+
+
+QUERIES: dict[str, Select] = {
+    "category trueskill of a player": select(PlayerCategoryTrueskill).where(
+        PlayerCategoryTrueskill.player_id == 0,
+        PlayerCategoryTrueskill.category_id == "",
+        PlayerCategoryTrueskill.position_id == "",
+        PlayerCategoryTrueskill.map_id.is_(None),
+    ),
+    "category trueskills of a team": select(PlayerCategoryTrueskill).where(
+        PlayerCategoryTrueskill.player_id.in_([0, 1]),
+        PlayerCategoryTrueskill.category_id == "",
+    ),
+    "overall category trueskill": select(PlayerCategoryTrueskill).where(
+        PlayerCategoryTrueskill.player_id == 0,
+        PlayerCategoryTrueskill.category_id == "",
+        PlayerCategoryTrueskill.position_id.is_(None),
+        PlayerCategoryTrueskill.map_id.is_(None),
+    ),
+    "queue players in join order": select(QueuePlayer)
+    .where(QueuePlayer.queue_id == "")
+    .order_by(QueuePlayer.added_at.asc()),
+    "in progress game by short id": select(InProgressGame).where(
+        InProgressGame.short_id == ""
+    ),
+    "finished game by short id": select(FinishedGame).where(
+        FinishedGame.short_id == ""
+    ),
+    "finished games of a player": select(FinishedGame)
+    .join(FinishedGamePlayer, FinishedGamePlayer.finished_game_id == FinishedGame.id)
+    .where(FinishedGamePlayer.player_id == 0),
+    "next map of a rotation": select(RotationMap).where(
+        RotationMap.rotation_id == "", RotationMap.is_next == True
+    ),
+    "rotation maps in order": select(RotationMap)
+    .where(RotationMap.rotation_id == "")
+    .order_by(RotationMap.ordinal.asc()),
+    "recent maps of a rotation": select(RotationMapHistory)
+    .where(RotationMapHistory.rotation_id == "")
+    .order_by(RotationMapHistory.selected_at.desc())
+    .limit(5),
+    "votes for a map": select(MapVote).where(MapVote.rotation_map_id == ""),
+}
+
+
+def sqlite_plan(session: SQLAlchemySession, sql: str) -> tuple[list[str], list[str]]:
+    """
+    The plan as one line per step, and the steps that scan or sort a table
+    """
+    rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    plan = [row[-1] for row in rows]
+    problems = [
+        step
+        for step in plan
+        # "SCAN table USING COVERING INDEX" still reads the whole index
+        if step.startswith("SCAN ") or step.startswith("USE TEMP B-TREE")
+    ]
+    return plan, problems
+
+
+def postgres_plan(session: SQLAlchemySession, sql: str) -> tuple[list[str], list[str]]:
+    # Postgres prefers sequential scans on small tables even if there is an
+    # index, so only allow them if there is no other way to run the query
+    session.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+    result = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+    document = result.scalar()
+    if isinstance(document, str):
+        document = json.loads(document)
+    plan: list[str] = []
+    problems: list[str] = []
+
+    def walk(node: dict, depth: int):
+        step = "  " * depth + node["Node Type"]
+        if "Relation Name" in node:
+            step += f" on {node['Relation Name']}"
+        if "Index Name" in node:
+            step += f" using {node['Index Name']}"
+        plan.append(step)
+        if node["Node Type"] == "Seq Scan":
+            problems.append(step.strip())
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(document[0]["Plan"], 0)
+    return plan, problems
+
+
+def main():
+    input_args = parse_args()
+    failed = 0
+    session: SQLAlchemySession
+    with Session() as session:
+        dialect = session.get_bind().dialect
+        explain = sqlite_plan if dialect.name == "sqlite" else postgres_plan
+        for name, query in QUERIES.items():
+            sql = str(
+                query.compile(
+                    dialect=dialect,
+                    compile_kwargs={"literal_binds": True, "render_postcompile": True},
+                )
+            )
+            plan, problems = explain(session, sql)
+            session.rollback()
+            if problems:
+                failed += 1
+                print(f"FAIL {name}: {', '.join(problems)}")
+            else:
+                print(f"OK   {name}")
+            if problems or input_args["verbose"]:
+                for step in plan:
+                    print(f"       {step}")
+
+    print(f"{len(QUERIES) - failed}/{len(QUERIES)} queries use indexes")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import logging
+
+from discord_bots.match_history import DEFAULT_EXPORT_DIR, export_match_history
+from discord_bots.models import Session
+from discord_bots.synergy import update_synergy
+
+"""
+Export the finished game history into a columnar file per chunk for the
+analytics scripts. Run it again to append the games finished since the last
+export. The synergy matrices are updated from the export afterwards.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export finished games and their players for analytics scripts",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--dir",
+        default=DEFAULT_EXPORT_DIR,
+        help="Directory the export is written to",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=5000,
+        help="Number of games per chunk",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild the export from scratch, e.g. after games were edited or deleted",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    with Session() as session:
+        exported = export_match_history(
+            session, args.dir, chunk_size=args.chunk_size, full=args.full
+        )
+    print(f"Exported {exported} games to {args.dir}")
+    update_synergy(args.dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,220 +1,175 @@
-import random
-from collections import defaultdict
-from datetime import timedelta
+import argparse
 
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-from scipy.interpolate import interp1d
-
-from discord_bots.models import FinishedGame, FinishedGamePlayer, Player, Session
-
-cnames = {
-    "aliceblue": "#F0F8FF",
-    "antiquewhite": "#FAEBD7",
-    "aqua": "#00FFFF",
-    "aquamarine": "#7FFFD4",
-    "azure": "#F0FFFF",
-    "beige": "#F5F5DC",
-    "bisque": "#FFE4C4",
-    "black": "#000000",
-    "blanchedalmond": "#FFEBCD",
-    "blue": "#0000FF",
-    "blueviolet": "#8A2BE2",
-    "brown": "#A52A2A",
-    "burlywood": "#DEB887",
-    "cadetblue": "#5F9EA0",
-    "chartreuse": "#7FFF00",
-    "chocolate": "#D2691E",
-    "coral": "#FF7F50",
-    "cornflowerblue": "#6495ED",
-    "cornsilk": "#FFF8DC",
-    "crimson": "#DC143C",
-    "cyan": "#00FFFF",
-    "darkblue": "#00008B",
-    "darkcyan": "#008B8B",
-    "darkgoldenrod": "#B8860B",
-    "darkgray": "#A9A9A9",
-    "darkgreen": "#006400",
-    "darkkhaki": "#BDB76B",
-    "darkmagenta": "#8B008B",
-    "darkolivegreen": "#556B2F",
-    "darkorange": "#FF8C00",
-    "darkorchid": "#9932CC",
-    "darkred": "#8B0000",
-    "darksalmon": "#E9967A",
-    "darkseagreen": "#8FBC8F",
-    "darkslateblue": "#483D8B",
-    "darkslategray": "#2F4F4F",
-    "darkturquoise": "#00CED1",
-    "darkviolet": "#9400D3",
-    "deeppink": "#FF1493",
-    "deepskyblue": "#00BFFF",
-    "dimgray": "#696969",
-    "dodgerblue": "#1E90FF",
-    "firebrick": "#B22222",
-    "floralwhite": "#FFFAF0",
-    "forestgreen": "#228B22",
-    "fuchsia": "#FF00FF",
-    "gainsboro": "#DCDCDC",
-    "ghostwhite": "#F8F8FF",
-    "gold": "#FFD700",
-    "goldenrod": "#DAA520",
-    "gray": "#808080",
-    "green": "#008000",
-    "greenyellow": "#ADFF2F",
-    "honeydew": "#F0FFF0",
-    "hotpink": "#FF69B4",
-    "indianred": "#CD5C5C",
-    "indigo": "#4B0082",
-    "ivory": "#FFFFF0",
-    "khaki": "#F0E68C",
-    "lavender": "#E6E6FA",
-    "lavenderblush": "#FFF0F5",
-    "lawngreen": "#7CFC00",
-    "lemonchiffon": "#FFFACD",
-    "lightblue": "#ADD8E6",
-    "lightcoral": "#F08080",
-    "lightcyan": "#E0FFFF",
-    "lightgoldenrodyellow": "#FAFAD2",
-    "lightgreen": "#90EE90",
-    "lightgray": "#D3D3D3",
-    "lightpink": "#FFB6C1",
-    "lightsalmon": "#FFA07A",
-    "lightseagreen": "#20B2AA",
-    "lightskyblue": "#87CEFA",
-    "lightslategray": "#778899",
-    "lightsteelblue": "#B0C4DE",
-    "lightyellow": "#FFFFE0",
-    "lime": "#00FF00",
-    "limegreen": "#32CD32",
-    "linen": "#FAF0E6",
-    "magenta": "#FF00FF",
-    "maroon": "#800000",
-    "mediumaquamarine": "#66CDAA",
-    "mediumblue": "#0000CD",
-    "mediumorchid": "#BA55D3",
-    "mediumpurple": "#9370DB",
-    "mediumseagreen": "#3CB371",
-    "mediumslateblue": "#7B68EE",
-    "mediumspringgreen": "#00FA9A",
-    "mediumturquoise": "#48D1CC",
-    "mediumvioletred": "#C71585",
-    "midnightblue": "#191970",
-    "mintcream": "#F5FFFA",
-    "mistyrose": "#FFE4E1",
-    "moccasin": "#FFE4B5",
-    "navajowhite": "#FFDEAD",
-    "navy": "#000080",
-    "oldlace": "#FDF5E6",
-    "olive": "#808000",
-    "olivedrab": "#6B8E23",
-    "orange": "#FFA500",
-    "orangered": "#FF4500",
-    "orchid": "#DA70D6",
-    "palegoldenrod": "#EEE8AA",
-    "palegreen": "#98FB98",
-    "paleturquoise": "#AFEEEE",
-    "palevioletred": "#DB7093",
-    "papayawhip": "#FFEFD5",
-    "peachpuff": "#FFDAB9",
-    "peru": "#CD853F",
-    "pink": "#FFC0CB",
-    "plum": "#DDA0DD",
-    "powderblue": "#B0E0E6",
-    "purple": "#800080",
-    "red": "#FF0000",
-    "rosybrown": "#BC8F8F",
-    "royalblue": "#4169E1",
-    "saddlebrown": "#8B4513",
-    "salmon": "#FA8072",
-    "sandybrown": "#FAA460",
-    "seagreen": "#2E8B57",
-    "seashell": "#FFF5EE",
-    "sienna": "#A0522D",
-    "silver": "#C0C0C0",
-    "skyblue": "#87CEEB",
-    "slateblue": "#6A5ACD",
-    "slategray": "#708090",
-    "snow": "#FFFAFA",
-    "springgreen": "#00FF7F",
-    "steelblue": "#4682B4",
-    "tan": "#D2B48C",
-    "teal": "#008080",
-    "thistle": "#D8BFD8",
-    "tomato": "#FF6347",
-    "turquoise": "#40E0D0",
-    "violet": "#EE82EE",
-    "wheat": "#F5DEB3",
-    "white": "#FFFFFF",
-    "whitesmoke": "#F5F5F5",
-    "yellow": "#FFFF00",
-    "yellowgreen": "#9ACD32",
-}
-cname_keys = list(cnames.keys())
-
-session = Session()
-oldest_game: FinishedGame = (
-    session.query(FinishedGame).order_by(FinishedGame.finished_at).first()
-)
-newest_game: FinishedGame = (
-    session.query(FinishedGame)
-    .order_by(FinishedGame.finished_at.desc())  # type: ignore
-    .first()
+import numpy as np
+import pandas as pd
+from dateutil.parser import parse as parse_date
+from matplotlib.collections import LineCollection
+
+from discord_bots.match_history import (
+    DEFAULT_EXPORT_DIR,
+    PLAYER_EXPORT_COLUMNS,
+    load_games,
+    load_players,
 )
 
-duration_days = (newest_game.finished_at - oldest_game.finished_at).days
-print(duration_days)
-
-# x_axis = [i for i in range(duration_days)]
-x_axis = [0]
-sigma_y_axes = defaultdict(list)
-mu_y_axes = defaultdict(list)
-
-players = list(session.query(Player))
-for player in players:
-    sigma_y_axes[player.id].append(0)
-    mu_y_axes[player.id].append(0)
-
-current_date = oldest_game.finished_at
-end_date = newest_game.finished_at
-# end_date = oldest_game.finished_at + timedelta(days=30)
-
-while current_date < end_date:
-    x_axis.append(x_axis[-1] + 1)
-    window_start = current_date
-    window_end = current_date + timedelta(days=1)
-    for player in players:
-        last_game_of_day: FinishedGamePlayer = (
-            session.query(FinishedGamePlayer)
-            .join(FinishedGame)
-            .filter(
-                FinishedGamePlayer.player_id == player.id,
-                FinishedGame.finished_at > window_start,
-                FinishedGame.finished_at <= window_end,
-            )
-            .order_by(FinishedGame.finished_at.desc())  # type: ignore
-            .first()
-        )
-        # print(last_game_of_day)
-        if last_game_of_day:
-            mu_y_axes[player.id].append(last_game_of_day.rated_trueskill_mu_after)
-            sigma_y_axes[player.id].append(last_game_of_day.rated_trueskill_sigma_after)
-        else:
-            mu_y_axes[player.id].append(mu_y_axes[player.id][-1])
-            sigma_y_axes[player.id].append(sigma_y_axes[player.id][-1])
+"""
+Plot the rating (mu after each game) of players over time. Every rating
+snapshot is read from the match history export, so run
+scripts/export_match_history.py first. Snapshots are grouped per player with
+numpy and drawn as a single LineCollection, so plotting a whole server is
+quick.
+"""
 
-    current_date += timedelta(days=2)
-    print(current_date, newest_game.finished_at)
 
+def parse_args() -> dict[str, any]:
+    parser = argparse.ArgumentParser(
+        description="Plot player ratings over time.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--categories",
+        nargs="*",
+        default=[],
+        help="Categories to plot. Leave empty to use all games.",
+    )
+    parser.add_argument(
+        "--from",
+        help="Date to start plotting, "
+        "supply date in format YYYY-MM-DD or YYYY-MM-DDThh:mm:ss",
+    )
+    parser.add_argument(
+        "--to",
+        help="Date to stop plotting, same format as --from",
+    )
+    parser.add_argument(
+        "--players",
+        nargs="*",
+        type=int,
+        default=[],
+        help="Player ids to plot. Leave empty to plot the --top highest rated players.",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=15,
+        help="Number of players to plot, by their last rating. 0 plots everyone.",
+    )
+    parser.add_argument(
+        "--max-points",
+        type=int,
+        default=500,
+        help="Downsample players with more games than this. 0 disables downsampling.",
+    )
+    parser.add_argument(
+        "--sigma",
+        action="store_true",
+        help="Shade mu +/- sigma around each line",
+    )
+    parser.add_argument(
+        "--output",
+        help="Save the plot to this file instead of showing it",
+    )
+    parser.add_argument(
+        "--dir",
+        default=DEFAULT_EXPORT_DIR,
+        help="Directory written by scripts/export_match_history.py",
+    )
+    arguments = parser.parse_args()
+    return vars(arguments)
 
-highest_rated_players = (
-    session.query(Player).order_by(Player.rated_trueskill_mu.desc()).limit(15).all()  # type: ignore
-)
 
-# print(sigma_y_axes)
-for player in highest_rated_players:
-    y = mu_y_axes[player.id]
-    # for y in mu_y_axes.values():
-    interpolate = interp1d(x_axis, y)
-    plt.plot(x_axis, interpolate(x_axis), color=random.choice(cname_keys))
+def load_snapshots(input_args: dict) -> dict[str, np.ndarray]:
+    """
+    One row per player per game, sorted by player then time
+    """
+    players = load_players(input_args["dir"])
+    if players.empty:
+        players = pd.DataFrame(columns=PLAYER_EXPORT_COLUMNS)
+    if input_args["categories"]:
+        games = load_games(input_args["dir"])
+        game_ids = games.loc[
+            games["category_name"].isin(input_args["categories"]), "id"
+        ]
+        players = players[players["finished_game_id"].isin(game_ids)]
+    if input_args["from"]:
+        players = players[players["finished_at"] >= parse_date(input_args["from"])]
+    if input_args["to"]:
+        players = players[players["finished_at"] < parse_date(input_args["to"])]
+    if input_args["players"]:
+        players = players[players["player_id"].isin(input_args["players"])]
+    players = players.sort_values(
+        ["player_id", "finished_at", "finished_game_id"], kind="stable"
+    )
+    return {
+        "player_id": players["player_id"].to_numpy(dtype=np.int64),
+        "name": players["player_name"].astype(object).to_numpy(),
+        "x": mdates.date2num(players["finished_at"].to_numpy(dtype="datetime64[us]")),
+        "mu": players["mu_after"].to_numpy(dtype=np.float64),
+        "sigma": players["sigma_after"].to_numpy(dtype=np.float64),
+    }
+
+
+def downsample(start: int, end: int, max_points: int) -> np.ndarray:
+    """
+    Indexes of evenly spaced rows in [start, end), always keeping the first
+    and last game
+    """
+    if max_points <= 0 or end - start <= max_points:
+        return np.arange(start, end)
+    return np.unique(np.linspace(start, end - 1, max_points).round().astype(np.int64))
+
+
+def main():
+    input_args = parse_args()
+    snapshots = load_snapshots(input_args)
+    player_ids = snapshots["player_id"]
+    if len(player_ids) == 0:
+        print("No games found")
+        return
+
+    # Rows are sorted by player, so each player is one contiguous slice
+    boundaries = np.flatnonzero(np.diff(player_ids)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(player_ids)]))
+    order = np.argsort(-snapshots["mu"][ends - 1], kind="stable")
+    if input_args["top"] > 0 and not input_args["players"]:
+        order = order[: input_args["top"]]
+
+    x, mu, sigma = snapshots["x"], snapshots["mu"], snapshots["sigma"]
+    colors = plt.get_cmap("tab20")(np.arange(len(order)) % 20)
+    segments = []
+    fig, ax = plt.subplots(figsize=(16, 9))
+    for color, i in zip(colors, order):
+        rows = downsample(starts[i], ends[i], input_args["max_points"])
+        segments.append(np.column_stack((x[rows], mu[rows])))
+        if input_args["sigma"]:
+            ax.fill_between(
+                x[rows],
+                mu[rows] - sigma[rows],
+                mu[rows] + sigma[rows],
+                color=color,
+                alpha=0.1,
+                linewidth=0,
+            )
+        ax.annotate(
+            snapshots["name"][ends[i] - 1],
+            (x[rows[-1]], mu[rows[-1]]),
+            color=color,
+            fontsize=8,
+        )
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=1))
+    ax.autoscale()
+    ax.xaxis_date()
+    ax.set_ylabel("mu")
+    fig.autofmt_xdate()
+
+    if input_args["output"]:
+        fig.savefig(input_args["output"])
+    else:
+        plt.show()
+
 
-plt.show()
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,45 @@
-from discord_bots.models import FinishedGame, FinishedGamePlayer, Player, Session
+import pandas as pd
 
-session = Session()
+from discord_bots.match_history import load_games, load_players
 
-finished_games: list[FinishedGame] = (
-    session.query(FinishedGame)
-    .order_by(FinishedGame.finished_at.desc())
-    .limit(200)
-    .all()
+"""
+Prints the last 200 games as CSV. Reads the export written by
+scripts/export_match_history.py.
+"""
+
+games = load_games().sort_values("finished_at").tail(200).iloc[::-1]
+players = load_players()
+players = players[players["finished_game_id"].isin(games["id"])]
+
+# "name,name,..." per game and team
+names = (
+    players.astype({"player_name": str})
+    .groupby(["finished_game_id", "team"])["player_name"]
+    .agg(",".join)
+    .unstack("team")
+    .reindex(columns=[0, 1])
+    .fillna("")
+)
+games = games.join(names, on="id")
+
+winning_team = games["winning_team"].map({-1: "tie", 0: "be", 1: "ds"}).fillna("")
+is_upset = ((games["win_probability"] > 0.5) & (games["winning_team"] == 1)) | (
+    (games["win_probability"] < 0.5) & (games["winning_team"] == 0)
+)
+output = pd.DataFrame(
+    {
+        "timestamp": games["finished_at"],
+        "winning_team": winning_team,
+        "team0_win%": games["win_probability"].round(2),
+        "team1_win%": (1 - games["win_probability"]).round(2),
+        "is_upset": is_upset,
+        "team0": games[0],
+        "team1": games[1],
+    }
 )
 
 print(
     "timestamp,winning_team,team0_win%,team1_win%,is_upset,t0player0,t0player1,t0player2,t0player3,t0player4,t1player0,t1player1,t1player2,t1player3,t1player4"
 )
-
-for finished_game in finished_games:
-    winning_team = ""
-    if finished_game.winning_team == -1:
-        winning_team = "tie"
-    elif finished_game.winning_team == 0:
-        winning_team = "be"
-    elif finished_game.winning_team == 1:
-        winning_team = "ds"
-    team0_players: list[Player] = (
-        session.query(Player)
-        .join(
-            FinishedGamePlayer,
-            Player.id == FinishedGamePlayer.player_id,
-        )
-        .filter(
-            FinishedGamePlayer.finished_game_id == finished_game.id,
-            FinishedGamePlayer.team == 0,
-        )
-    )
-    team1_players: list[Player] = (
-        session.query(Player)
-        .join(
-            FinishedGamePlayer,
-            Player.id == FinishedGamePlayer.player_id,
-        )
-        .filter(
-            FinishedGamePlayer.finished_game_id == finished_game.id,
-            FinishedGamePlayer.team == 1,
-        )
-    )
-    team0_names: str = ",".join([player.name for player in team0_players])
-    team1_names: str = ",".join([player.name for player in team1_players])
-    is_upset = False
-    if finished_game.win_probability > 0.5 and finished_game.winning_team == 1:
-        is_upset = True
-    if finished_game.win_probability < 0.5 and finished_game.winning_team == 0:
-        is_upset = True
-    print(
-        f"{finished_game.finished_at},{winning_team},{round(finished_game.win_probability,2)},{round(1-finished_game.win_probability,2)},{is_upset},{team0_names},{team1_names}"
-    )
+for row in output.itertuples(index=False):
+    print(",".join(str(value) for value in row))
@@ -0,0 +1,85 @@
+import argparse
+
+from table2ascii import Alignment, PresetStyle, table2ascii
+
+from discord_bots.match_history import DEFAULT_EXPORT_DIR
+from discord_bots.synergy import PairStats, update_synergy
+
+"""
+Print the teammates that win the most and least together, and the players that
+played against each other the most. Reads the match history export, so run
+scripts/export_match_history.py first.
+"""
+
+
+def parse_args() -> dict[str, any]:
+    parser = argparse.ArgumentParser(
+        description="Print teammate synergies and rivalries.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--min-games",
+        type=int,
+        default=20,
+        help="Leave out pairs with fewer games together (or against each other)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=15,
+        help="Number of pairs in each table",
+    )
+    parser.add_argument(
+        "--dir",
+        default=DEFAULT_EXPORT_DIR,
+        help="Directory written by scripts/export_match_history.py",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the matrices instead of only adding the newly exported games",
+    )
+    arguments = parser.parse_args()
+    return vars(arguments)
+
+
+def pairs_table(pairs: list[PairStats]) -> str:
+    return table2ascii(
+        header=["Player", "Player", "Games", "Wins", "Win %"],
+        body=[
+            [
+                pair.player_name,
+                pair.other_player_name,
+                pair.games,
+                pair.wins,
+                f"{pair.win_rate:.1f}",
+            ]
+            for pair in pairs
+        ],
+        style=PresetStyle.plain,
+        alignments=[
+            Alignment.LEFT,
+            Alignment.LEFT,
+            Alignment.RIGHT,
+            Alignment.RIGHT,
+            Alignment.RIGHT,
+        ],
+    )
+
+
+def main():
+    input_args = parse_args()
+    matrices = update_synergy(input_args["dir"], input_args["rebuild"])
+    min_games, top = input_args["min_games"], input_args["top"]
+    print("Best teammates")
+    print(pairs_table(matrices.top_synergies(min_games, top)))
+    print()
+    print("Worst teammates")
+    print(pairs_table(matrices.top_synergies(min_games, top, best=False)))
+    print()
+    print("Rivalries (record of the first player)")
+    print(pairs_table(matrices.top_rivalries(min_games, top)))
+
+
+if __name__ == "__main__":
+    main()